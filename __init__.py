@@ -1,5 +1,7 @@
 from .core import DataQualityComparator, DataReference
-from . import models, constants, exceptions, utils, adapters
+from .async_core import AsyncDataQualityComparator
+from .state import ComparisonStateStore
+from . import models, constants, exceptions, utils, adapters, state
 from .constants import (
     COMPARISON_SUCCESS,
     COMPARISON_FAILED,
@@ -10,7 +12,9 @@ __version__ = "1.1.0"
 
 __all__ = [
     'DataQualityComparator',
+    'AsyncDataQualityComparator',
     'DataReference',
+    'ComparisonStateStore',
     'COMPARISON_SUCCESS',
     'COMPARISON_FAILED',
     'COMPARISON_SKIPPED',
@@ -2,5 +2,7 @@ from .base import BaseDatabaseAdapter
 from .oracle import OracleAdapter
 from .postgres import PostgresAdapter
 from .clickhouse import ClickHouseAdapter
+from .sqlite import SQLiteAdapter
+from .duckdb import DuckDBAdapter
 
-__all__ = ['BaseDatabaseAdapter', 'OracleAdapter', 'PostgresAdapter', 'ClickHouseAdapter']
\ No newline at end of file
+__all__ = ['BaseDatabaseAdapter', 'OracleAdapter', 'PostgresAdapter', 'ClickHouseAdapter', 'SQLiteAdapter', 'DuckDBAdapter']
\ No newline at end of file
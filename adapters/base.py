@@ -1,16 +1,36 @@
 from abc import ABC, abstractmethod
 import pandas as pd
-from typing import Dict, Callable, List, Tuple, Optional, Union
+from typing import Any, Dict, Callable, Iterator, List, Tuple, Optional, Union
 import re
+import time
+import uuid
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from ..models import DataReference, ObjectType
-from ..constants import RESERVED_WORDS
+from ..constants import RESERVED_WORDS, DEFAULT_KEYED_FETCH_WORKERS
 from sqlalchemy.engine import Engine
+from ..exceptions import QueryExecutionError
 from ..logger import app_logger
 from ..logger import app_logger
 
 class BaseDatabaseAdapter(ABC):
     """Abstract base class with updated method signatures for parameterized queries"""
+    # batches of the fetch by primary keys: keys in one IN-list and bind parameters of one query
+    keyed_fetch_max_keys = 1000
+    keyed_fetch_max_params = 30000
+    # query hints (DataQualityComparator query_hints) applied by the DBMS, the rest are ignored
+    query_hint_names: Tuple[str, ...] = ()
+    query_hints: Dict[str, Any] = {}
+
+    def set_query_hints(self, hints: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Keep the supported hints for the following queries, returns the effective ones"""
+        self.query_hints = {name: value for name, value in (hints or {}).items() if name in self.query_hint_names}
+        return self.query_hints
+
+    def _select_hint(self, data_ref: DataReference) -> str:
+        """Optimizer hint comment after SELECT of the data and count queries"""
+        return ''
+
     @abstractmethod
     def _execute_query(self, query: Union[str, Tuple[str, Dict]], engine: Engine, timezone:str) -> pd.DataFrame:
         """Execute query with DBMS-specific optimizations"""
@@ -29,18 +49,141 @@ class BaseDatabaseAdapter(ABC):
     def build_primary_key_query(self, data_ref: DataReference) -> Tuple[str, Dict]:
         pass
 
+    def build_change_fingerprint_query(self, data_ref: DataReference) -> Optional[Tuple[str, Dict]]:
+        """
+        Cheap catalog query describing the modification state of the object.
+        The query returns exactly one row while the object can be tracked and no rows otherwise,
+        None means the DBMS has no suitable catalog information at all
+        """
+        return None
+
     @abstractmethod
     def build_count_query(self, data_ref: DataReference, date_column: str,
-                         start_date: Optional[str], end_date: Optional[str]
+                         start_date: Optional[str], end_date: Optional[str],
+                         granularity: str = 'day',
+                         aggregates: Optional[List[str]] = None
                          ) -> Tuple[str, Dict]:
-        """Returns tuple of (query, params) with recent data exclusion"""
+        """
+        Returns tuple of (query, params) with row counts (cnt) per period (dt),
+        `granularity` 'day' (YYYY-MM-DD) or 'hour' (YYYY-MM-DD HH:00:00),
+        `aggregates` are extra aliased aggregate expressions of the period
+        """
         pass
 
+    def build_profile_query(self, data_ref: DataReference, date_column: str,
+                            start_date: Optional[str], end_date: Optional[str],
+                            columns_meta: pd.DataFrame) -> Tuple[str, Dict]:
+        """
+        Daily counts with the profile of every column i of columns_meta (column_name, data_type):
+        non-null count (xnn_i), min (xmin_i) and max (xmax_i) of numbers and dates, sum (xsum_i) of numbers
+        and order-independent sum of md5 based hashes (xhash_i) of canonical text of integers, dates and strings.
+        Aliases are positional as column names may be too long for them
+        """
+        aggregates = []
+        for i, (column, data_type) in enumerate(zip(columns_meta['column_name'], self._profile_data_types(columns_meta))):
+            column = self._quote_column(column)
+            category = self.get_profile_category(data_type)
+            aggregates.append(f"count({column}) as xnn_{i}")
+            if category in ('integer', 'numeric', 'datetime'):
+                aggregates.append(f"min({column}) as xmin_{i}")
+                aggregates.append(f"max({column}) as xmax_{i}")
+            if category in ('integer', 'numeric'):
+                aggregates.append(f"sum({column}) as xsum_{i}")
+            text = self._canonical_text_expression(column, data_type)
+            if text:
+                aggregates.append(
+                    f"sum(CASE WHEN {column} IS NOT NULL THEN {self._hash32_expression(text)} END) as xhash_{i}"
+                )
+        return self.build_count_query(data_ref, date_column, start_date, end_date, aggregates=aggregates)
+
+    def build_column_checksum_query(self, data_query: Tuple[str, Dict], key_columns: List[str],
+                                    columns_meta: pd.DataFrame) -> Tuple[str, Dict]:
+        """
+        One row with the row count (xcnt) and the checksum (xchk_i) of every column i of columns_meta
+        over the rows of the data query: sum modulo 2^32 of md5 based hashes of '<key1>|<key2>|<value>'.
+        Keys are hashed with values, so values moved between rows change the checksum.
+        Columns of types without canonical text have no checksum
+        """
+        query, params = data_query
+        keys = [f"coalesce({self._key_text_expression(self._quote_column(col))}, '')" for col in key_columns]
+        aggregates = ['count(*) as xcnt']
+        for i, (column, data_type) in enumerate(zip(columns_meta['column_name'], self._profile_data_types(columns_meta))):
+            text = self._canonical_text_expression(self._quote_column(column), data_type)
+            if text:
+                row_hash = self._hash32_expression(" || '|' || ".join(keys + [f"coalesce({text}, '')"]))
+                aggregates.append(f"{self._mod_expression(f'sum({row_hash})', 2**32)} as xchk_{i}")
+        return f"SELECT {', '.join(aggregates)} FROM ({query}) x", params
+
+    def _canonical_text_expression(self, column: str, data_type: str) -> Optional[str]:
+        """Text of the value equal on every DBMS for integers, dates and strings, None for other types"""
+        return {
+            'integer': self._key_text_expression,
+            'datetime': self._datetime_text_expression,
+            'text': lambda column: column,
+        }.get(self.get_profile_category(data_type), lambda column: None)(column)
+
+    def get_profile_category(self, data_type: str) -> Optional[str]:
+        """
+        'integer', 'numeric', 'datetime' or 'text' profile of the column type, None for other types (non-null count only).
+        Fractional numbers have no hash, their text differs between DBMS
+        """
+        for category, pattern in self._get_profile_type_patterns().items():
+            if re.search(pattern, data_type.lower()):
+                return category
+        return None
+
+    def _profile_data_types(self, columns_meta: pd.DataFrame) -> List[str]:
+        """Types of the columns_meta rows the profile categories are taken from, DBMS refine them by other metadata"""
+        return columns_meta['data_type'].tolist()
+
+    def _get_profile_type_patterns(self) -> Dict[str, str]:
+        return {
+            'integer': r'^(nullable\()?(u?int\d*|integer|bigint|smallint|tinyint|hugeint|u(big|small|tiny)?int(eger)?)\b',
+            'numeric': r'numeric|decimal|double|float|real|number',
+            'datetime': r'date|timestamp',
+            'text': r'char|text|string',
+        }
+
+    def build_key_bucket_count_query(self, data_ref: DataReference, key_columns: List[str], buckets: int,
+                                     filters: Optional[List[Tuple[str, Dict]]] = None) -> Tuple[str, Dict]:
+        """Row counts (cnt) per key hash bucket (bucket = key hash mod `buckets`)"""
+        bucket = self._build_key_bucket_expression(key_columns, buckets)
+        query = f"""
+            SELECT
+                {bucket} as bucket,
+                count(*) as cnt
+            FROM {data_ref.full_name}
+            WHERE 1=1\n"""
+        params = {}
+        for condition, condition_params in filters or []:
+            query += f"            AND {condition}\n"
+            params.update(condition_params)
+        query += f" GROUP BY {bucket}"
+        return query, params
+
+    def build_key_bucket_condition(self, key_columns: List[str], buckets: int, bucket: int) -> Tuple[str, Dict]:
+        """Rows of one key hash bucket of build_key_bucket_count_query"""
+        return f"{self._build_key_bucket_expression(key_columns, buckets)} = {int(bucket)}", {}
+
+    def _build_key_bucket_expression(self, key_columns: List[str], buckets: int) -> str:
+        return self._mod_expression(self._build_key_hash_expression(key_columns), int(buckets))
+
+    def _mod_expression(self, expression: str, divisor: int) -> str:
+        return f"({expression}) % {divisor}"
+
+    def _build_period_condition(self, date_column: str, start: str, end: str) -> Tuple[str, Dict]:
+        """DBMS-specific condition start <= date_column < end (DATETIME_FORMAT strings)"""
+        raise NotImplementedError(f"{type(self).__name__} does not support period conditions")
+
     def build_data_query_common(self, data_ref: DataReference, columns: List[str],
                         date_column: Optional[str], update_column: Optional[str],
                         start_date: Optional[str], end_date: Optional[str],
-                        exclude_recent_hours: Optional[int] = None) -> Tuple[str, Dict]:
-        """Build data query for the DBMS with recent data exclusion"""
+                        exclude_recent_hours: Optional[int] = None,
+                        filters: Optional[List[Tuple[str, Dict]]] = None) -> Tuple[str, Dict]:
+        """
+        Build data query for the DBMS with recent data exclusion,
+        `filters` are additional (condition, params) pairs joined with AND
+        """
         # Handle reserved words
         cols_select = [
             f'"{col}"' if col.lower() in RESERVED_WORDS
@@ -49,14 +192,426 @@ class BaseDatabaseAdapter(ABC):
         ]
 
         result = self.build_data_query(data_ref, cols_select, date_column, update_column,
-                                     start_date, end_date, exclude_recent_hours)
+                                     start_date, end_date, exclude_recent_hours, filters)
         return result
 
     @abstractmethod
     def build_data_query(self, data_ref: DataReference, columns: List[str],
                         date_column: Optional[str], update_column: Optional[str],
                         start_date: Optional[str], end_date: Optional[str],
-                        exclude_recent_hours: Optional[int] = None) -> Tuple[str, Dict]:
+                        exclude_recent_hours: Optional[int] = None,
+                        filters: Optional[List[Tuple[str, Dict]]] = None) -> Tuple[str, Dict]:
+        pass
+
+    def build_keyed_fetch_query(self, data_ref: DataReference, columns: List[str], key_columns: List[str],
+                                keys: List[tuple], filters: Optional[List[Tuple[str, Dict]]] = None
+                                ) -> Tuple[str, Dict]:
+        """
+        Data query of the rows with the given primary keys (tuples of key values in key_columns order),
+        one IN-list of bind parameters, compound keys as row constructors. See split_keys for the batch limits
+        """
+        return self.build_data_query_common(
+            data_ref, columns, None, None, None, None, None,
+            [self.build_key_in_condition(key_columns, keys)] + (filters or [])
+        )
+
+    def build_key_in_condition(self, key_columns: List[str], keys: List[tuple]) -> Tuple[str, Dict]:
+        """(condition, params) selecting the keys: col IN (...) or (col1, col2) IN ((...), (...))"""
+        params = {}
+        values = []
+        for i, key in enumerate(keys):
+            markers = []
+            for j, value in enumerate(key):
+                params[f'xkey_{i}_{j}'] = value
+                markers.append(self._bind_parameter(f'xkey_{i}_{j}'))
+            values.append(markers[0] if len(key_columns) == 1 else f"({', '.join(markers)})")
+        columns = [self._quote_column(col) for col in key_columns]
+        column = columns[0] if len(key_columns) == 1 else f"({', '.join(columns)})"
+        return f"{column} IN ({', '.join(values)})", params
+
+    def _bind_parameter(self, name: str) -> str:
+        """DBMS-specific marker of the named bind parameter"""
+        return f":{name}"
+
+    def split_keys(self, key_columns: List[str], keys: List) -> List[List[tuple]]:
+        """Unique keys as tuples in batches within the IN-list and bind parameter limits of the DBMS"""
+        keys = list(dict.fromkeys(key if isinstance(key, tuple) else (key,) for key in keys))
+        size = max(1, min(self.keyed_fetch_max_keys, self.keyed_fetch_max_params // len(key_columns)))
+        return [keys[i:i + size] for i in range(0, len(keys), size)]
+
+    def fetch_by_keys(self, engine: Engine, data_ref: DataReference, columns: List[str], key_columns: List[str],
+                      keys: List, timezone: str, filters: Optional[List[Tuple[str, Dict]]] = None,
+                      workers: int = DEFAULT_KEYED_FETCH_WORKERS) -> pd.DataFrame:
+        """
+        Rows with the given primary keys (key tuples, or values for a single key column),
+        batches of build_keyed_fetch_query run concurrently in `workers` threads.
+        Row order is not defined, keys without rows are silently missing
+        """
+        queries = [self.build_keyed_fetch_query(data_ref, columns, key_columns, batch, filters)
+                   for batch in self.split_keys(key_columns, keys)]
+        if not queries:
+            return pd.DataFrame(columns=columns)
+        app_logger.info(f'fetching {len(keys)} keys in {len(queries)} batches')
+        return self.fetch_concurrently(engine, queries, timezone, workers)
+
+    def fetch_concurrently(self, engine: Engine, queries: List[Tuple[str, Dict]], timezone: str,
+                           workers: int) -> pd.DataFrame:
+        """Results of the queries with the same columns concatenated, each query on its own pooled connection"""
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(queries)))) as executor:
+            frames = list(executor.map(lambda query: self._execute_query(query, engine, timezone), queries))
+        return pd.concat(frames, ignore_index=True)
+
+    def iter_query_chunks(self, query: Union[str, Tuple[str, Dict]], engine: Engine, timezone: str,
+                          chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        Result of the query in frames of `chunksize` rows read through a server side cursor
+        (stream_results), so the whole result is never held by the client
+        """
+        query, params = query if isinstance(query, tuple) else (query, None)
+        app_logger.info(f'query\n {query}')
+        if params:
+            app_logger.info(f'{params=}')
+        try:
+            with engine.connect() as connection:
+                self._prepare_connection(connection, timezone)
+                connection = connection.execution_options(stream_results=True, max_row_buffer=chunksize)
+                yield from pd.read_sql(query, connection, params=params, chunksize=chunksize)
+        except Exception as e:
+            app_logger.error(f"Streamed query failed: {str(e)}")
+            raise QueryExecutionError(f"Query failed: {str(e)}")
+
+    def get_extraction_ranges(self, engine: Engine, data_ref: DataReference, ranges: int) -> List[Tuple[str, Dict]]:
+        """
+        Conditions splitting a scan of the table into about `ranges` physical ranges (rowid, pages,
+        segments or partitions) covering every row once, to be fetched concurrently.
+        Empty list when the DBMS or the table can not be split
+        """
+        return []
+
+    def _build_bound_ranges(self, expression: str, bounds: List,
+                            marker: Optional[Callable[[str], str]] = None) -> List[Tuple[str, Dict]]:
+        """Conditions of the ranges between the sorted bounds, the first and the last ones are open"""
+        marker = marker or self._bind_parameter
+        conditions = []
+        for low, high in zip([None] + bounds, bounds + [None]):
+            parts, params = [], {}
+            if low is not None:
+                parts.append(f"{expression} >= {marker('xrange_low')}")
+                params['xrange_low'] = low
+            if high is not None:
+                parts.append(f"{expression} < {marker('xrange_high')}")
+                params['xrange_high'] = high
+            conditions.append((' AND '.join(parts) or '1=1', params))
+        return conditions
+
+    def _get_rowid_ranges(self, engine: Engine, data_ref: DataReference, ranges: int,
+                          rowid: str = 'rowid') -> List[Tuple[str, Dict]]:
+        """Equal ranges of the integer row id between its current bounds"""
+        try:
+            bounds = self._execute_query(f"SELECT min({rowid}) AS xlow, max({rowid}) AS xhigh FROM {data_ref.full_name}",
+                                         engine, None)
+        except QueryExecutionError as e:
+            app_logger.warning(f"No {rowid} ranges of {data_ref.full_name}: {str(e)}")
+            return []
+        low, high = bounds.iloc[0]
+        if pd.isna(low) or ranges < 2:
+            return []
+        step = max(1, (int(high) - int(low) + 1) // ranges)
+        return self._build_bound_ranges(rowid, list(range(int(low) + step, int(high) + 1, step))[:ranges - 1])
+
+    def fetch_semi_join(self, engine: Engine, query: Union[str, Tuple[str, Dict]], key_columns: List[str],
+                        keys: pd.DataFrame, timezone: str) -> Tuple[pd.DataFrame, int]:
+        """
+        Rows of the query with keys among `keys` (frame of the key columns) and the number of its other rows.
+        Keys are bulk loaded into a temporary table in the same session and the query is joined with it
+        on the server, so only the matching rows are fetched
+        """
+        query, params = query if isinstance(query, tuple) else (query, None)
+        params = params or {}
+        table = f"xkeys_{uuid.uuid4().hex[:12]}"
+        start_time = time.time()
+        app_logger.info('start')
+
+        try:
+            with engine.connect() as connection:
+                self._prepare_connection(connection, timezone)
+                connection.exec_driver_sql(*self._build_key_table_query(table, query, params, key_columns))
+                try:
+                    self._load_keys(connection, table, key_columns, keys)
+                    rows_query, extra_query = self.build_semi_join_queries(query, table, key_columns)
+                    app_logger.info(f'query\n {rows_query}')
+                    app_logger.info(f'{params=}')
+                    df = pd.read_sql(rows_query, connection, params=params)
+                    extra_rows = int(pd.read_sql(extra_query, connection, params=params).iloc[0, 0])
+                except Exception:
+                    # a failed statement aborts the transaction (PostgreSQL): roll back first, it discards
+                    # the temporary table of transactional DDL, the drop cleans up the others (ClickHouse)
+                    connection.rollback()
+                    try:
+                        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {table}")
+                    except Exception as drop_error:
+                        app_logger.warning(f"Key table drop failed: {drop_error}")
+                    raise
+                connection.exec_driver_sql(f"DROP TABLE {table}")
+            app_logger.info(f"{len(keys)} keys loaded, query executed in {time.time() - start_time:.2f}s")
+            app_logger.info('complete')
+            return df, extra_rows
+        except Exception as e:
+            app_logger.error(f"Semi-join query failed after {time.time() - start_time:.2f}s: {str(e)}")
+            raise QueryExecutionError(f"Query failed: {str(e)}")
+
+    def fetch_semi_join_by_keys(self, engine: Engine, query: Tuple[str, Dict], key_columns: List[str],
+                                keys: pd.DataFrame, timezone: str,
+                                workers: int = DEFAULT_KEYED_FETCH_WORKERS) -> Tuple[pd.DataFrame, int]:
+        """
+        fetch_semi_join without a key table: the query filtered by IN-lists of the keys (split_keys batches
+        run concurrently as fetch_by_keys), other rows are the count of all rows of the query minus the fetched ones
+        """
+        query, params = query
+        queries = []
+        for batch in self.split_keys(key_columns, self._key_rows(keys, key_columns)):
+            condition, key_params = self.build_key_in_condition(key_columns, batch)
+            queries.append((f"SELECT x.* FROM ({query}) x WHERE {condition}", {**params, **key_params}))
+        if not queries:
+            queries.append((f"SELECT x.* FROM ({query}) x WHERE 1=0", params))
+        app_logger.info(f'fetching {len(keys)} keys in {len(queries)} batches')
+        df = self.fetch_concurrently(engine, queries, timezone, workers)
+        total_rows = self._execute_query((f"SELECT count(*) AS cnt FROM ({query}) x", params), engine, timezone)
+        return df, int(total_rows.iloc[0, 0]) - len(df)
+
+    def build_semi_join_queries(self, query: str, table: str, key_columns: List[str],
+                                table_columns: Optional[List[str]] = None) -> Tuple[str, str]:
+        """
+        Rows of the query with keys in the key table, and count (cnt) of the rows without.
+        `table_columns` are the key table columns of the key columns, the same names by default
+        """
+        keys = [self._quote_column(col) for col in key_columns]
+        table_columns = table_columns or keys
+        condition = ' AND '.join(f"k.{table_col} = x.{col}" for table_col, col in zip(table_columns, keys))
+        rows_query = f"""
+        SELECT x.* FROM ({query}) x
+        WHERE EXISTS (SELECT 1 FROM {table} k WHERE {condition})"""
+        extra_query = f"""
+        SELECT count(*) as cnt FROM ({query}) x
+        WHERE NOT EXISTS (SELECT 1 FROM {table} k WHERE {condition})"""
+        return rows_query, extra_query
+
+    def _session_statements(self, timezone: str) -> List[str]:
+        """DBMS-specific statements setting up the session of fetch_semi_join and iter_query_chunks"""
+        return []
+
+    def _prepare_connection(self, connection, timezone: str) -> None:
+        """Set up the session of a connection used directly (semi-join, streaming)"""
+        for statement in self._session_statements(timezone):
+            connection.exec_driver_sql(statement)
+
+    def _build_key_table_query(self, table: str, query: str, params: Dict, key_columns: List[str]) -> Tuple[str, Dict]:
+        """Empty temporary table with the key columns of the query and their types"""
+        keys = ', '.join(self._quote_column(col) for col in key_columns)
+        return f"CREATE TEMPORARY TABLE {table} AS SELECT {keys} FROM ({query}) x WHERE 1=0", params
+
+    def _load_keys(self, connection, table: str, key_columns: List[str], keys: pd.DataFrame):
+        """Insert the keys into the temporary table, DBMS bulk paths override this executemany"""
+        columns = ', '.join(self._quote_column(col) for col in key_columns)
+        markers = ', '.join(self._bind_parameter(f'k{j}') for j in range(len(key_columns)))
+        rows = [{f'k{j}': value for j, value in enumerate(key)} for key in self._key_rows(keys, key_columns)]
+        if rows:
+            connection.exec_driver_sql(f"INSERT INTO {table} ({columns}) VALUES ({markers})", rows)
+
+    @staticmethod
+    def _key_rows(keys: pd.DataFrame, key_columns: List[str]) -> List[tuple]:
+        """Key tuples of python scalars (drivers do not bind numpy types), NULLs as None"""
+        keys = keys[key_columns].astype(object)
+        return list(keys.where(keys.notna(), None).itertuples(index=False, name=None))
+
+    def build_key_sample_condition(self, key_columns: List[str], sample_rate: float,
+                                   seed: int = 0) -> Tuple[str, Dict]:
+        """
+        Deterministic sampling predicate selecting `sample_rate` share of primary keys.
+        The hash is the first 32 bits of md5 over the key text on every DBMS, so both sides select
+        the same keys when key values have the same text representation (integer and string keys)
+        """
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"sample_rate must be in (0, 1], got {sample_rate}")
+        threshold = int(sample_rate * 2**32)
+        return f"{self._build_key_hash_expression(key_columns, seed)} < {threshold}", {}
+
+    def _build_key_hash_expression(self, key_columns: List[str], seed: int = 0) -> str:
+        """Integer in [0, 2^32) from md5 of '<seed>|<key1>|<key2>...', NULL keys as empty strings"""
+        parts = [f"'{int(seed)}'"] + [f"coalesce({self._key_text_expression(self._quote_column(col))}, '')"
+                                     for col in key_columns]
+        return self._hash32_expression(" || '|' || ".join(parts))
+
+    def _key_text_expression(self, column: str) -> str:
+        """DBMS-specific text representation of the key column"""
+        return f"CAST({column} AS VARCHAR)"
+
+    def _datetime_text_expression(self, column: str) -> str:
+        """DBMS-specific 'YYYY-MM-DD HH24:MI:SS' text of a date or timestamp column"""
+        raise NotImplementedError(f"{type(self).__name__} does not support datetime text expressions")
+
+    def _hash32_expression(self, text_expression: str) -> str:
+        """DBMS-specific first 32 bits of md5 of the text as non-negative integer"""
+        raise NotImplementedError(f"{type(self).__name__} does not support key hash expressions")
+
+    def _get_lob_type_pattern(self) -> Optional[str]:
+        """DBMS-specific regex of large object types (metadata data_type) selected as digests, None without"""
+        return None
+
+    def is_lob_type(self, data_type: str) -> bool:
+        pattern = self._get_lob_type_pattern()
+        return bool(pattern and re.search(pattern, str(data_type).lower()))
+
+    def build_lob_digest_expression(self, column: str, data_type: str) -> str:
+        """
+        DBMS-specific canonical digest of a large value '<md5 hex of the UTF-8 text or bytes>:<length>',
+        NULL for NULL. Length is in characters for text and in bytes for binary types on every DBMS
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support LOB digests")
+
+    def build_null_like_condition(self, column: str) -> str:
+        """
+        DBMS-specific condition true for the values prepare_dataframe turns into NULL: NULL,
+        empty and whitespace-only strings, 'None' and 'nan' in any case (NaN numbers print as such)
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support pushdown comparisons")
+
+    @staticmethod
+    def _quote_column(col: str) -> str:
+        return f'"{col}"' if col.lower() in RESERVED_WORDS else col
+
+    def build_pushdown_diff_queries(self, source_query: Tuple[str, Dict], target_query: Tuple[str, Dict],
+                                    key_columns: List[str], value_columns: List[str],
+                                    exclude_recent: bool, max_examples: int
+                                    ) -> Tuple[Tuple[str, Dict], Tuple[str, Dict]]:
+        """
+        Queries comparing two data queries of the same engine on the server by FULL OUTER JOIN on the primary key.
+
+        Returns (summary query, examples query):
+            summary: one row with total_/dup_/only_ rows per side (xs_/xt_ prefixes), common_rows,
+                     mismatched_rows and xd_<column> mismatch count per column
+            examples: joined rows (xk_<key>, xs_<column>, xt_<column>) that are the first max_examples
+                      by key desc of only source/only target/duplicated/mismatched keys and of every column mismatches
+
+        One row per key takes part in the join: the first one the engine returns, as the first fetched row
+        of a duplicated key in the regular comparison, so with duplicates the picked row may differ between runs.
+        Values are compared by the engine, the ones prepare_dataframe treats as NULL (build_null_like_condition) are equal.
+        Keys with xrecently_changed rows on any side are excluded when `exclude_recent`
+        """
+        keys = [self._quote_column(col) for col in key_columns]
+        values = [self._quote_column(col) for col in value_columns]
+        partition = ', '.join(f'x.{col}' for col in keys)
+
+        def side_query(query: str) -> str:
+            recent = f',\n                    max(x.xrecently_changed) OVER (PARTITION BY {partition}) AS xrecent' if exclude_recent else ''
+            return f"""
+            SELECT * FROM (
+                SELECT x.*, 1 AS xside,
+                    count(*) OVER (PARTITION BY {partition}) AS xcnt,
+                    row_number() OVER (PARTITION BY {partition} ORDER BY {partition}) AS xrn{recent}
+                FROM ({query}) x
+            ) y WHERE xrn = 1"""
+
+        both = 's.xside = 1 AND t.xside = 1'
+        select = [f'CASE WHEN s.xside = 1 THEN s.{col} ELSE t.{col} END AS xk_{name}' for col, name in zip(keys, key_columns)]
+        select += ['CASE WHEN s.xside = 1 THEN 1 ELSE 0 END AS xin_s',
+                   'CASE WHEN t.xside = 1 THEN 1 ELSE 0 END AS xin_t',
+                   'CASE WHEN s.xside = 1 THEN s.xcnt ELSE 0 END AS xs_cnt',
+                   'CASE WHEN t.xside = 1 THEN t.xcnt ELSE 0 END AS xt_cnt']
+        diffs = []
+        for col, name in zip(values, value_columns):
+            select += [f's.{col} AS xs_{name}', f't.{col} AS xt_{name}']
+            source_null = self.build_null_like_condition(f's.{col}')
+            target_null = self.build_null_like_condition(f't.{col}')
+            diff = (f'CASE WHEN ({source_null} AND {target_null}) '
+                    f'OR (NOT {source_null} AND NOT {target_null} AND s.{col} = t.{col}) THEN 0 ELSE 1 END')
+            select.append(f'CASE WHEN {both} THEN {diff} ELSE 0 END AS xd_{name}')
+            diffs.append(f'{diff} = 1')
+        any_diff = ' OR '.join(diffs) or '1=0'
+        select.append(f'CASE WHEN {both} AND ({any_diff}) THEN 1 ELSE 0 END AS xdiff')
+
+        join = ' AND '.join(f's.{col} = t.{col}' for col in keys)
+        where = "CASE WHEN s.xrecent = 'y' OR t.xrecent = 'y' THEN 1 ELSE 0 END = 0" if exclude_recent else '1=1'
+        joined = f"""WITH j AS (
+            SELECT {', '.join(select)}
+            FROM ({side_query(source_query[0])}) s
+            FULL OUTER JOIN ({side_query(target_query[0])}) t ON {join}
+            WHERE {where}
+        )"""
+        params = {**source_query[1], **target_query[1]}
+
+        aggregates = [
+            'sum(xs_cnt) AS xs_total_rows', 'sum(xt_cnt) AS xt_total_rows',
+            'sum(CASE WHEN xin_s = 1 THEN xs_cnt - 1 ELSE 0 END) AS xs_dup_rows',
+            'sum(CASE WHEN xin_t = 1 THEN xt_cnt - 1 ELSE 0 END) AS xt_dup_rows',
+            'sum(CASE WHEN xin_s = 1 AND xin_t = 0 THEN 1 ELSE 0 END) AS xs_only_rows',
+            'sum(CASE WHEN xin_s = 0 AND xin_t = 1 THEN 1 ELSE 0 END) AS xt_only_rows',
+            'sum(xin_s * xin_t) AS common_rows',
+            'sum(xdiff) AS mismatched_rows',
+        ] + [f'sum(xd_{name}) AS xd_{name}' for name in value_columns]
+        summary_query = f"{joined}\n        SELECT {', '.join(aggregates)} FROM j"
+
+        order = ', '.join(f'xk_{name} DESC' for name in key_columns)
+        frame = 'ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW'
+        ranks = [
+            f'row_number() OVER (PARTITION BY xin_s, xin_t, xdiff ORDER BY {order}) AS xrank',
+            f'row_number() OVER (PARTITION BY CASE WHEN xs_cnt > 1 THEN 1 ELSE 0 END ORDER BY {order}) AS xrank_dup_s',
+            f'row_number() OVER (PARTITION BY CASE WHEN xt_cnt > 1 THEN 1 ELSE 0 END ORDER BY {order}) AS xrank_dup_t',
+        ] + [f'sum(xd_{name}) OVER (PARTITION BY xdiff ORDER BY {order} {frame}) AS xrank_{name}' for name in value_columns]
+        conditions = [
+            f'(xin_t = 0 AND xrank <= {max_examples})',
+            f'(xin_s = 0 AND xrank <= {max_examples})',
+            f'(xdiff = 1 AND xrank <= {max_examples})',
+            f'(xs_cnt > 1 AND xrank_dup_s <= {max_examples})',
+            f'(xt_cnt > 1 AND xrank_dup_t <= {max_examples})',
+        ] + [f'(xd_{name} = 1 AND xrank_{name} <= {max_examples})' for name in value_columns]
+        examples_query = f"""{joined}
+        SELECT * FROM (
+            SELECT j.*, {', '.join(ranks)}
+            FROM j
+        ) e
+        WHERE {' OR '.join(conditions)}"""
+
+        return (summary_query, params), (examples_query, params)
+
+    def build_prestats_query(self, data_query: Tuple[str, Dict], key_columns: List[str],
+                             exclude_recent: bool, max_examples: int) -> Tuple[str, Dict]:
+        """
+        Cheap pre-fetch statistics of the data query grouped by the primary key.
+        Rows are the first key (so that the totals come on a row for any data), the first max_examples
+        duplicated keys and, when `exclude_recent` (data query with the xrecently_changed flag), the recently changed keys.
+        Columns: the key columns, xcnt, xrecent, xrank and totals over all keys xtotal_rows, xkeys, xdup_keys, xdup_rows
+        """
+        keys = ', '.join(f'x.{self._quote_column(col)}' for col in key_columns)
+        order = ', '.join(self._quote_column(col) for col in key_columns)
+        recent = 'max(x.xrecently_changed)' if exclude_recent else 'NULL'
+        condition = f"xrank = 1 OR (xcnt > 1 AND xrank <= {max_examples})"
+        condition += " OR xrecent = 'y'" if exclude_recent else ''
+        query = f"""
+        SELECT * FROM (
+            SELECT g.*,
+                count(*) OVER () AS xkeys,
+                sum(xcnt) OVER () AS xtotal_rows,
+                sum(CASE WHEN xcnt > 1 THEN 1 ELSE 0 END) OVER () AS xdup_keys,
+                sum(CASE WHEN xcnt > 1 THEN xcnt - 1 ELSE 0 END) OVER () AS xdup_rows,
+                row_number() OVER (PARTITION BY CASE WHEN xcnt > 1 THEN 1 ELSE 0 END ORDER BY {order}) AS xrank
+            FROM (
+                SELECT {keys}, count(*) AS xcnt, {recent} AS xrecent
+                FROM ({data_query[0]}) x
+                GROUP BY {keys}
+            ) g
+        ) p
+        WHERE {condition}"""
+        return query, data_query[1]
+
+    def build_key_exclusion_condition(self, key_columns: List[str], keys: List[tuple]) -> Tuple[str, Dict]:
+        """(condition, params) dropping the rows with the given keys, one IN-list as build_key_in_condition"""
+        condition, params = self.build_key_in_condition(key_columns, keys)
+        return f"NOT ({condition})", params
+
+    @abstractmethod
+    def _build_watermark_condition(self, update_column: str, watermark: str) -> Tuple[str, Dict]:
+        """DBMS-specific condition selecting rows changed at or after the watermark (DATETIME_FORMAT string)"""
         pass
 
     @abstractmethod
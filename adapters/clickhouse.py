@@ -9,14 +9,20 @@ from ..logger import app_logger
 
 class ClickHouseAdapter(BaseDatabaseAdapter):
     """ClickHouse adapter with parameterized queries"""
+    # parameters are substituted by the driver, the query must fit max_query_size (256 KiB)
+    keyed_fetch_max_keys = 5000
+    keyed_fetch_max_params = 30000
+    query_hint_names = ('max_threads', 'max_block_size', 'max_bytes_to_read')
+
     def _execute_query(self, query: Union[str, Tuple[str, Dict]], engine: Engine, timezone: str) -> pd.DataFrame:
         df = None
         tz_set = None
         start_time = time.time()
         app_logger.info('start')
 
-        if timezone:
-            tz_set = f"SETTINGS session_timezone = '{timezone}'"
+        settings = ([f"session_timezone = '{timezone}'"] if timezone else []) + self._hint_settings()
+        if settings:
+            tz_set = f"SETTINGS {', '.join(settings)}"
         try:
             if isinstance(query, tuple):
                 query, params = query
@@ -97,12 +103,35 @@ class ClickHouseAdapter(BaseDatabaseAdapter):
         params = {'schema': data_ref.schema, 'table': data_ref.name}
         return query, params
 
+    def build_change_fingerprint_query(self, data_ref: DataReference) -> Tuple[str, Dict]:
+        """Active parts state, only MergeTree family tables have parts (others return no rows)"""
+        query = """
+            SELECT
+                toString(max(modification_time)) as modification_time,
+                sum(rows) as total_rows,
+                count() as active_parts
+            FROM system.parts
+            WHERE database = %(schema)s
+            AND table = %(table)s
+            AND active
+            GROUP BY database, table
+        """
+        params = {'schema': data_ref.schema, 'table': data_ref.name}
+        return query, params
+
     def build_count_query(self, data_ref: DataReference, date_column: str,
-                         start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, Dict]:
+                          start_date: Optional[str], end_date: Optional[str],
+                          granularity: str = 'day',
+                          aggregates: Optional[List[str]] = None
+                         ) -> Tuple[str, Dict]:
+        period = {
+            'day': f"toDate({date_column})",
+            'hour': f"toStartOfHour({date_column})",
+        }[granularity]
         query = f"""
             SELECT
-                toDate({date_column}) as dt,
-                count(*) as cnt
+                {period} as dt,
+                count(*) as cnt{''.join(f', {aggregate}' for aggregate in aggregates or [])}
             FROM {data_ref.full_name}
             WHERE 1=1
         """
@@ -122,7 +151,8 @@ class ClickHouseAdapter(BaseDatabaseAdapter):
     def build_data_query(self, data_ref: DataReference, columns: List[str],
                         date_column: Optional[str], update_column: str,
                         start_date: Optional[str], end_date: Optional[str],
-                        exclude_recent_hours: Optional[int] = None) -> Tuple[str, Dict]:
+                        exclude_recent_hours: Optional[int] = None,
+                        filters: Optional[List[Tuple[str, Dict]]] = None) -> Tuple[str, Dict]:
         params = {}
         # Add recent data exclusion flag
         exclusion_condition,  exclusion_params = self._build_exclusion_condition(
@@ -145,6 +175,10 @@ class ClickHouseAdapter(BaseDatabaseAdapter):
             query += f"            AND {date_column} < toDate(%(end_date)s) + INTERVAL 1 day\n"
             params['end_date'] = end_date
 
+        for condition, condition_params in filters or []:
+            query += f"            AND {condition}\n"
+            params.update(condition_params)
+
         return query, params
 
     def _build_exclusion_condition(self, update_column: str,
@@ -161,6 +195,114 @@ class ClickHouseAdapter(BaseDatabaseAdapter):
 
         return None, None
 
+    def _build_watermark_condition(self, update_column: str, watermark: str) -> Tuple[str, Dict]:
+        """ClickHouse-specific condition for incremental fetch"""
+        condition = f"{update_column} >= parseDateTimeBestEffort(%(watermark)s)"
+        params = {'watermark': watermark}
+        return condition, params
+
+    def _build_period_condition(self, date_column: str, start: str, end: str) -> Tuple[str, Dict]:
+        """ClickHouse-specific condition start <= date_column < end (DATETIME_FORMAT strings)"""
+        condition = f"{date_column} >= parseDateTimeBestEffort(%(xperiod_start)s) AND {date_column} < parseDateTimeBestEffort(%(xperiod_end)s)"
+        params = {'xperiod_start': start, 'xperiod_end': end}
+        return condition, params
+
+    def _datetime_text_expression(self, column: str) -> str:
+        # no % in the query, params are substituted with pyformat
+        return f"toString(toDateTime({column}))"
+
+    def _session_statements(self, timezone: str) -> List[str]:
+        return [f"SET {setting}" for setting in
+                ([f"session_timezone = '{timezone}'"] if timezone else []) + self._hint_settings()]
+
+    def _hint_settings(self) -> List[str]:
+        """Query level settings of the hints, all of them are integers"""
+        return [f"{name} = {int(value)}" for name, value in self.query_hints.items()]
+
+    def _build_key_table_query(self, table: str, query: str, params: Dict, key_columns: List[str]) -> Tuple[str, Dict]:
+        """Temporary Memory table of the native protocol session"""
+        keys = ', '.join(self._quote_column(col) for col in key_columns)
+        return f"CREATE TEMPORARY TABLE {table} ENGINE = Memory AS SELECT {keys} FROM ({query}) x WHERE 0", params
+
+    def _load_keys(self, connection, table: str, key_columns: List[str], keys: pd.DataFrame):
+        """Native block insert of the keys"""
+        columns = ', '.join(self._quote_column(col) for col in key_columns)
+        cursor = connection.connection.driver_connection.cursor()
+        try:
+            cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES", self._key_rows(keys, key_columns))
+        finally:
+            cursor.close()
+
+    def build_semi_join_queries(self, query: str, table: str, key_columns: List[str]) -> Tuple[str, str]:
+        """IN subqueries, correlated EXISTS is not supported"""
+        keys = ', '.join(self._quote_column(col) for col in key_columns)
+        keys = keys if len(key_columns) == 1 else f"({keys})"
+        rows_query = f"""
+        SELECT x.* FROM ({query}) x
+        WHERE {keys} IN (SELECT * FROM {table})"""
+        extra_query = f"""
+        SELECT count(*) as cnt FROM ({query}) x
+        WHERE {keys} NOT IN (SELECT * FROM {table})"""
+        return rows_query, extra_query
+
+    def get_extraction_ranges(self, engine: Engine, data_ref: DataReference, ranges: int) -> List[Tuple[str, Dict]]:
+        """
+        Groups of partitions balanced by rows of the active parts. Parts are not split:
+        background merges rename them between the listing and the fetch, partition ids are stable
+        """
+        query = """
+            SELECT partition_id, sum(rows) AS rows
+            FROM system.parts
+            WHERE database = %(schema)s AND table = %(table)s AND active
+            GROUP BY partition_id
+            ORDER BY rows DESC, partition_id
+        """
+        try:
+            partitions = self._execute_query((query, {'schema': data_ref.schema, 'table': data_ref.name}), engine, None)
+        except QueryExecutionError as e:
+            app_logger.warning(f"No partition ranges of {data_ref.full_name}: {str(e)}")
+            return []
+        if len(partitions) < 2 or ranges < 2:
+            return []
+        # largest partitions first into the least loaded group
+        groups = [[0, []] for _ in range(min(ranges, len(partitions)))]
+        for partition_id, rows in partitions.itertuples(index=False):
+            group = min(groups, key=lambda g: g[0])
+            group[0] += int(rows)
+            group[1].append(partition_id)
+        conditions = []
+        for _, partition_ids in groups:
+            params = {f'xrange_partition_{i}': partition_id for i, partition_id in enumerate(partition_ids)}
+            markers = ', '.join(self._bind_parameter(name) for name in params)
+            conditions.append((f"_partition_id IN ({markers})", params))
+        return conditions
+
+    def _bind_parameter(self, name: str) -> str:
+        return f"%({name})s"
+
+    def _key_text_expression(self, column: str) -> str:
+        return f"toString({column})"
+
+    def _mod_expression(self, expression: str, divisor: int) -> str:
+        # no % in the query, params are substituted with pyformat
+        return f"mod({expression}, {divisor})"
+
+    def _hash32_expression(self, text_expression: str) -> str:
+        """ClickHouse-specific first 32 bits of md5 as integer"""
+        return f"reinterpretAsUInt32(reverse(substring(MD5({text_expression}), 1, 4)))"
+
+    def _get_lob_type_pattern(self) -> Optional[str]:
+        # String is the only string type, digested when the column is a LOB on the other side
+        return r'^(nullable\()?(json|object)'
+
+    def build_null_like_condition(self, column: str) -> str:
+        return f"(isNull({column}) OR match(ifNull(toString({column}), ''), '(?i)^(\\\\s*|none|nan)$'))"
+
+    def build_lob_digest_expression(self, column: str, data_type: str) -> str:
+        """MD5 rather than cityHash64, digests are compared with the ones of the other DBMS"""
+        text = f"toString({column})"
+        return f"if(isNull({column}), NULL, concat(lower(hex(MD5({text}))), ':', toString(lengthUTF8({text}))))"
+
     def _get_type_conversion_rules(self, timezone:str ) -> Dict[str, Callable]:
         return {
             r'datetime\(': lambda x: pd.to_datetime(x, utc=True, errors='coerce').dt.tz_convert(timezone).dt.tz_localize(None).strftime(DATETIME_FORMAT).str.replace(r'\s00:00:00$', '', regex=True),
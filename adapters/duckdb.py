@@ -0,0 +1,242 @@
+import pandas as pd
+from typing import Optional, Dict, Callable, List, Tuple, Union
+from ..constants import DATETIME_FORMAT
+from .base import BaseDatabaseAdapter, Engine
+from ..models import DataReference, ObjectType
+from ..exceptions import QueryExecutionError
+from ..logger import app_logger
+import time
+
+class DuckDBAdapter(BaseDatabaseAdapter):
+    """
+    DuckDB adapter (duckdb_engine dialect), local stand-in for end-to-end tests
+    and benchmarks on tables of tens of millions of rows without live databases
+    """
+    # large IN-lists are fine, the limit keeps queries reasonably small
+    keyed_fetch_max_keys = 10000
+    keyed_fetch_max_params = 30000
+    query_hint_names = ('threads', 'memory_limit')
+
+    def _execute_query(self, query: Union[str, Tuple[str, Dict]], engine: Engine, timezone: str) -> pd.DataFrame:
+        df = None
+        start_time = time.time()
+        app_logger.info('start')
+
+        try:
+            query, params = query if isinstance(query, tuple) else (query, None)
+            app_logger.info(f'query\n {query}')
+            if params:
+                app_logger.info(f'{params=}')
+            # prepared statements can not hold several statements, timezone is set separately on the same connection
+            with engine.connect() as connection:
+                for statement in self._session_statements(timezone):
+                    connection.exec_driver_sql(statement)
+                df = pd.read_sql(query, connection, params=params)
+            execution_time = time.time() - start_time
+            app_logger.info(f"Query executed in {execution_time:.2f}s")
+            app_logger.info('complete')
+            return df
+        except Exception as e:
+            execution_time = time.time() - start_time
+            app_logger.error(f"Query execution failed after {execution_time:.2f}s: {str(e)}")
+            raise QueryExecutionError(f"Query failed: {str(e)}")
+
+    @staticmethod
+    def _schema(data_ref: DataReference) -> str:
+        return data_ref.schema or 'main'
+
+    def get_object_type(self, data_ref: DataReference, engine: Engine) -> ObjectType:
+        """Determine if object is table or view"""
+        query = """
+            SELECT
+                CASE
+                    WHEN table_type = 'BASE TABLE' THEN 'table'
+                    WHEN table_type = 'VIEW' THEN 'view'
+                    ELSE 'unknown'
+                END as object_type
+            FROM information_schema.tables
+            WHERE table_schema = $schema
+            AND table_name = $table
+        """
+        params = {'schema': self._schema(data_ref), 'table': data_ref.name}
+
+        try:
+            result = self._execute_query((query, params), engine, None)
+            if not result.empty:
+                type_str = result.iloc[0]['object_type']
+                return {
+                    'table': ObjectType.TABLE,
+                    'view': ObjectType.VIEW,
+                }.get(type_str, ObjectType.UNKNOWN)
+        except Exception as e:
+            app_logger.warning(f"Could not determine object type for {data_ref.full_name}: {str(e)}")
+
+        return ObjectType.UNKNOWN
+
+    def build_metadata_columns_query(self, data_ref: DataReference) -> Tuple[str, Dict]:
+        query = """
+            SELECT
+                lower(column_name) as column_name,
+                lower(data_type) as data_type,
+                ordinal_position as column_id
+            FROM information_schema.columns
+            WHERE table_schema = $schema
+            AND table_name = $table
+            ORDER BY ordinal_position
+        """
+        params = {'schema': self._schema(data_ref), 'table': data_ref.name}
+        return query, params
+
+    def build_primary_key_query(self, data_ref: DataReference) -> Tuple[str, Dict]:
+        query = """
+            SELECT lower(unnest(constraint_column_names)) as pk_column_name
+            FROM duckdb_constraints()
+            WHERE schema_name = $schema
+            AND table_name = $table
+            AND constraint_type = 'PRIMARY KEY'
+        """
+        params = {'schema': self._schema(data_ref), 'table': data_ref.name}
+        return query, params
+
+    def build_count_query(self, data_ref: DataReference, date_column: str,
+                          start_date: Optional[str], end_date: Optional[str],
+                          granularity: str = 'day',
+                          aggregates: Optional[List[str]] = None
+                         ) -> Tuple[str, Dict]:
+        period = {
+            'day': f"strftime(date_trunc('day', {date_column}), '%Y-%m-%d')",
+            'hour': f"strftime(date_trunc('hour', {date_column}), '%Y-%m-%d %H:00:00')",
+        }[granularity]
+        query = f"""
+            SELECT
+                {period} as dt,
+                count(*) as cnt{''.join(f', {aggregate}' for aggregate in aggregates or [])}
+            FROM {data_ref.full_name}
+            WHERE 1=1\n"""
+        params = {}
+
+        if start_date:
+            query += f" AND {date_column} >= CAST($start_date AS DATE)\n"
+            params['start_date'] = start_date
+        if end_date:
+            query += f" AND {date_column} < CAST($end_date AS DATE) + INTERVAL 1 DAY\n"
+            params['end_date'] = end_date
+
+        # grouping by expression, alias may clash with a table column named dt
+        query += f" GROUP BY {period} ORDER BY dt DESC"
+        return query, params
+
+    def build_data_query(self, data_ref: DataReference, columns: List[str],
+                        date_column: Optional[str], update_column: str,
+                        start_date: Optional[str], end_date: Optional[str],
+                        exclude_recent_hours: Optional[int] = None,
+                        filters: Optional[List[Tuple[str, Dict]]] = None) -> Tuple[str, Dict]:
+
+        params = {}
+        # Add recent data exclusion flag
+        exclusion_condition, exclusion_params = self._build_exclusion_condition(
+            update_column, exclude_recent_hours
+        )
+
+        if exclusion_condition:
+            columns.append(exclusion_condition)
+            params.update(exclusion_params)
+
+        query = f"""
+        SELECT {', '.join(columns)}
+        FROM {data_ref.full_name}
+        WHERE 1=1\n"""
+
+        if start_date and date_column:
+            query += f"            AND {date_column} >= CAST($start_date AS DATE)\n"
+            params['start_date'] = start_date
+        if end_date and date_column:
+            query += f"            AND {date_column} < CAST($end_date AS DATE) + INTERVAL 1 DAY\n"
+            params['end_date'] = end_date
+
+        for condition, condition_params in filters or []:
+            query += f"            AND {condition}\n"
+            params.update(condition_params)
+
+        return query, params
+
+    def _build_exclusion_condition(self, update_column: str,
+                                    exclude_recent_hours: int) -> Tuple[str, Dict]:
+        """DuckDB-specific implementation for recent data exclusion"""
+        if update_column and exclude_recent_hours:
+            condition = f"""case when {update_column} > CAST(now() AS TIMESTAMP) - to_hours(CAST($exclude_recent_hours AS BIGINT)) then 'y' end as xrecently_changed"""
+            params = {'exclude_recent_hours': exclude_recent_hours}
+            return condition, params
+
+        return None, None
+
+    def _build_watermark_condition(self, update_column: str, watermark: str) -> Tuple[str, Dict]:
+        """DuckDB-specific condition for incremental fetch"""
+        condition = f"{update_column} >= CAST($watermark AS TIMESTAMP)"
+        params = {'watermark': watermark}
+        return condition, params
+
+    def _build_period_condition(self, date_column: str, start: str, end: str) -> Tuple[str, Dict]:
+        """DuckDB-specific condition start <= date_column < end (DATETIME_FORMAT strings)"""
+        condition = f"{date_column} >= CAST($xperiod_start AS TIMESTAMP) AND {date_column} < CAST($xperiod_end AS TIMESTAMP)"
+        params = {'xperiod_start': start, 'xperiod_end': end}
+        return condition, params
+
+    def _datetime_text_expression(self, column: str) -> str:
+        return f"strftime({column}, '%Y-%m-%d %H:%M:%S')"
+
+    def _session_statements(self, timezone: str) -> List[str]:
+        """Timezone and the hints, settings of the database instance are reset when not hinted"""
+        statements = [f"SET TimeZone = '{timezone}'"] if timezone else []
+        for name in self.query_hint_names:
+            if name in self.query_hints:
+                value = str(self.query_hints[name]).replace("'", "''")
+                statements.append(f"SET {name} = '{value}'")
+            else:
+                statements.append(f"RESET {name}")
+        return statements
+
+    def _load_keys(self, connection, table: str, key_columns: List[str], keys: pd.DataFrame):
+        """Keys frame registered as a view and inserted by one statement"""
+        driver_connection = connection.connection.driver_connection
+        view = f"{table}_df"
+        driver_connection.register(view, keys[key_columns])
+        try:
+            columns = ', '.join(self._quote_column(col) for col in key_columns)
+            connection.exec_driver_sql(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {view}")
+        finally:
+            driver_connection.unregister(view)
+
+    def get_extraction_ranges(self, engine: Engine, data_ref: DataReference, ranges: int) -> List[Tuple[str, Dict]]:
+        """Equal rowid ranges"""
+        return self._get_rowid_ranges(engine, data_ref, ranges)
+
+    def _bind_parameter(self, name: str) -> str:
+        return f"${name}"
+
+    def _key_text_expression(self, column: str) -> str:
+        return f"CAST({column} AS VARCHAR)"
+
+    def _hash32_expression(self, text_expression: str) -> str:
+        """DuckDB-specific first 32 bits of md5 as integer"""
+        return f"CAST(('0x' || substr(md5({text_expression}), 1, 8)) AS BIGINT)"
+
+    def _get_lob_type_pattern(self) -> Optional[str]:
+        return r'^(blob|bytea|json)$'
+
+    def build_null_like_condition(self, column: str) -> str:
+        return f"({column} IS NULL OR regexp_full_match(CAST({column} AS VARCHAR), '\\s*|none|nan', 'i'))"
+
+    def build_lob_digest_expression(self, column: str, data_type: str) -> str:
+        if str(data_type).lower() in ('blob', 'bytea'):
+            return f"md5({column}) || ':' || octet_length({column})"
+        text = f"CAST({column} AS VARCHAR)"
+        return f"md5({text}) || ':' || length({text})"
+
+    def _get_type_conversion_rules(self, timezone: str) -> Dict[str, Callable]:
+        return {
+            r'timestamp with time zone': lambda x: pd.to_datetime(x, utc=True, errors='coerce').dt.tz_convert(timezone).dt.tz_localize(None).dt.strftime(DATETIME_FORMAT).str.replace(r'\s00:00:00$', '', regex=True),
+            r'date|timestamp': lambda x: pd.to_datetime(x, errors='coerce').dt.strftime(DATETIME_FORMAT).str.replace(r'\s00:00:00$', '', regex=True),
+            r'boolean': lambda x: x.map({True: '1', False: '0', None: ''}),
+            r'int|decimal|double|float|real': lambda x: x.astype(str).str.replace(r'\.0+$', '', regex=True),
+        }
@@ -1,5 +1,5 @@
 import pandas as pd
-from typing import Optional, Dict, Callable, List, Tuple, Union
+from typing import Optional, Dict, Callable, Iterator, List, Tuple, Union
 from datetime import datetime, timedelta
 from ..constants import DATE_FORMAT,DATETIME_FORMAT
 from .base import BaseDatabaseAdapter, Engine
@@ -9,6 +9,14 @@ from ..logger import app_logger
 import time
 
 class OracleAdapter(BaseDatabaseAdapter):
+    # IN-list of at most 1000 expressions (ORA-01795), 64K bind variables
+    keyed_fetch_max_keys = 1000
+    keyed_fetch_max_params = 65535
+    query_hint_names = ('parallel', 'full', 'arraysize', 'prefetchrows')
+    # global temporary table of the semi-join keys created once per schema (see README):
+    # n1..n4 NUMBER, s1..s4 VARCHAR2(4000), t1..t4 TIMESTAMP, ON COMMIT DELETE ROWS
+    semi_join_key_table = 'xoverrr_semi_join_keys'
+    semi_join_key_table_columns = 4
 
     def _execute_query(self, query: Union[str, Tuple[str, Dict]], engine: Engine, timezone: str) -> pd.DataFrame:
         tz_set = None
@@ -29,7 +37,7 @@ class OracleAdapter(BaseDatabaseAdapter):
                 app_logger.info(f'{tz_set}')
                 cursor.execute(tz_set)
 
-            cursor.arraysize = 100000
+            self._set_fetch_hints(cursor)
 
             if isinstance(query, tuple):
                 query_text, params = query
@@ -72,6 +80,32 @@ class OracleAdapter(BaseDatabaseAdapter):
 
             raise QueryExecutionError(f"Query failed: {str(e)}")
 
+    def iter_query_chunks(self, query: Union[str, Tuple[str, Dict]], engine: Engine, timezone: str,
+                          chunksize: int) -> Iterator[pd.DataFrame]:
+        """Frames of cursor.fetchmany, the session is set up as in _execute_query"""
+        query, params = query if isinstance(query, tuple) else (query, None)
+        raw_conn = engine.raw_connection()
+        try:
+            cursor = raw_conn.cursor()
+            if timezone:
+                cursor.execute(f"alter session set time_zone = '{timezone}'")
+            self._set_fetch_hints(cursor)
+            app_logger.info(f'query\n {query}')
+            app_logger.info(f'{params=}')
+            cursor.execute(query, params or {})
+            columns = [col[0].lower() for col in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield pd.DataFrame(rows, columns=columns)
+            cursor.close()
+        except Exception as e:
+            app_logger.error(f"Streamed query failed: {str(e)}")
+            raise QueryExecutionError(f"Query failed: {str(e)}")
+        finally:
+            raw_conn.close()
+
     def get_object_type(self, data_ref: DataReference, engine: Engine) -> ObjectType:
         """Determine if object is table or view in Oracle"""
         query = """
@@ -107,7 +141,9 @@ class OracleAdapter(BaseDatabaseAdapter):
             SELECT
                 lower(column_name) as column_name,
                 lower(data_type) as data_type,
-                column_id
+                column_id,
+                data_precision,
+                data_scale
             FROM all_tab_columns
             WHERE owner = upper(:schema_name)
             AND table_name = upper(:table_name)
@@ -139,13 +175,50 @@ class OracleAdapter(BaseDatabaseAdapter):
         params['table_name'] = data_ref.name
         return query, params
 
+    def build_change_fingerprint_query(self, data_ref: DataReference) -> Tuple[str, Dict]:
+        """
+        DML monitoring counters plus ddl/statistics times
+        (all_tab_modifications is flushed by oracle periodically and reset by stats gathering,
+        last_analyzed covers the reset)
+        """
+        query = """
+            SELECT
+                to_char(o.last_ddl_time, 'YYYY-MM-DD HH24:MI:SS') as last_ddl_time,
+                to_char(t.last_analyzed, 'YYYY-MM-DD HH24:MI:SS') as last_analyzed,
+                m.inserts,
+                m.updates,
+                m.deletes,
+                m.truncated,
+                to_char(m.timestamp, 'YYYY-MM-DD HH24:MI:SS') as modified_at
+            FROM all_objects o
+            JOIN all_tables t ON t.owner = o.owner AND t.table_name = o.object_name
+            LEFT JOIN all_tab_modifications m ON
+                m.table_owner = o.owner AND
+                m.table_name = o.object_name AND
+                m.partition_name IS NULL
+            WHERE o.owner = upper(:schema_name)
+            AND o.object_name = upper(:table_name)
+            AND o.object_type = 'TABLE'
+        """
+        params = {}
+
+        params['schema_name'] = data_ref.schema
+        params['table_name'] = data_ref.name
+        return query, params
 
     def build_count_query(self, data_ref: DataReference, date_column: str,
-                            start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, Dict]:
+                          start_date: Optional[str], end_date: Optional[str],
+                          granularity: str = 'day',
+                          aggregates: Optional[List[str]] = None
+                         ) -> Tuple[str, Dict]:
+        period = {
+            'day': f"to_char(trunc({date_column}, 'dd'),'YYYY-MM-DD')",
+            'hour': f"to_char(trunc({date_column}, 'hh24'),'YYYY-MM-DD HH24:MI:SS')",
+        }[granularity]
         query = f"""
-            SELECT
-                to_char(trunc({date_column}, 'dd'),'YYYY-MM-DD') as dt,
-                count(*) as cnt
+            SELECT {self._select_hint(data_ref)}
+                {period} as dt,
+                count(*) as cnt{''.join(f', {aggregate}' for aggregate in aggregates or [])}
             FROM {data_ref.full_name}
             WHERE 1=1\n"""
         params = {}
@@ -158,13 +231,14 @@ class OracleAdapter(BaseDatabaseAdapter):
             query += f" AND {date_column} < trunc(to_date(:end_date, 'YYYY-MM-DD'), 'dd') + 1\n"
             params['end_date'] = end_date
 
-        query += f" GROUP BY to_char(trunc({date_column}, 'dd'),'YYYY-MM-DD') ORDER BY dt DESC"
+        query += f" GROUP BY {period} ORDER BY dt DESC"
         return query, params
 
     def build_data_query(self, data_ref: DataReference, columns: List[str],
                         date_column: Optional[str], update_column: str,
                         start_date: Optional[str], end_date: Optional[str],
-                        exclude_recent_hours: Optional[int] = None) -> Tuple[str, Dict]:
+                        exclude_recent_hours: Optional[int] = None,
+                        filters: Optional[List[Tuple[str, Dict]]] = None) -> Tuple[str, Dict]:
 
         params = {}
         # Add recent data exclusion flag
@@ -177,7 +251,7 @@ class OracleAdapter(BaseDatabaseAdapter):
             params.update(exclusion_params)
 
         query = f"""
-        SELECT {', '.join(columns)}
+        SELECT {self._select_hint(data_ref)}{', '.join(columns)}
         FROM {data_ref.full_name}
         WHERE 1=1\n"""
 
@@ -189,8 +263,70 @@ class OracleAdapter(BaseDatabaseAdapter):
             query += f"            AND {date_column} < trunc(to_date(:end_date, 'YYYY-MM-DD'), 'dd') + 1\n"
             params['end_date'] = end_date
 
+        for condition, condition_params in filters or []:
+            query += f"            AND {condition}\n"
+            params.update(condition_params)
+
         return query, params
 
+    def _select_hint(self, data_ref: DataReference) -> str:
+        """/*+ PARALLEL(n) FULL(table) */ by the `parallel` and `full` hints"""
+        hints = []
+        if self.query_hints.get('parallel'):
+            hints.append(f"PARALLEL({int(self.query_hints['parallel'])})")
+        if self.query_hints.get('full'):
+            hints.append(f"FULL({data_ref.name})")
+        return f"/*+ {' '.join(hints)} */ " if hints else ''
+
+    def _set_fetch_hints(self, cursor):
+        """Rows per fetch round trip (`arraysize`, default 100000) and rows prefetched with the execute"""
+        cursor.arraysize = int(self.query_hints.get('arraysize', 100000))
+        if self.query_hints.get('prefetchrows'):
+            cursor.prefetchrows = int(self.query_hints['prefetchrows'])
+
+    def get_extraction_ranges(self, engine: Engine, data_ref: DataReference, ranges: int) -> List[Tuple[str, Dict]]:
+        """
+        ROWID ranges of the table extents chunked by blocks as DBMS_PARALLEL_EXECUTE.CREATE_CHUNKS_BY_ROWID does
+        (per partition segment). The ranges are contiguous between the sorted chunk starts, the first and the last
+        ones are open, so rows of extents allocated after the listing fall into one of them too.
+        Reading dba_extents needs SELECT_CATALOG_ROLE (or SELECT ANY DICTIONARY), without it the table is not split
+        """
+        query = """
+            SELECT rowidtochar(dbms_rowid.rowid_create(1, data_object_id, lo_fno, lo_block, 0)) AS xlow
+            FROM (
+                SELECT data_object_id, grp,
+                    min(relative_fno) KEEP (DENSE_RANK FIRST ORDER BY relative_fno, block_id) AS lo_fno,
+                    min(block_id) KEEP (DENSE_RANK FIRST ORDER BY relative_fno, block_id) AS lo_block
+                FROM (
+                    SELECT o.data_object_id, e.relative_fno, e.block_id,
+                        trunc((sum(e.blocks) OVER (ORDER BY o.data_object_id, e.relative_fno, e.block_id) - e.blocks)
+                              * :ranges / sum(e.blocks) OVER ()) AS grp
+                    FROM dba_extents e
+                    JOIN dba_objects o ON o.owner = e.owner AND o.object_name = e.segment_name
+                        AND nvl(o.subobject_name, '-') = nvl(e.partition_name, '-')
+                    WHERE e.owner = nvl(UPPER(:schema_name), sys_context('userenv', 'current_schema'))
+                    AND e.segment_name = UPPER(:table_name)
+                    AND o.data_object_id IS NOT NULL
+                )
+                GROUP BY data_object_id, grp
+            )
+            ORDER BY data_object_id, lo_fno, lo_block
+        """
+        params = {'schema_name': data_ref.schema, 'table_name': data_ref.name, 'ranges': ranges}
+        if ranges < 2:
+            return []
+        try:
+            chunks = self._execute_query((query, params), engine, None)
+        except QueryExecutionError as e:
+            app_logger.warning(f"No ROWID ranges of {data_ref.full_name} (dba_extents is readable with "
+                               f"SELECT_CATALOG_ROLE), fetching it in one range: {str(e)}")
+            return []
+        # ROWIDs compare by data object, file, block and row as the chunks are sorted
+        bounds = chunks.iloc[:, 0].tolist()[1:]
+        if not bounds:
+            return []
+        return self._build_bound_ranges('ROWID', bounds, lambda name: f'CHARTOROWID(:{name})')
+
     def _build_exclusion_condition(self, update_column: str,
                                     exclude_recent_hours: int) -> Tuple[str, Dict]:
         """Oracle-specific implementation for recent data exclusion"""
@@ -204,6 +340,154 @@ class OracleAdapter(BaseDatabaseAdapter):
 
         return None, None
 
+    def _build_watermark_condition(self, update_column: str, watermark: str) -> Tuple[str, Dict]:
+        """Oracle-specific condition for incremental fetch"""
+        condition = f"{update_column} >= to_date(:watermark, 'YYYY-MM-DD HH24:MI:SS')"
+        params = {'watermark': watermark}
+        return condition, params
+
+    def _build_period_condition(self, date_column: str, start: str, end: str) -> Tuple[str, Dict]:
+        """Oracle-specific condition start <= date_column < end (DATETIME_FORMAT strings)"""
+        condition = f"{date_column} >= to_date(:xperiod_start, 'YYYY-MM-DD HH24:MI:SS') AND {date_column} < to_date(:xperiod_end, 'YYYY-MM-DD HH24:MI:SS')"
+        params = {'xperiod_start': start, 'xperiod_end': end}
+        return condition, params
+
+    def fetch_semi_join(self, engine: Engine, query: Union[str, Tuple[str, Dict]], key_columns: List[str],
+                        keys: pd.DataFrame, timezone: str) -> Tuple[pd.DataFrame, int]:
+        """
+        Keys are loaded by array DML into the global temporary table `semi_join_key_table` created once
+        (see README), so no DDL runs per call. Key columns go to the key table columns of their type
+        (described by an empty execution of the query), the rows are discarded by the rollback at the end.
+        Without the table, with more key columns or other key types the query is filtered by IN-lists of the keys
+        """
+        query, params = query if isinstance(query, tuple) else (query, None)
+        params = params or {}
+        start_time = time.time()
+        app_logger.info('start')
+
+        try:
+            result = self._fetch_semi_join_key_table(engine, query, params, key_columns, keys, timezone)
+        except Exception as e:
+            app_logger.error(f"Semi-join query failed after {time.time() - start_time:.2f}s: {str(e)}")
+            raise QueryExecutionError(f"Query failed: {str(e)}")
+        if result is None:
+            return self.fetch_semi_join_by_keys(engine, (query, params), key_columns, keys, timezone)
+
+        app_logger.info(f"{len(keys)} keys loaded, query executed in {time.time() - start_time:.2f}s")
+        app_logger.info('complete')
+        return result
+
+    def _fetch_semi_join_key_table(self, engine: Engine, query: str, params: Dict, key_columns: List[str],
+                                   keys: pd.DataFrame, timezone: str) -> Optional[Tuple[pd.DataFrame, int]]:
+        """fetch_semi_join through the key table, None when the table or the key types are not available"""
+        raw_conn = engine.raw_connection()
+        try:
+            cursor = raw_conn.cursor()
+            try:
+                if timezone:
+                    cursor.execute(f"alter session set time_zone = '{timezone}'")
+                try:
+                    cursor.execute(f"SELECT 1 FROM {self.semi_join_key_table} WHERE 1=0")
+                except Exception as e:
+                    app_logger.warning(f"semi-join key table is not available, keys are sent as IN-lists: {str(e)}")
+                    return None
+
+                columns = ', '.join(self._quote_column(col) for col in key_columns)
+                cursor.execute(f"SELECT {columns} FROM ({query}) x WHERE 1=0", params)
+                table_columns = self._key_table_columns(cursor.description)
+                if table_columns is None:
+                    app_logger.info('key types do not fit the semi-join key table, keys are sent as IN-lists')
+                    return None
+
+                rows = self._key_rows(keys, key_columns)
+                if rows:
+                    markers = ', '.join(f':{j + 1}' for j in range(len(key_columns)))
+                    cursor.executemany(
+                        f"INSERT INTO {self.semi_join_key_table} ({', '.join(table_columns)}) VALUES ({markers})", rows
+                    )
+                rows_query, extra_query = self.build_semi_join_queries(
+                    query, self.semi_join_key_table, key_columns, table_columns
+                )
+                app_logger.info(f'query\n {rows_query}')
+                app_logger.info(f'{params=}')
+                self._set_fetch_hints(cursor)
+                cursor.execute(rows_query, params)
+                df = pd.DataFrame(cursor.fetchall(), columns=[col[0].lower() for col in cursor.description])
+                cursor.execute(extra_query, params)
+                return df, int(cursor.fetchone()[0])
+            finally:
+                cursor.close()
+        finally:
+            try:
+                # the key table rows live until the end of the transaction (ON COMMIT DELETE ROWS)
+                raw_conn.rollback()
+            except Exception as rollback_error:
+                app_logger.warning(f"Rollback failed: {rollback_error}")
+            raw_conn.close()
+
+    def _key_table_columns(self, description: List[tuple]) -> Optional[List[str]]:
+        """Key table column of every key column by the cursor description: n<i> numbers, s<i> strings, t<i> dates"""
+        if len(description) > self.semi_join_key_table_columns:
+            return None
+        columns = []
+        for i, column in enumerate(description, 1):
+            type_name = getattr(column[1], 'name', str(column[1])).upper()
+            if any(name in type_name for name in ('NUMBER', 'BINARY_DOUBLE', 'BINARY_FLOAT', 'BINARY_INTEGER')):
+                columns.append(f'n{i}')
+            elif 'TZ' in type_name:
+                return None
+            elif 'TIMESTAMP' in type_name or 'DATE' in type_name:
+                columns.append(f't{i}')
+            elif 'CHAR' in type_name:
+                columns.append(f's{i}')
+            else:
+                return None
+        return columns
+
+    def _profile_data_types(self, columns_meta: pd.DataFrame) -> List[str]:
+        """
+        NUMBER with scale 0 (NUMBER(p), INTEGER) and NUMBER without precision and scale, mostly used
+        for identifiers and codes, are profiled as integers: hashed, so they can be verified by checksums
+        """
+        if 'data_scale' not in columns_meta:
+            return super()._profile_data_types(columns_meta)
+        types = []
+        for data_type, precision, scale in columns_meta[['data_type', 'data_precision', 'data_scale']].itertuples(index=False):
+            integer = data_type == 'number' and (scale == 0 or (pd.isna(precision) and pd.isna(scale)))
+            types.append('integer' if integer else data_type)
+        return types
+
+    def _mod_expression(self, expression: str, divisor: int) -> str:
+        return f"mod({expression}, {divisor})"
+
+    def _datetime_text_expression(self, column: str) -> str:
+        return f"to_char({column}, 'YYYY-MM-DD HH24:MI:SS')"
+
+    def _key_text_expression(self, column: str) -> str:
+        return f"to_char({column})"
+
+    def _hash32_expression(self, text_expression: str) -> str:
+        """Oracle-specific first 32 bits of md5 as integer"""
+        return f"to_number(substr(rawtohex(standard_hash({text_expression}, 'MD5')), 1, 8), 'XXXXXXXX')"
+
+    def _get_lob_type_pattern(self) -> Optional[str]:
+        return r'^(n?clob|blob)$'
+
+    def build_null_like_condition(self, column: str) -> str:
+        # empty string is NULL in Oracle, numbers and dates are matched as text in the session format
+        return f"({column} IS NULL OR regexp_like({column}, '^([[:space:]]*|none|nan)$', 'i'))"
+
+    def build_lob_digest_expression(self, column: str, data_type: str) -> str:
+        """
+        dbms_crypto.hash (HASH_MD5 = 2, CLOB hashed as AL32UTF8) for LOBs, standard_hash
+        for the rest, requires EXECUTE on dbms_crypto. Concatenation with NULL is not NULL in Oracle
+        """
+        if self.is_lob_type(data_type):
+            digest, length = f"dbms_crypto.hash({column}, 2)", f"dbms_lob.getlength({column})"
+        else:
+            digest, length = f"standard_hash(to_char({column}), 'MD5')", f"length(to_char({column}))"
+        return f"CASE WHEN {column} IS NULL THEN NULL ELSE lower(rawtohex({digest})) || ':' || {length} END"
+
     def _get_type_conversion_rules(self, timezone: str) -> Dict[str, Callable]:
         return {
             #errors='coerce' is needed as workaround for >= 2262 year: Out of bounds nanosecond timestamp (3023-04-04 00:00:00)
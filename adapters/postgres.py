@@ -1,16 +1,21 @@
 import pandas as pd
-from typing import Optional, Dict, Callable, List, Tuple, Union
+from typing import Optional, Dict, Callable, Iterator, List, Tuple, Union
 from ..constants import DATETIME_FORMAT
 from .base import BaseDatabaseAdapter, Engine
 from ..models import DataReference, ObjectType
 from ..exceptions import QueryExecutionError
 from json import dumps
+import csv
+import io
 
 from ..logger import app_logger
 import time
 
 class PostgresAdapter(BaseDatabaseAdapter):
-
+    # parameters are substituted by the driver, the limit keeps queries reasonably small
+    keyed_fetch_max_keys = 10000
+    keyed_fetch_max_params = 30000
+    query_hint_names = ('work_mem', 'max_parallel_workers_per_gather', 'itersize')
 
     def _execute_query(self, query: Union[str, Tuple[str, Dict]], engine: Engine, timezone: str) -> pd.DataFrame:
 
@@ -27,12 +32,14 @@ class PostgresAdapter(BaseDatabaseAdapter):
                 query, params = query
                 if tz_set:
                     query = f'{tz_set}\n{query}'
+                query = ''.join(f'{statement};\n' for statement in self._hint_statements()) + query
                 app_logger.info(f'query\n {query}')
                 app_logger.info(f'{params=}')
                 df = pd.read_sql(query, engine, params=params)
             else:
                 if tz_set:
                     query = f'{tz_set}\n{query}'
+                query = ''.join(f'{statement};\n' for statement in self._hint_statements()) + query
                 app_logger.info(f'query\n {query}')
                 df = pd.read_sql(query, engine)
             execution_time = time.time() - start_time
@@ -110,13 +117,34 @@ class PostgresAdapter(BaseDatabaseAdapter):
         params = {'schema': data_ref.schema, 'table': data_ref.name}
         return query, params
 
+    def build_change_fingerprint_query(self, data_ref: DataReference) -> Tuple[str, Dict]:
+        """Modification counters from statistics collector, filenode catches truncate/rewrite"""
+        query = """
+            SELECT
+                n_tup_ins,
+                n_tup_upd,
+                n_tup_del,
+                pg_relation_filenode(relid) as filenode
+            FROM pg_stat_user_tables
+            WHERE schemaname = %(schema)s
+            AND relname = %(table)s
+        """
+        params = {'schema': data_ref.schema, 'table': data_ref.name}
+        return query, params
+
     def build_count_query(self, data_ref: DataReference, date_column: str,
-                          start_date: Optional[str], end_date: Optional[str]
+                          start_date: Optional[str], end_date: Optional[str],
+                          granularity: str = 'day',
+                          aggregates: Optional[List[str]] = None
                          ) -> Tuple[str, Dict]:
+        period = {
+            'day': f"to_char(date_trunc('day', {date_column}),'YYYY-MM-DD')",
+            'hour': f"to_char(date_trunc('hour', {date_column}),'YYYY-MM-DD HH24:00:00')",
+        }[granularity]
         query = f"""
             SELECT
-                to_char(date_trunc('day', {date_column}),'YYYY-MM-DD') as dt,
-                count(*) as cnt
+                {period} as dt,
+                count(*) as cnt{''.join(f', {aggregate}' for aggregate in aggregates or [])}
             FROM {data_ref.full_name}
             WHERE 1=1\n"""
         params = {}
@@ -128,13 +156,14 @@ class PostgresAdapter(BaseDatabaseAdapter):
             query += f" AND {date_column} < date_trunc('day', %(end_date)s::date)  + interval '1 days'\n"
             params['end_date'] = end_date
 
-        query += f" GROUP BY to_char(date_trunc('day', {date_column}),'YYYY-MM-DD') ORDER BY dt DESC"
+        query += f" GROUP BY {period} ORDER BY dt DESC"
         return query, params
 
     def build_data_query(self, data_ref: DataReference, columns: List[str],
                         date_column: Optional[str], update_column: str,
                         start_date: Optional[str], end_date: Optional[str],
-                        exclude_recent_hours: Optional[int] = None) -> Tuple[str, Dict]:
+                        exclude_recent_hours: Optional[int] = None,
+                        filters: Optional[List[Tuple[str, Dict]]] = None) -> Tuple[str, Dict]:
 
         params = {}
         # Add recent data exclusion flag
@@ -158,6 +187,10 @@ class PostgresAdapter(BaseDatabaseAdapter):
             query += f"            AND {date_column} < date_trunc('day', %(end_date)s::date)  + interval '1 days'\n"
             params['end_date'] = end_date
 
+        for condition, condition_params in filters or []:
+            query += f"            AND {condition}\n"
+            params.update(condition_params)
+
         return query, params
 
     def _build_exclusion_condition(self, update_column: str,
@@ -174,6 +207,115 @@ class PostgresAdapter(BaseDatabaseAdapter):
 
         return None, None
 
+    def _build_watermark_condition(self, update_column: str, watermark: str) -> Tuple[str, Dict]:
+        """PostgreSQL-specific condition for incremental fetch"""
+        condition = f"{update_column} >= %(watermark)s::timestamp"
+        params = {'watermark': watermark}
+        return condition, params
+
+    def _build_period_condition(self, date_column: str, start: str, end: str) -> Tuple[str, Dict]:
+        """PostgreSQL-specific condition start <= date_column < end (DATETIME_FORMAT strings)"""
+        condition = f"{date_column} >= %(xperiod_start)s::timestamp AND {date_column} < %(xperiod_end)s::timestamp"
+        params = {'xperiod_start': start, 'xperiod_end': end}
+        return condition, params
+
+    def _datetime_text_expression(self, column: str) -> str:
+        return f"to_char({column}, 'YYYY-MM-DD HH24:MI:SS')"
+
+    def _session_statements(self, timezone: str) -> List[str]:
+        return ([f"set time zone '{timezone}'"] if timezone else []) + self._hint_statements()
+
+    def _hint_statements(self) -> List[str]:
+        """SET LOCAL of the planner and memory hints, for the transaction of the query"""
+        statements = []
+        for name, value in self.query_hints.items():
+            if name != 'itersize':
+                value = str(value).replace("'", "''")
+                statements.append(f"SET LOCAL {name} = '{value}'")
+        return statements
+
+    def iter_query_chunks(self, query: Union[str, Tuple[str, Dict]], engine: Engine, timezone: str,
+                          chunksize: int) -> Iterator[pd.DataFrame]:
+        """`itersize` hint is the rows per chunk and per round trip of the server side cursor"""
+        itersize = self.query_hints.get('itersize')
+        return super().iter_query_chunks(query, engine, timezone, int(itersize) if itersize else chunksize)
+
+    def _load_keys(self, connection, table: str, key_columns: List[str], keys: pd.DataFrame):
+        """COPY of the keys in csv format (psycopg2 copy_expert or psycopg 3 copy)"""
+        columns = ', '.join(self._quote_column(col) for col in key_columns)
+        copy_query = f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)"
+        rows = self._key_rows(keys, key_columns)
+        cursor = connection.connection.driver_connection.cursor()
+        try:
+            if hasattr(cursor, 'copy_expert'):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                cursor.copy_expert(copy_query, buffer)
+            else:
+                with cursor.copy(copy_query) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+        finally:
+            cursor.close()
+
+    def get_extraction_ranges(self, engine: Engine, data_ref: DataReference, ranges: int) -> List[Tuple[str, Dict]]:
+        """
+        Ranges of ctid pages by relpages of the last analyze, the last range is open for pages added since.
+        Before PostgreSQL 14 (no TID range scan) every range would be a full scan, the table is not split.
+        Greenplum tables are split by segments (gp_segment_id)
+        """
+        try:
+            version, version_num = self._execute_query(
+                "SELECT version() AS version, current_setting('server_version_num')::int AS version_num", engine, None
+            ).iloc[0]
+            if 'greenplum' in version.lower():
+                segments = self._execute_query(
+                    "SELECT content FROM gp_segment_configuration WHERE role = 'p' AND content >= 0 ORDER BY content",
+                    engine, None
+                )['content'].tolist()
+                return [("gp_segment_id = %(xrange_segment)s", {'xrange_segment': int(segment)}) for segment in segments]
+            if int(version_num) < 140000:
+                app_logger.info(f"No ctid ranges of {data_ref.full_name}: TID range scans need PostgreSQL 14")
+                return []
+            pages = self._execute_query(
+                ("SELECT relpages FROM pg_class WHERE oid = to_regclass(%(table)s)", {'table': data_ref.full_name}),
+                engine, None
+            )
+        except QueryExecutionError as e:
+            app_logger.warning(f"No ctid ranges of {data_ref.full_name}: {str(e)}")
+            return []
+        pages = int(pages.iloc[0, 0]) if not pages.empty and not pd.isna(pages.iloc[0, 0]) else 0
+        if pages < ranges or ranges < 2:
+            return []
+        step = pages // ranges
+        bounds = [f'({page},0)' for page in range(step, step * ranges, step)]
+        return self._build_bound_ranges('ctid', bounds, lambda name: f'%({name})s::tid')
+
+    def _bind_parameter(self, name: str) -> str:
+        return f"%({name})s"
+
+    def _key_text_expression(self, column: str) -> str:
+        return f"CAST({column} AS text)"
+
+    def _mod_expression(self, expression: str, divisor: int) -> str:
+        # no % in the query, params are substituted with pyformat
+        return f"mod({expression}, {divisor})"
+
+    def _hash32_expression(self, text_expression: str) -> str:
+        """PostgreSQL-specific first 32 bits of md5 as integer"""
+        return f"('x' || substr(md5({text_expression}), 1, 8))::bit(32)::bigint"
+
+    def _get_lob_type_pattern(self) -> Optional[str]:
+        return r'^(text|json|jsonb|bytea|xml)$'
+
+    def build_null_like_condition(self, column: str) -> str:
+        return f"({column} IS NULL OR {column}::text ~* '^([[:space:]]*|none|nan)$')"
+
+    def build_lob_digest_expression(self, column: str, data_type: str) -> str:
+        text = column if str(data_type).lower() == 'bytea' else f"{column}::text"
+        return f"md5({text}) || ':' || length({text})"
+
     def _get_type_conversion_rules(self, timezone) -> Dict[str, Callable]:
         return {
             r'date': lambda x: pd.to_datetime(x, errors='coerce').dt.strftime(DATETIME_FORMAT).str.replace(r'\s00:00:00$', '', regex=True),
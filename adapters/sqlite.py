@@ -0,0 +1,235 @@
+import pandas as pd
+from typing import Optional, Dict, Callable, List, Tuple, Union
+from ..constants import DATETIME_FORMAT
+from .base import BaseDatabaseAdapter, Engine
+from ..models import DataReference, ObjectType
+from ..exceptions import QueryExecutionError
+from ..logger import app_logger
+import time
+import math
+import re
+import hashlib
+
+_NULL_LIKE = re.compile(r'(?i)(None|nan|NaN|\s*)')
+
+
+def _md5_32(text):
+    if text is None:
+        return None
+    return int(hashlib.md5(str(text).encode()).hexdigest()[:8], 16)
+
+
+def _md5(value):
+    if value is None:
+        return None
+    return hashlib.md5(value if isinstance(value, bytes) else str(value).encode()).hexdigest()
+
+
+def _null_like(value):
+    # as prepare_dataframe: NULL, NaN, empty/whitespace-only, 'None' and 'nan' strings
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return 1
+    return int(isinstance(value, str) and _NULL_LIKE.fullmatch(value) is not None)
+
+
+class SQLiteAdapter(BaseDatabaseAdapter):
+    """
+    SQLite adapter, local stand-in for end-to-end tests and benchmarks without live databases.
+
+    SQLite has no session timezone: timestamps are expected to be stored as naive UTC text
+    ('YYYY-MM-DD HH:MM:SS'), schema is the attached database name ('main' by default).
+    SQLite has no md5 either, key hash sampling and LOB digests use functions registered on the connection
+    """
+    # SQLITE_MAX_VARIABLE_NUMBER is 999 before 3.32
+    keyed_fetch_max_keys = 1000
+    keyed_fetch_max_params = 999
+
+    def _execute_query(self, query: Union[str, Tuple[str, Dict]], engine: Engine, timezone: str) -> pd.DataFrame:
+        df = None
+        start_time = time.time()
+        app_logger.info('start')
+
+        try:
+            query, params = query if isinstance(query, tuple) else (query, None)
+            app_logger.info(f'query\n {query}')
+            if params:
+                app_logger.info(f'{params=}')
+            with engine.connect() as connection:
+                self._prepare_connection(connection, timezone)
+                df = pd.read_sql(query, connection, params=params)
+            execution_time = time.time() - start_time
+            app_logger.info(f"Query executed in {execution_time:.2f}s")
+            app_logger.info('complete')
+            return df
+        except Exception as e:
+            execution_time = time.time() - start_time
+            app_logger.error(f"Query execution failed after {execution_time:.2f}s: {str(e)}")
+            raise QueryExecutionError(f"Query failed: {str(e)}")
+
+    def _prepare_connection(self, connection, timezone: str) -> None:
+        driver_connection = connection.connection.driver_connection
+        driver_connection.create_function('xoverrr_md5_32', 1, _md5_32, deterministic=True)
+        driver_connection.create_function('xoverrr_md5', 1, _md5, deterministic=True)
+        driver_connection.create_function('xoverrr_null_like', 1, _null_like, deterministic=True)
+
+    @staticmethod
+    def _schema(data_ref: DataReference) -> str:
+        return data_ref.schema or 'main'
+
+    def get_object_type(self, data_ref: DataReference, engine: Engine) -> ObjectType:
+        """Determine if object is table or view"""
+        query = f"""
+            SELECT type as object_type
+            FROM {self._schema(data_ref)}.sqlite_master
+            WHERE name = :table
+        """
+        params = {'table': data_ref.name}
+
+        try:
+            result = self._execute_query((query, params), engine, None)
+            if not result.empty:
+                type_str = result.iloc[0]['object_type']
+                return {
+                    'table': ObjectType.TABLE,
+                    'view': ObjectType.VIEW,
+                }.get(type_str, ObjectType.UNKNOWN)
+        except Exception as e:
+            app_logger.warning(f"Could not determine object type for {data_ref.full_name}: {str(e)}")
+
+        return ObjectType.UNKNOWN
+
+    def build_metadata_columns_query(self, data_ref: DataReference) -> Tuple[str, Dict]:
+        query = """
+            SELECT
+                lower(name) as column_name,
+                lower(type) as data_type,
+                cid + 1 as column_id
+            FROM pragma_table_info(:table, :schema)
+            ORDER BY cid
+        """
+        params = {'schema': self._schema(data_ref), 'table': data_ref.name}
+        return query, params
+
+    def build_primary_key_query(self, data_ref: DataReference) -> Tuple[str, Dict]:
+        query = """
+            SELECT lower(name) as pk_column_name
+            FROM pragma_table_info(:table, :schema)
+            WHERE pk > 0
+            ORDER BY pk
+        """
+        params = {'schema': self._schema(data_ref), 'table': data_ref.name}
+        return query, params
+
+    def build_count_query(self, data_ref: DataReference, date_column: str,
+                          start_date: Optional[str], end_date: Optional[str],
+                          granularity: str = 'day',
+                          aggregates: Optional[List[str]] = None
+                         ) -> Tuple[str, Dict]:
+        period = {
+            'day': f"date({date_column})",
+            'hour': f"strftime('%Y-%m-%d %H:00:00', {date_column})",
+        }[granularity]
+        query = f"""
+            SELECT
+                {period} as dt,
+                count(*) as cnt{''.join(f', {aggregate}' for aggregate in aggregates or [])}
+            FROM {data_ref.full_name}
+            WHERE 1=1\n"""
+        params = {}
+
+        if start_date:
+            query += f" AND {date_column} >= date(:start_date)\n"
+            params['start_date'] = start_date
+        if end_date:
+            query += f" AND {date_column} < date(:end_date, '+1 day')\n"
+            params['end_date'] = end_date
+
+        query += f" GROUP BY {period} ORDER BY dt DESC"
+        return query, params
+
+    def build_data_query(self, data_ref: DataReference, columns: List[str],
+                        date_column: Optional[str], update_column: str,
+                        start_date: Optional[str], end_date: Optional[str],
+                        exclude_recent_hours: Optional[int] = None,
+                        filters: Optional[List[Tuple[str, Dict]]] = None) -> Tuple[str, Dict]:
+
+        params = {}
+        # Add recent data exclusion flag
+        exclusion_condition, exclusion_params = self._build_exclusion_condition(
+            update_column, exclude_recent_hours
+        )
+
+        if exclusion_condition:
+            columns.append(exclusion_condition)
+            params.update(exclusion_params)
+
+        query = f"""
+        SELECT {', '.join(columns)}
+        FROM {data_ref.full_name}
+        WHERE 1=1\n"""
+
+        if start_date and date_column:
+            query += f"            AND {date_column} >= date(:start_date)\n"
+            params['start_date'] = start_date
+        if end_date and date_column:
+            query += f"            AND {date_column} < date(:end_date, '+1 day')\n"
+            params['end_date'] = end_date
+
+        for condition, condition_params in filters or []:
+            query += f"            AND {condition}\n"
+            params.update(condition_params)
+
+        return query, params
+
+    def get_extraction_ranges(self, engine: Engine, data_ref: DataReference, ranges: int) -> List[Tuple[str, Dict]]:
+        """Equal rowid ranges"""
+        return self._get_rowid_ranges(engine, data_ref, ranges)
+
+    def _build_exclusion_condition(self, update_column: str,
+                                    exclude_recent_hours: int) -> Tuple[str, Dict]:
+        """SQLite-specific implementation for recent data exclusion"""
+        if update_column and exclude_recent_hours:
+            condition = f"""case when {update_column} > datetime('now', '-' || :exclude_recent_hours || ' hours') then 'y' end as xrecently_changed"""
+            params = {'exclude_recent_hours': exclude_recent_hours}
+            return condition, params
+
+        return None, None
+
+    def _build_watermark_condition(self, update_column: str, watermark: str) -> Tuple[str, Dict]:
+        """SQLite-specific condition for incremental fetch"""
+        condition = f"{update_column} >= datetime(:watermark)"
+        params = {'watermark': watermark}
+        return condition, params
+
+    def _build_period_condition(self, date_column: str, start: str, end: str) -> Tuple[str, Dict]:
+        """SQLite-specific condition start <= date_column < end (DATETIME_FORMAT strings)"""
+        condition = f"{date_column} >= datetime(:xperiod_start) AND {date_column} < datetime(:xperiod_end)"
+        params = {'xperiod_start': start, 'xperiod_end': end}
+        return condition, params
+
+    def _datetime_text_expression(self, column: str) -> str:
+        return f"strftime('%Y-%m-%d %H:%M:%S', {column})"
+
+    def _key_text_expression(self, column: str) -> str:
+        return f"CAST({column} AS TEXT)"
+
+    def _hash32_expression(self, text_expression: str) -> str:
+        """SQLite-specific first 32 bits of md5 as integer"""
+        return f"xoverrr_md5_32({text_expression})"
+
+    def _get_lob_type_pattern(self) -> Optional[str]:
+        return r'^(text|clob|blob|json)$'
+
+    def build_null_like_condition(self, column: str) -> str:
+        return f"xoverrr_null_like({column})"
+
+    def build_lob_digest_expression(self, column: str, data_type: str) -> str:
+        return f"xoverrr_md5({column}) || ':' || length({column})"
+
+    def _get_type_conversion_rules(self, timezone: str) -> Dict[str, Callable]:
+        # declared types are free text in SQLite, values come back as int/float/str
+        return {
+            r'date|time': lambda x: pd.to_datetime(x, errors='coerce').dt.strftime(DATETIME_FORMAT).str.replace(r'\s00:00:00$', '', regex=True),
+            r'bool': lambda x: x.map({1: '1', 0: '0', True: '1', False: '0', None: ''}),
+            r'int|real|floa|doub|numeric|decimal': lambda x: x.astype(str).str.replace(r'\.0+$', '', regex=True),
+        }
@@ -0,0 +1,164 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Tuple, Any
+
+from sqlalchemy.engine import Engine
+
+try:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+except ImportError:
+    AsyncEngine = None
+
+from .core import DataQualityComparator
+from .models import DataReference
+from .profiling import ComparisonProfile
+from . import constants as ct
+
+
+class AsyncDataQualityComparator:
+    """
+    asyncio API of DataQualityComparator for services comparing many tables from one event loop.
+
+    Every comparison runs the synchronous pipeline (queries over the pooled sync engines, conversion
+    and diffing) in a worker thread, so the event loop is never blocked. Up to `max_concurrency`
+    comparisons run at once, each on its own DataQualityComparator over the shared engines,
+    other arguments are the ones of DataQualityComparator.
+
+    `timeout` (seconds) limits every comparison, methods take their own `timeout` overriding it.
+    A cancelled or timed out comparison raises CancelledError / TimeoutError in the awaiting task at once,
+    the worker thread stops before the next phase of the comparison and the comparison is counted as failed
+    in `comparison_stats`, one still waiting for a thread is not started.
+    A running query is not interrupted: its thread, comparator and database connection stay busy until it finishes,
+    the comparator is released only then. Queries run on the sync engines, async engines and drivers are not supported
+    """
+
+    def __init__(
+        self,
+        source_engine: Engine,
+        target_engine: Engine,
+        max_concurrency: int = ct.DEFAULT_ASYNC_CONCURRENCY,
+        timeout: Optional[float] = None,
+        **comparator_kwargs
+    ):
+        for engine in (source_engine, target_engine):
+            if AsyncEngine is not None and isinstance(engine, AsyncEngine):
+                raise ValueError(
+                    "AsyncEngine is not supported: comparisons run in worker threads, "
+                    "pass a sync engine of the database (create_engine with a sync driver)"
+                )
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be positive, got {max_concurrency}")
+
+        self.source_engine = source_engine
+        self.target_engine = target_engine
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        # one comparator per concurrent comparison, a comparator is busy until its worker thread finishes
+        self._comparators = [
+            DataQualityComparator(source_engine, target_engine, **comparator_kwargs) for _ in range(max_concurrency)
+        ]
+        self._idle = asyncio.Queue()
+        for comparator in self._comparators:
+            self._idle.put_nowait(comparator)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='xoverrr')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Wait for the worker threads (of cancelled comparisons too) and release them"""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    @property
+    def comparison_stats(self) -> Dict[str, Any]:
+        """Statistics of all comparisons as of DataQualityComparator.comparison_stats"""
+        stats = None
+        for comparator in self._comparators:
+            other = comparator.comparison_stats
+            if stats is None:
+                stats = {**other, 'profile': ComparisonProfile()}
+                for key in ('tables_success', 'tables_failed', 'tables_skipped'):
+                    stats[key] = set(other[key])
+            else:
+                for key in ('compared', ct.COMPARISON_SUCCESS, ct.COMPARISON_FAILED, ct.COMPARISON_SKIPPED):
+                    stats[key] += other[key]
+                for key in ('tables_success', 'tables_failed', 'tables_skipped'):
+                    stats[key] |= other[key]
+                stats['start_time'] = min(stats['start_time'], other['start_time'])
+                if other['end_time'] is not None:
+                    stats['end_time'] = max(stats['end_time'] or other['end_time'], other['end_time'])
+            stats['profile'].aggregate(other['profile'])
+        return stats
+
+    def reset_stats(self):
+        for comparator in self._comparators:
+            comparator.reset_stats()
+
+    async def _run(self, method: str, timeout: Optional[float], args: Tuple, kwargs: Dict):
+        """Run the comparator method in a worker thread, the timeout covers waiting for a free comparator too"""
+        return await asyncio.wait_for(self._run_in_thread(method, args, kwargs),
+                                      timeout if timeout is not None else self.timeout)
+
+    async def _run_in_thread(self, method: str, args: Tuple, kwargs: Dict):
+        comparator = await self._idle.get()
+        cancel_event = threading.Event()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._executor, functools.partial(self._call, comparator, cancel_event, method, args, kwargs)
+        )
+        # the comparator goes back to the pool when the thread finishes, not when the awaiting task gives up
+        future.add_done_callback(functools.partial(self._release, comparator))
+        try:
+            # shield: cancelling the awaiting task must not detach the future from the running thread
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # cancelled by the caller or by the timeout of _run
+            cancel_event.set()
+            raise
+
+    @staticmethod
+    def _call(comparator: DataQualityComparator, cancel_event: threading.Event, method: str, args: Tuple, kwargs: Dict):
+        if cancel_event.is_set():
+            # cancelled while waiting for a thread
+            return None
+        comparator._cancel_event = cancel_event
+        try:
+            return getattr(comparator, method)(*args, **kwargs)
+        finally:
+            comparator._cancel_event = None
+
+    def _release(self, comparator: DataQualityComparator, future: asyncio.Future):
+        if not future.cancelled():
+            # the result of a cancelled comparison is not awaited by anyone, mark its exception retrieved
+            future.exception()
+        self._idle.put_nowait(comparator)
+
+    async def compare_counts(self, source_table: DataReference, target_table: DataReference, *args,
+                             timeout: Optional[float] = None, **kwargs):
+        """DataQualityComparator.compare_counts in a worker thread"""
+        return await self._run('compare_counts', timeout, (source_table, target_table) + args, kwargs)
+
+    async def compare_profiles(self, source_table: DataReference, target_table: DataReference, *args,
+                               timeout: Optional[float] = None, **kwargs):
+        """DataQualityComparator.compare_profiles in a worker thread"""
+        return await self._run('compare_profiles', timeout, (source_table, target_table) + args, kwargs)
+
+    async def compare_sample(self, source_table: DataReference, target_table: DataReference, *args,
+                             timeout: Optional[float] = None, **kwargs):
+        """DataQualityComparator.compare_sample in a worker thread"""
+        return await self._run('compare_sample', timeout, (source_table, target_table) + args, kwargs)
+
+    async def compare_custom_query(self, source_query: str, source_params: Tuple[str, Dict],
+                                   target_query: str, target_params: Tuple[str, Dict],
+                                   custom_primary_key: List[str], *args,
+                                   timeout: Optional[float] = None, **kwargs):
+        """DataQualityComparator.compare_custom_query in a worker thread"""
+        return await self._run(
+            'compare_custom_query', timeout,
+            (source_query, source_params, target_query, target_params, custom_primary_key) + args, kwargs
+        )
@@ -0,0 +1,26 @@
+from types import ModuleType
+
+BACKENDS = ('pandas', 'polars')
+
+
+def get_backend(name: str) -> ModuleType:
+    """
+    Module implementing the comparison core for the backend:
+    prepare_dataframe, clean_recently_changed_data, compare_dataframes, analyze_column_discrepancies
+    """
+    if name == 'pandas':
+        try:
+            from . import utils as backend
+        except ImportError:
+            # for cases when used as standalone script
+            import utils as backend
+    elif name == 'polars':
+        try:
+            from . import polars_utils as backend
+        except ImportError:
+            # for cases when used as standalone script
+            import polars_utils as backend
+        backend.check_polars()
+    else:
+        raise ValueError(f"Unknown backend {name}, expected one of {BACKENDS}")
+    return backend
@@ -6,6 +6,14 @@ DATETIME_FORMAT = f"{DATE_FORMAT} %H:%M:%S"
 NULL_REPLACEMENT = "N/A"
 DEFAULT_MAX_EXAMPLES = 3
 DEFAULT_MAX_SAMPLE_SIZE_GB = 3  # Max size of dataframe to compare
+DEFAULT_PARALLEL_MIN_ROWS = 1_000_000  # Min rows to split comparison into processes
+DEFAULT_DRILL_DOWN_MIN_ROWS = 100_000  # Count drill-down stops at slices of this size
+DEFAULT_DRILL_DOWN_BUCKETS = 16  # Key hash buckets per drill-down level
+DEFAULT_DRILL_DOWN_MAX_DEPTH = 3  # Max key hash bucket levels below an hour
+DEFAULT_DRILL_DOWN_MAX_SAMPLES = 10  # Max drill-down slices compared by samples
+DEFAULT_KEYED_FETCH_WORKERS = 4  # Concurrent batches of the fetch by primary keys
+DEFAULT_STREAM_CHUNK_ROWS = 100_000  # Rows per fetched chunk of the streaming digest mode
+DEFAULT_ASYNC_CONCURRENCY = 4  # Comparisons running at once in worker threads of the async comparator
 
 # SQL patterns
 RESERVED_WORDS = ['date', 'comment', 'file', 'number', 'mode', 'successful']
@@ -15,4 +23,6 @@ DEFAULT_TZ = 'UTC'
 # Comparison result statuses
 COMPARISON_SUCCESS = 'success'
 COMPARISON_FAILED = 'failed'
-COMPARISON_SKIPPED = 'skipped'
\ No newline at end of file
+COMPARISON_SKIPPED = 'skipped'
+# Number of hot functions logged by cProfile hook
+DEFAULT_PROFILE_TOP_N = 25
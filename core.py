@@ -1,7 +1,10 @@
 
 import sys
+import functools
+from dataclasses import asdict, fields, replace
 from enum import Enum, auto
 from typing import Optional, List, Dict, Callable, Union, Tuple, Any
+import numpy as np
 import pandas as pd
 from sqlalchemy.engine import Engine
 from .models import (
@@ -15,9 +18,23 @@ from .logger import app_logger
 from .adapters.oracle import OracleAdapter
 from .adapters.postgres import PostgresAdapter
 from .adapters.clickhouse import ClickHouseAdapter
+from .adapters.sqlite import SQLiteAdapter
+from .adapters.duckdb import DuckDBAdapter
 from .adapters.base import BaseDatabaseAdapter
 
 from . import constants as ct
+from .state import ComparisonStateStore
+from .profiling import ComparisonProfile, HotPathProfiler
+from .metrics import MetricsRecorder
+from .backends import get_backend
+from .parallel import compare_dataframes_parallel
+from .pushdown import split_pushdown_examples, build_pushdown_result
+from .profiles import (
+    unpack_profile,
+    build_profile_result,
+    generate_comparison_profile_report,
+    ProfileComparisonDetails
+)
 
 from .exceptions import (
     MetadataError,
@@ -26,11 +43,19 @@ from .exceptions import (
 from .utils import (
     prepare_dataframe,
     compare_dataframes,
-    clean_recently_changed_data,
     generate_comparison_sample_report,
     generate_comparison_count_report,
+    generate_unchanged_report,
+    apply_incremental_delta,
+    clean_recently_changed_data,
+    digest_rows,
+    merge_column_group_results,
+    hash_value_columns,
     cross_fill_missing_dates,
     validate_dataframe_size,
+    get_dataframe_size_gb,
+    sample_confidence_intervals,
+    format_keys,
     ComparisonStats,
     ComparisonDiffDetails
 )
@@ -41,6 +66,20 @@ from .utils import (
 class DataQualityComparator:
     """
     Main comparison class implementing data quality checks between databases.
+
+    `backend` selects implementation of the comparison core for sample and custom query comparisons:
+    'pandas' (default) or 'polars' (multi-threaded, needs polars and pyarrow). Results are the same,
+    count, incremental, streaming digest and column group comparisons always run on pandas
+
+    `workers` > 1 splits pandas comparisons of at least `parallel_min_rows` rows by primary key hash
+    into shards compared in separate processes (needs pyarrow), results are the same
+
+    `keyed_fetch_workers` is the number of concurrent batches when rows are fetched by primary keys
+
+    `query_hints` tune the extraction queries, every DBMS applies its own ones (see README):
+    Oracle 'parallel', 'full', 'arraysize', 'prefetchrows'; PostgreSQL/Greenplum 'work_mem',
+    'max_parallel_workers_per_gather', 'itersize'; ClickHouse 'max_threads', 'max_block_size', 'max_bytes_to_read'.
+    compare_sample and compare_counts take hints of the job overriding these ones
     """
 
     def __init__(
@@ -48,7 +87,14 @@ class DataQualityComparator:
         source_engine: Engine,
         target_engine: Engine,
         default_exclude_recent_hours: Optional[int] = 24,
-        timezone: str = ct.DEFAULT_TZ
+        timezone: str = ct.DEFAULT_TZ,
+        state_store: Optional[ComparisonStateStore] = None,
+        metrics: Optional[MetricsRecorder] = None,
+        backend: str = 'pandas',
+        workers: int = 1,
+        parallel_min_rows: int = ct.DEFAULT_PARALLEL_MIN_ROWS,
+        keyed_fetch_workers: int = ct.DEFAULT_KEYED_FETCH_WORKERS,
+        query_hints: Optional[Dict[str, Any]] = None
     ):
         self.source_engine = source_engine
         self.target_engine = target_engine
@@ -56,12 +102,31 @@ class DataQualityComparator:
         self.target_db_type = DBMSType.from_engine(target_engine)
         self.default_exclude_recent_hours = default_exclude_recent_hours
         self.timezone = timezone
+        self.state_store = state_store
+        self.metrics = metrics
+        # 'polars' runs prepare/clean/compare of sample and custom query comparisons on polars
+        self.backend = get_backend(backend)
+        self.backend_name = backend
+        self.workers = workers
+        self.parallel_min_rows = parallel_min_rows
+        self.keyed_fetch_workers = keyed_fetch_workers
+        self.query_hints = query_hints or {}
 
         self.adapters = {
             DBMSType.ORACLE: OracleAdapter(),
             DBMSType.POSTGRESQL: PostgresAdapter(),
             DBMSType.CLICKHOUSE: ClickHouseAdapter(),
+            DBMSType.SQLITE: SQLiteAdapter(),
+            DBMSType.DUCKDB: DuckDBAdapter(),
         }
+        self._profile = ComparisonProfile()
+        self._method = None
+        self._hot_path_profiler = None
+        self.last_profile = None
+        # set by AsyncDataQualityComparator for the comparison running in a worker thread
+        self._cancel_event = None
+        # effective hints of the current comparison per side
+        self._query_hints = {}
         self._reset_stats()
         app_logger.info('start')
 
@@ -78,11 +143,76 @@ class DataQualityComparator:
             'tables_failed' : set(),
             'tables_skipped': set(),
             'start_time': pd.Timestamp.now().strftime(ct.DATETIME_FORMAT),
-            'end_time': None
+            'end_time': None,
+            'profile': ComparisonProfile()
         }
 
-    def _update_stats(self, status: str, source_table:DataReference):
-        """Update comparison statistics"""
+    def _start_profile(self, method: str, profile: bool = False, profile_dir: Optional[str] = None, label: Optional[str] = None):
+        """Start collecting per phase profile of the next comparison, and cProfile when requested"""
+        self._profile = ComparisonProfile()
+        self._profile.cancel_event = self._cancel_event
+        self._method = method
+        self._hot_path_profiler = None
+        if profile or profile_dir:
+            self._hot_path_profiler = HotPathProfiler(f'{method}_{label}' if label else method, profile_dir)
+            self._hot_path_profiler.start()
+
+    def _set_query_hints(self, query_hints: Optional[Dict[str, Any]] = None):
+        """Hints of the comparator overridden by the ones of the job to the adapters of both sides"""
+        hints = {**self.query_hints, **(query_hints or {})}
+        self._query_hints = {}
+        for side, db_type in (('source', self.source_db_type), ('target', self.target_db_type)):
+            self._query_hints[side] = self._get_adapter(db_type).set_query_hints(hints)
+        ignored = set(hints) - set(self._query_hints['source']) - set(self._query_hints['target'])
+        if ignored:
+            app_logger.warning(f'query hints not supported by source and target DBMS: {", ".join(sorted(ignored))}')
+
+    def _compare_dataframes(self, source_df, target_df, key_columns: List[str], max_examples: int):
+        """Comparison core of the backend, large pandas pairs are compared in several processes"""
+        if (self.workers > 1 and self.backend_name == 'pandas'
+                and max(len(source_df), len(target_df)) >= self.parallel_min_rows):
+            return compare_dataframes_parallel(source_df, target_df, key_columns, max_examples, self.workers)
+        return self.backend.compare_dataframes(source_df, target_df, key_columns, max_examples)
+
+    def _get_sample_filters(self, db_type: DBMSType, key_columns: List[str],
+                            sample_rate: Optional[float], sample_seed: int) -> Optional[List[Tuple[str, Dict]]]:
+        """Key hash sampling predicate of the side, None without sampling"""
+        if sample_rate is None:
+            return None
+        return [self._get_adapter(db_type).build_key_sample_condition(key_columns, sample_rate, sample_seed)]
+
+    def _set_sample_stats(self, stats: ComparisonStats, sample_rate: Optional[float]):
+        """Mark statistics estimated from the key hash sample with confidence intervals"""
+        if sample_rate is None:
+            return
+        stats.sample_rate = sample_rate
+        stats.confidence_intervals = sample_confidence_intervals(stats)
+
+    def _stop_hot_path_profiler(self):
+        if self._hot_path_profiler is None:
+            return
+        hot_functions = self._hot_path_profiler.stop()
+        self._profile.dump_path = self._hot_path_profiler.dump_path
+        self._hot_path_profiler = None
+        if hot_functions:
+            app_logger.info(f'hot functions:\n{hot_functions}')
+        if self._profile.dump_path:
+            app_logger.info(f'cProfile dump: {self._profile.dump_path}')
+
+    def _update_stats(self, status: str, source_table:DataReference, stats: Optional[ComparisonStats] = None):
+        """Update comparison statistics and aggregate the profile of the finished comparison"""
+        self._stop_hot_path_profiler()
+        self.last_profile = self._profile
+        self.comparison_stats['profile'].aggregate(self._profile)
+        app_logger.info(f'profile:\n{self._profile.summary()}')
+        if stats:
+            stats.profile = self._profile
+        if self.metrics is not None:
+            self.metrics.observe_comparison(
+                self._method, status, self._profile,
+                {'source': self.source_db_type.name.lower(), 'target': self.target_db_type.name.lower()}
+            )
+
         self.comparison_stats[status] += 1
         self.comparison_stats['end_time'] = pd.Timestamp.now().strftime(ct.DATETIME_FORMAT)
         if source_table:
@@ -101,8 +231,43 @@ class DataQualityComparator:
         date_column: Optional[str] = None,
         date_range: Optional[Tuple[str, str]] = None,
         tolerance_percentage: float = 0.0,
-        max_examples: Optional[int] = ct.DEFAULT_MAX_EXAMPLES
+        max_examples: Optional[int] = ct.DEFAULT_MAX_EXAMPLES,
+        skip_unchanged: bool = False,
+        profile: bool = False,
+        profile_dir: Optional[str] = None,
+        drill_down: bool = False,
+        drill_down_min_rows: int = ct.DEFAULT_DRILL_DOWN_MIN_ROWS,
+        drill_down_buckets: int = ct.DEFAULT_DRILL_DOWN_BUCKETS,
+        drill_down_max_depth: int = ct.DEFAULT_DRILL_DOWN_MAX_DEPTH,
+        drill_down_key_columns: Optional[List[str]] = None,
+        drill_down_sample: bool = False,
+        drill_down_max_samples: int = ct.DEFAULT_DRILL_DOWN_MAX_SAMPLES,
+        query_hints: Optional[Dict[str, Any]] = None
     ) -> Tuple[str, Optional[ComparisonStats], Optional[ComparisonDiffDetails]]:
+        """
+        Compare daily row counts
+
+        Parameters:
+            skip_unchanged: `bool`
+                Reuse the previous result (status skipped) when catalog change fingerprints
+                of both objects are the same as on the last comparison, requires `state_store`
+            profile: `bool`
+                Capture cProfile of this comparison and log top hot functions
+            profile_dir: `Optional[str]`
+                Also dump the cProfile stats to this directory (implies `profile`)
+            drill_down: `bool`
+                Localize mismatched days: hourly counts, then counts per key hash bucket
+                until slices have at most `drill_down_min_rows` rows on both sides
+                or `drill_down_max_depth` bucket levels are reached (details.drill_down)
+            drill_down_buckets: `int`
+                Key hash buckets per level, slice of level N is key hash mod buckets^N
+            drill_down_key_columns: `Optional[List[str]]`
+                Keys of the buckets, primary key by default (hourly counts only without any)
+            drill_down_sample: `bool`
+                Compare up to `drill_down_max_samples` largest remaining slices by samples
+            query_hints: `Optional[Dict[str, Any]]`
+                Query hints of this comparison over the ones of the comparator
+        """
 
         self._validate_inputs(source_table, target_table)
 
@@ -110,14 +275,39 @@ class DataQualityComparator:
 
         try:
             self.comparison_stats['compared'] += 1
-
+            self._start_profile('counts', profile, profile_dir, source_table.full_name)
+            self._set_query_hints(query_hints)
+
+            change_state = None
+            if skip_unchanged:
+                change_state = self._get_change_state(
+                    'counts', source_table, target_table,
+                    [date_column, start_date, end_date, tolerance_percentage,
+                     drill_down, drill_down_min_rows, drill_down_buckets, drill_down_max_depth,
+                     drill_down_key_columns, drill_down_sample, drill_down_max_samples]
+                )
+                unchanged = self._get_unchanged_result(change_state, source_table, target_table)
+                if unchanged:
+                    status, report, stats = unchanged
+                    self._update_stats(status, source_table, stats)
+                    return status, report, stats, None
+
+            drill_down_options = None
+            if drill_down:
+                if not date_column:
+                    raise ValueError("drill_down requires date_column")
+                drill_down_options = dict(
+                    min_rows=drill_down_min_rows, buckets=drill_down_buckets, max_depth=drill_down_max_depth,
+                    key_columns=drill_down_key_columns, sample=drill_down_sample, max_samples=drill_down_max_samples
+                )
 
             status, report, stats, details = self._compare_counts(
                     source_table, target_table, date_column, start_date, end_date,
-                    tolerance_percentage, max_examples
+                    tolerance_percentage, max_examples, drill_down_options
             )
 
-            self._update_stats(status, source_table)
+            self._save_change_state(change_state, status, stats)
+            self._update_stats(status, source_table, stats)
             return status, report, stats, details
 
         except Exception as e:
@@ -126,6 +316,59 @@ class DataQualityComparator:
             self._update_stats(status, source_table)
             return status, None, None, None
 
+    def compare_profiles(
+        self,
+        source_table: DataReference,
+        target_table: DataReference,
+        date_column: str,
+        date_range: Optional[Tuple[str, str]] = None,
+        exclude_columns: Optional[List[str]] = None,
+        include_columns: Optional[List[str]] = None,
+        tolerance_percentage: float = 0.0,
+        max_examples: Optional[int] = ct.DEFAULT_MAX_EXAMPLES,
+        profile: bool = False,
+        profile_dir: Optional[str] = None
+    ) -> Tuple[str, Optional[str], None, Optional[ProfileComparisonDetails]]:
+        """
+        Compare daily column profiles computed by one GROUP BY query per side: non-null count,
+        min, max and sum of numbers, order-independent hash of canonical values of integers, dates and strings.
+        Content check between compare_counts and compare_sample, no rows are fetched.
+        Statistics are not available, details hold the mismatched days and columns
+
+        Parameters:
+            tolerance_percentage: `float`
+                Tolerance for the percentage of mismatched (day, column) profiles
+            profile: `bool`
+                Capture cProfile of this comparison and log top hot functions
+            profile_dir: `Optional[str]`
+                Also dump the cProfile stats to this directory (implies `profile`)
+        """
+
+        self._validate_inputs(source_table, target_table)
+
+        start_date, end_date = date_range or (None, None)
+        exclude_columns = exclude_columns or []
+        include_columns = include_columns or []
+
+        try:
+            self.comparison_stats['compared'] += 1
+            self._start_profile('profiles', profile, profile_dir, source_table.full_name)
+            self._set_query_hints()
+
+            status, report, details = self._compare_profiles(
+                source_table, target_table, date_column, start_date, end_date,
+                exclude_columns, include_columns, tolerance_percentage, max_examples
+            )
+
+            self._update_stats(status, source_table)
+            return status, report, None, details
+
+        except Exception as e:
+            app_logger.exception(f"Profile comparison failed: {str(e)}")
+            status = ct.COMPARISON_FAILED
+            self._update_stats(status, source_table)
+            return status, None, None, None
+
     def compare_sample(
         self,
         source_table: DataReference,
@@ -138,7 +381,22 @@ class DataQualityComparator:
         custom_primary_key: Optional[List[str]] = None,
         tolerance_percentage: float = 0.0,
         exclude_recent_hours: Optional[int] = None,
-        max_examples: Optional[int] = ct.DEFAULT_MAX_EXAMPLES
+        max_examples: Optional[int] = ct.DEFAULT_MAX_EXAMPLES,
+        skip_unchanged: bool = False,
+        incremental: bool = False,
+        profile: bool = False,
+        profile_dir: Optional[str] = None,
+        pushdown: bool = False,
+        db_link: Optional[str] = None,
+        sample_rate: Optional[float] = None,
+        sample_seed: int = 0,
+        prune_columns: bool = False,
+        prestats: bool = False,
+        parallel_ranges: int = 1,
+        query_hints: Optional[Dict[str, Any]] = None,
+        lob_digest: bool = False,
+        stream_digest: bool = False,
+        column_batch_size: Optional[int] = None
     ) -> Tuple[str, str, Optional[ComparisonStats], Optional[ComparisonDiffDetails]]:
         """
         Compare data from custom queries with specified key columns
@@ -158,8 +416,74 @@ class DataQualityComparator:
                 Tolerance percentage for discrepancies.
             max_examples 
                 Maximum number of discrepancy examples per column
+            skip_unchanged: `bool`
+                Reuse the previous result (status skipped) when catalog change fingerprints
+                of both objects are the same as on the last comparison, requires `state_store`.
+                Note: rows leaving the `exclude_recent_hours` window are not rechecked until a table changes
+            incremental: `bool`
+                Fetch only rows with `update_column` at or after the watermark of the previous run
+                and keep key->row digest state in `state_store`, statistics are computed over the whole state.
+                Requires `update_column` and `state_store`, deleted rows are not detected
+            profile: `bool`
+                Capture cProfile of this comparison and log top hot functions
+            profile_dir: `Optional[str]`
+                Also dump the cProfile stats to this directory (implies `profile`)
+            pushdown: `bool`
+                Compare on the server by one FULL OUTER JOIN query instead of fetching the data,
+                only counters and example rows are fetched. Both objects must be reachable from the source engine:
+                the same engine (database) or an Oracle database link `db_link` to the target.
+                Values are compared by the engine as stored (no type normalization), see README
+            db_link: `Optional[str]`
+                Oracle database link of the source database to the target one, for `pushdown`
+            sample_rate: `Optional[float]`
+                Compare only this share (0, 1] of primary keys selected in SQL by a hash of the key,
+                both sides select the same keys. Statistics get 95% confidence intervals of the percentages
+            sample_seed: `int`
+                Salt of the key hash, another seed selects another key subset
+            prune_columns: `bool`
+                Compute a checksum of every column on both sides first and fetch only the key
+                and columns with different checksums, the rest are listed in details.verified_columns
+            prestats: `bool`
+                Query per key statistics of both sides first (totals, distinct and duplicated keys, recently changed keys),
+                nothing is fetched when a side is empty and the recently changed keys of both sides are excluded
+                in the data queries (when they fit one IN-list). Statistics are in details.prestats
+            parallel_ranges: `int`
+                Split the data query of a table into about this number of physical ranges (Oracle ROWID ranges,
+                PostgreSQL ctid pages, Greenplum segments, ClickHouse partitions, SQLite/DuckDB rowid)
+                fetched concurrently on separate connections. Views and tables that can not be split are fetched as usual
+            query_hints: `Optional[Dict[str, Any]]`
+                Query hints of this comparison over the ones of the comparator
+            lob_digest: `bool`
+                Select md5 and length of large object columns (CLOB/BLOB, text/json/bytea, ...) of any side
+                instead of the values, the content is fetched by primary keys for the report examples only.
+                Digested columns are in details.digest_columns
+            stream_digest: `bool`
+                Fetch the data in chunks, canonicalize each chunk as usual and keep only the primary key
+                and 64-bit hashes of the value columns, the values of the report examples are fetched again
+                by primary keys. Compared on pandas whatever the backend
+            column_batch_size: `Optional[int]`
+                Fetch and compare the value columns of wide tables in groups of this size along with the primary key,
+                per column and row statistics are merged as of one comparison. Compared on pandas whatever the backend
         """
         self._validate_inputs(source_table, target_table)
+        if pushdown and incremental:
+            raise ValueError("pushdown and incremental comparisons can not be combined")
+        if sample_rate is not None and incremental:
+            raise ValueError("sample_rate and incremental comparisons can not be combined")
+        if prune_columns and (pushdown or incremental):
+            raise ValueError("prune_columns can not be combined with pushdown or incremental comparisons")
+        if prestats and (pushdown or incremental):
+            raise ValueError("prestats can not be combined with pushdown or incremental comparisons")
+        if parallel_ranges > 1 and (pushdown or incremental):
+            raise ValueError("parallel_ranges can not be combined with pushdown or incremental comparisons")
+        if lob_digest and (pushdown or incremental):
+            raise ValueError("lob_digest can not be combined with pushdown or incremental comparisons")
+        if stream_digest and (pushdown or incremental or parallel_ranges > 1):
+            raise ValueError("stream_digest can not be combined with pushdown, incremental or parallel_ranges")
+        if column_batch_size is not None and (pushdown or incremental or stream_digest):
+            raise ValueError("column_batch_size can not be combined with pushdown, incremental or stream_digest")
+        if column_batch_size is not None and column_batch_size < 1:
+            raise ValueError(f"column_batch_size must be positive, got {column_batch_size}")
 
         exclude_hours = exclude_recent_hours or self.default_exclude_recent_hours
 
@@ -170,14 +494,42 @@ class DataQualityComparator:
 
         try:
             self.comparison_stats['compared'] += 1
-
-            status, report, stats, details = self._compare_samples(
+            self._start_profile('sample', profile, profile_dir, source_table.full_name)
+            self._set_query_hints(query_hints)
+
+            change_state = None
+            if skip_unchanged:
+                change_state = self._get_change_state(
+                    'sample', source_table, target_table,
+                    [date_column, update_column, start_date, end_date, sorted(exclude_cols), sorted(include_cols),
+                     custom_keys, tolerance_percentage, exclude_hours, pushdown, db_link, sample_rate, sample_seed,
+                     prune_columns, prestats, lob_digest, stream_digest, column_batch_size]
+                )
+                unchanged = self._get_unchanged_result(change_state, source_table, target_table)
+                if unchanged:
+                    status, report, stats = unchanged
+                    self._update_stats(status, source_table, stats)
+                    return status, report, stats, None
+
+            if pushdown:
+                compare_method = functools.partial(self._compare_samples_pushdown, db_link=db_link,
+                                                   sample_rate=sample_rate, sample_seed=sample_seed)
+            elif incremental:
+                compare_method = self._compare_samples_incremental
+            else:
+                compare_method = functools.partial(self._compare_samples, sample_rate=sample_rate,
+                                                   sample_seed=sample_seed, prune_columns=prune_columns,
+                                                   prestats=prestats, parallel_ranges=parallel_ranges,
+                                                   lob_digest=lob_digest, stream_digest=stream_digest,
+                                                   column_batch_size=column_batch_size)
+            status, report, stats, details = compare_method(
                     source_table, target_table, date_column, update_column,
                     start_date, end_date, exclude_cols,include_cols, 
                     custom_keys, tolerance_percentage, exclude_hours, max_examples
             )
 
-            self._update_stats(status, source_table)
+            self._save_change_state(change_state, status, stats)
+            self._update_stats(status, source_table, stats)
             return status, report, stats, details
 
         except Exception as e:
@@ -186,13 +538,80 @@ class DataQualityComparator:
             self._update_stats(status, source_table)
             return status, None, None, None
 
+    def _compare_profiles(self, source_table: DataReference,
+                          target_table: DataReference,
+                          date_column: str,
+                          start_date: Optional[str],
+                          end_date: Optional[str],
+                          exclude_columns: List[str],
+                          include_columns: List[str],
+                          tolerance_percentage: float,
+                          max_examples: int) -> Tuple[str, Optional[str], Optional[ProfileComparisonDetails]]:
+
+        try:
+            with self._profile.phase('metadata'):
+                source_columns_meta = self._get_metadata_cols(source_table, self.source_engine)
+                target_columns_meta = self._get_metadata_cols(target_table, self.target_engine)
+                if include_columns:
+                    source_columns_meta = source_columns_meta[source_columns_meta['column_name'].isin(include_columns)]
+                    target_columns_meta = target_columns_meta[target_columns_meta['column_name'].isin(include_columns)]
+                if exclude_columns:
+                    source_columns_meta = source_columns_meta[~source_columns_meta['column_name'].isin(exclude_columns)]
+                    target_columns_meta = target_columns_meta[~target_columns_meta['column_name'].isin(exclude_columns)]
+                common_cols_df, source_only_cols, target_only_cols = self._analyze_columns_meta(
+                    source_columns_meta, target_columns_meta)
+            columns = common_cols_df['column_name'].tolist()
+            if not columns:
+                raise MetadataError(f"No one column to compare, need to check tables or reduce the exclude_columns list: {','.join(exclude_columns)}")
+
+            metrics, queries = {}, {}
+            for side, table, columns_meta, engine in (
+                    ('source', source_table, source_columns_meta, self.source_engine),
+                    ('target', target_table, target_columns_meta, self.target_engine)):
+                adapter = self._get_adapter(DBMSType.from_engine(engine))
+                columns_meta = columns_meta.set_index('column_name').loc[columns].reset_index()
+                queries[side] = adapter.build_profile_query(table, date_column, start_date, end_date, columns_meta)
+                with self._profile.phase('query', side):
+                    profile = self._execute_query(queries[side], engine, self.timezone)
+                metrics[side] = unpack_profile(profile, columns)
+                # min and max in the same text representation as compared samples
+                with self._profile.phase('convert_types', side):
+                    for metric in ('min', 'max'):
+                        metrics[side][metric] = adapter.convert_types(metrics[side][metric], columns_meta, self.timezone)
+
+            if metrics['source']['count'].empty and metrics['target']['count'].empty:
+                app_logger.warning('nothing to compare to you')
+                return ct.COMPARISON_SKIPPED, None, None
+
+            with self._profile.phase('compare_profiles'):
+                details = build_profile_result(metrics['source'], metrics['target'], columns)
+            details.skipped_source_columns = source_only_cols
+            details.skipped_target_columns = target_only_cols
+            status = ct.COMPARISON_FAILED if details.discrepancies_percentage > tolerance_percentage else ct.COMPARISON_SUCCESS
+
+            with self._profile.phase('report'):
+                report = generate_comparison_profile_report(source_table.full_name,
+                                                            target_table.full_name,
+                                                            details,
+                                                            self.timezone,
+                                                            max_examples,
+                                                            *queries['source'],
+                                                            *queries['target'], query_hints=self._query_hints)
+            return status, report, details
+
+        except Exception as e:
+            app_logger.error(f"Profile comparison failed: {str(e)}")
+            raise
+
     def _compare_counts(self, source_table: DataReference,
                         target_table: DataReference,
                         date_column: str,
                         start_date: Optional[str],
                         end_date: Optional[str],
                         tolerance_percentage:float,
-                        max_examples:int) -> Tuple[str, str, Optional[ComparisonStats], Optional[ComparisonDiffDetails]]:
+                        max_examples:int,
+                        drill_down_options: Optional[Dict[str, Any]] = None
+                        ) -> Tuple[str, str, Optional[ComparisonStats], Optional[ComparisonDiffDetails]]:
 
         try:
             source_adapter = self._get_adapter(self.source_db_type)
@@ -201,12 +620,14 @@ class DataQualityComparator:
             source_query, source_params = source_adapter.build_count_query(
                 source_table, date_column, start_date, end_date
             )
-            source_counts = self._execute_query((source_query, source_params), self.source_engine, self.timezone)
+            with self._profile.phase('query', 'source'):
+                source_counts = self._execute_query((source_query, source_params), self.source_engine, self.timezone)
 
             target_query, target_params = target_adapter.build_count_query(
                 target_table, date_column, start_date, end_date
             )
-            target_counts = self._execute_query((target_query, target_params), self.target_engine, self.timezone)
+            with self._profile.phase('query', 'target'):
+                target_counts = self._execute_query((target_query, target_params), self.target_engine, self.timezone)
 
             source_counts_filled, target_counts_filled = cross_fill_missing_dates(source_counts, target_counts)
             source_counts_filled['dt'] = pd.to_datetime(source_counts_filled['dt'], format='%Y-%m-%d')
@@ -227,28 +648,37 @@ class DataQualityComparator:
                 result_equal_in_counters = merged[['cnt_x', 'cnt_y']].min(axis=1).sum()
 
                 discrepancies_counters_percentage = 100*result_diff_in_counters/(result_diff_in_counters+result_equal_in_counters)
-                stats, details = compare_dataframes(source_df=source_counts_filled,
-                                                    target_df=target_counts_filled,
-                                                    key_columns=['dt'],
-                                                    max_examples=max_examples)
+                with self._profile.phase('compare_dataframes'):
+                    stats, details = compare_dataframes(source_df=source_counts_filled,
+                                                        target_df=target_counts_filled,
+                                                        key_columns=['dt'],
+                                                        max_examples=max_examples)
 
                 status = ct.COMPARISON_FAILED if discrepancies_counters_percentage > tolerance_percentage else ct.COMPARISON_SUCCESS
 
-                report = generate_comparison_count_report(source_table.full_name,
-                                                          target_table.full_name,
-                                                          stats,
-                                                          details,
-                                                          total_count_source,
-                                                          total_count_taget,
-                                                          discrepancies_counters_percentage,
-                                                          result_diff_in_counters,
-                                                          result_equal_in_counters,
-                                                          self.timezone,
-                                                          source_query,
-                                                          source_params,
-                                                          target_query,
-                                                          target_params
-                                                        )
+                if drill_down_options and result_diff_in_counters:
+                    details.drill_down = self._drill_down_counts(
+                        source_table, target_table, date_column, merged, max_examples, **drill_down_options
+                    )
+
+                with self._profile.phase('report'):
+                    report = generate_comparison_count_report(source_table.full_name,
+                                                              target_table.full_name,
+                                                              stats,
+                                                              details,
+                                                              total_count_source,
+                                                              total_count_taget,
+                                                              discrepancies_counters_percentage,
+                                                              result_diff_in_counters,
+                                                              result_equal_in_counters,
+                                                              self.timezone,
+                                                              source_query,
+                                                              source_params,
+                                                              target_query,
+                                                              target_params,
+                                                              details.drill_down,
+                                                              query_hints=self._query_hints
+                                                            )
 
                 return status, report, stats, details
 
@@ -256,6 +686,129 @@ class DataQualityComparator:
             app_logger.error(f"Count comparison failed: {str(e)}")
             raise
 
+    def _query_counts(self, build_query: Callable[[BaseDatabaseAdapter, DataReference, str], Tuple[str, Dict]],
+                      source_table: DataReference, target_table: DataReference, key: str) -> pd.DataFrame:
+        """Counts (cnt) of both sides by `key` built by `build_query(adapter, table, side)`, merged into cnt_x/cnt_y"""
+        counts = []
+        for side, table, db_type, engine in (('source', source_table, self.source_db_type, self.source_engine),
+                                             ('target', target_table, self.target_db_type, self.target_engine)):
+            query, params = build_query(self._get_adapter(db_type), table, side)
+            with self._profile.phase('query', side):
+                df = self._execute_query((query, params), engine, self.timezone)
+            counts.append(df.rename(columns=str.lower)[[key, 'cnt']])
+        source_counts, target_counts = counts
+        if key == 'dt':
+            # hours are text on some engines and datetimes on others
+            for df in (source_counts, target_counts):
+                df['dt'] = pd.to_datetime(df['dt']).dt.strftime(ct.DATETIME_FORMAT)
+        else:
+            for df in (source_counts, target_counts):
+                df[key] = df[key].astype('int64')
+        source_counts, target_counts = cross_fill_missing_dates(source_counts, target_counts, date_column=key)
+        return source_counts.merge(target_counts, on=key).sort_values(key, ignore_index=True)
+
+    def _get_drill_down_key_columns(self, source_table: DataReference, target_table: DataReference) -> List[str]:
+        for table, engine in ((source_table, self.source_engine), (target_table, self.target_engine)):
+            if self._get_object_type(table, engine) == ObjectType.TABLE:
+                key_columns = self._get_metadata_pk(table, engine)['pk_column_name'].tolist()
+                if key_columns:
+                    return key_columns
+        return []
+
+    def _drill_down_counts(self, source_table: DataReference, target_table: DataReference, date_column: str,
+                           merged: pd.DataFrame, max_examples: int, min_rows: int, buckets: int, max_depth: int,
+                           key_columns: Optional[List[str]], sample: bool, max_samples: int) -> pd.DataFrame:
+        """
+        Mismatched slices of mismatched days: hours, then key hash buckets of the hours
+        while a slice has more than `min_rows` rows on any side
+        """
+        key_columns = key_columns or self._get_drill_down_key_columns(source_table, target_table)
+        if not key_columns:
+            app_logger.warning('primary key not found, count drill-down stops at hours')
+        source_adapter = self._get_adapter(self.source_db_type)
+        target_adapter = self._get_adapter(self.target_db_type)
+
+        slices = []
+        for day in merged.loc[merged['cnt_x'] != merged['cnt_y'], 'dt']:
+            day = day.strftime(ct.DATE_FORMAT)
+            hours = self._query_counts(
+                lambda adapter, table, side: adapter.build_count_query(table, date_column, day, day, granularity='hour'),
+                source_table, target_table, 'dt'
+            )
+            for hour, source_cnt, target_cnt in hours.loc[hours['cnt_x'] != hours['cnt_y']].itertuples(index=False):
+                hour_end = (pd.Timestamp(hour) + pd.Timedelta(hours=1)).strftime(ct.DATETIME_FORMAT)
+                filters = {
+                    'source': [source_adapter._build_period_condition(date_column, hour, hour_end)],
+                    'target': [target_adapter._build_period_condition(date_column, hour, hour_end)],
+                }
+                self._drill_down_key_buckets(source_table, target_table, key_columns, filters, hour,
+                                             source_cnt, target_cnt, min_rows, buckets, max_depth, 0, 0, slices)
+
+        drill_down = pd.DataFrame(slices, columns=['dt', 'key_buckets', 'bucket', 'source_cnt', 'target_cnt'])
+        app_logger.info(f'count drill-down: {len(drill_down)} mismatched slices')
+        if sample and not drill_down.empty:
+            drill_down = self._compare_drill_down_samples(source_table, target_table, date_column, key_columns,
+                                                          drill_down, max_examples, max_samples)
+        return drill_down
+
+    def _drill_down_key_buckets(self, source_table: DataReference, target_table: DataReference,
+                                key_columns: List[str], filters: Dict[str, List[Tuple[str, Dict]]], hour: str,
+                                source_cnt: int, target_cnt: int, min_rows: int, buckets: int, max_depth: int,
+                                depth: int, bucket: int, slices: List[tuple]):
+        """Slice of depth N is key hash mod buckets^N = bucket, split into buckets of depth N+1 with the same remainder"""
+        if max(source_cnt, target_cnt) <= min_rows or depth >= max_depth or not key_columns:
+            slices.append((hour, buckets ** depth, bucket, int(source_cnt), int(target_cnt)))
+            return
+        parent_filters = {}
+        for side, db_type in (('source', self.source_db_type), ('target', self.target_db_type)):
+            parent_filters[side] = filters[side] + (
+                [self._get_adapter(db_type).build_key_bucket_condition(key_columns, buckets ** depth, bucket)]
+                if depth else []
+            )
+        counts = self._query_counts(
+            lambda adapter, table, side: adapter.build_key_bucket_count_query(
+                table, key_columns, buckets ** (depth + 1), parent_filters[side]),
+            source_table, target_table, 'bucket'
+        )
+        for child, child_source_cnt, child_target_cnt in counts.loc[counts['cnt_x'] != counts['cnt_y']].itertuples(index=False):
+            self._drill_down_key_buckets(source_table, target_table, key_columns, filters, hour,
+                                         child_source_cnt, child_target_cnt, min_rows, buckets, max_depth,
+                                         depth + 1, child, slices)
+
+    def _compare_drill_down_samples(self, source_table: DataReference, target_table: DataReference,
+                                    date_column: str, key_columns: List[str], drill_down: pd.DataFrame,
+                                    max_examples: int, max_samples: int) -> pd.DataFrame:
+        """Sample comparison of the largest drill-down slices, status and only/mismatched rows per slice"""
+        drill_down = drill_down.assign(status=None, only_source_rows=None, only_target_rows=None, mismatched_rows=None)
+        largest = (drill_down['source_cnt'] - drill_down['target_cnt']).abs().sort_values(ascending=False, kind='stable')
+        for i in largest.index[:max_samples]:
+            hour, key_buckets, bucket = drill_down.loc[i, ['dt', 'key_buckets', 'bucket']]
+            hour_end = (pd.Timestamp(hour) + pd.Timedelta(hours=1)).strftime(ct.DATETIME_FORMAT)
+            filters = []
+            for db_type in (self.source_db_type, self.target_db_type):
+                adapter = self._get_adapter(db_type)
+                side_filters = [adapter._build_period_condition(date_column, hour, hour_end)]
+                if key_buckets > 1:
+                    side_filters.append(adapter.build_key_bucket_condition(key_columns, key_buckets, bucket))
+                filters.append(side_filters)
+            try:
+                status, _, stats, _ = self._compare_samples(
+                    source_table, target_table, date_column, None, None, None, [], [],
+                    key_columns or None, 0.0, None, max_examples,
+                    source_filters=filters[0], target_filters=filters[1]
+                )
+            except DQCompareException as e:
+                # one side of the slice is empty, all rows of the other side are missing
+                app_logger.info(f'drill-down slice {hour} {bucket}/{key_buckets}: {e}')
+                drill_down.loc[i, ['status', 'only_source_rows', 'only_target_rows', 'mismatched_rows']] = \
+                    [ct.COMPARISON_FAILED, drill_down.loc[i, 'source_cnt'], drill_down.loc[i, 'target_cnt'], 0]
+                continue
+            drill_down.loc[i, 'status'] = status
+            if stats:
+                drill_down.loc[i, ['only_source_rows', 'only_target_rows', 'mismatched_rows']] = \
+                    [stats.only_source_rows, stats.only_target_rows, stats.common_pk_rows - stats.total_matched_rows]
+        return drill_down
+
     def _compare_samples(
         self,
         source_table: DataReference,
@@ -269,141 +822,770 @@ class DataQualityComparator:
         custom_key_columns: Optional[List[str]],
         tolerance_percentage:float,
         exclude_recent_hours: Optional[int],
-        max_examples:Optional[int]
+        max_examples:Optional[int],
+        sample_rate: Optional[float] = None,
+        sample_seed: int = 0,
+        source_filters: Optional[List[Tuple[str, Dict]]] = None,
+        target_filters: Optional[List[Tuple[str, Dict]]] = None,
+        prune_columns: bool = False,
+        prestats: bool = False,
+        parallel_ranges: int = 1,
+        lob_digest: bool = False,
+        stream_digest: bool = False,
+        column_batch_size: Optional[int] = None
     ) -> Tuple[str, str, Optional[ComparisonStats], Optional[ComparisonDiffDetails]]:
 
         try:
-            source_object_type = self._get_object_type(source_table, self.source_engine)
-            target_object_type = self._get_object_type(target_table, self.target_engine)
-            app_logger.info(f'object type source: {source_object_type} vs target {target_object_type}')
-
-            source_columns_meta = self._get_metadata_cols(source_table, self.source_engine)
-            app_logger.info('source_columns meta:\n')
-            app_logger.info(source_columns_meta.to_string(index=False))
-
-            target_columns_meta = self._get_metadata_cols(target_table, self.target_engine)
-            app_logger.info('target_columns meta:\n')
-            app_logger.info(target_columns_meta.to_string(index=False))
-
-            intersect = list(set(include_columns)&set(exclude_columns))
-            if intersect:
-                app_logger.warning(f'Intersection columns between Include and exclude: {",".join(intersect)}')
-            
-            key_columns = None
-
-            if custom_key_columns:
-                key_columns = custom_key_columns
-                source_cols = source_columns_meta['column_name'].tolist()
-                target_cols = target_columns_meta['column_name'].tolist()
-
-                missing_in_source = [col for col in custom_key_columns if col not in source_cols]
-                missing_in_target = [col for col in custom_key_columns if col not in target_cols]
-
-                if missing_in_source:
-                    raise MetadataError(f"Custom key columns missing in source: {missing_in_source}")
-                if missing_in_target:
-                    raise MetadataError(f"Custom key columns missing in target: {missing_in_target}")
-            else:
-                source_pk = self._get_metadata_pk(source_table, self.source_engine) \
-                                         if source_object_type == ObjectType.TABLE else pd.DataFrame({'pk_column_name': []})
-                target_pk = self._get_metadata_pk(target_table, self.target_engine) \
-                                         if target_object_type == ObjectType.TABLE else pd.DataFrame({'pk_column_name': []})
-
-                if source_pk['pk_column_name'].tolist() != target_pk['pk_column_name'].tolist():
-                    app_logger.warning(f"Primary keys differ: source={source_pk['pk_column_name'].tolist()}, target={target_pk['pk_column_name'].tolist()}")
-                key_columns = source_pk['pk_column_name'].tolist() or target_pk['pk_column_name'].tolist()
-                if not key_columns:
-                    raise MetadataError(f"Primary key not found in the source neither in the target and not provided") 
-
-            if include_columns:
-            
-                if not set(include_columns) & set(key_columns):
-                    app_logger.warning(f'The primary key was not included in the column list.\
-                                       The key column was included in the resulting query automatically. PK:{key_columns}') 
-
-                include_columns = list(set(include_columns + key_columns))
-
-                source_columns_meta = source_columns_meta[
-                    source_columns_meta['column_name'].isin(include_columns)
-                ]
-                target_columns_meta = target_columns_meta[
-                    target_columns_meta['column_name'].isin(include_columns)
-                ]
-            
-            if exclude_columns:
-
-                if set(exclude_columns) & set(key_columns):
-                    app_logger.warning(f'The primary key has been excluded from the column list.\
-                                       However, the key column must be present in the resulting query.s PK:{key_columns}') 
-
-                exclude_columns = list(set(exclude_columns) - set(key_columns))
-
-                source_columns_meta = source_columns_meta[
-                    ~source_columns_meta['column_name'].isin(exclude_columns)
-                ]
-                target_columns_meta = target_columns_meta[
-                    ~target_columns_meta['column_name'].isin(exclude_columns)
-                ]
-
-            common_cols_df, source_only_cols, target_only_cols = self._analyze_columns_meta(source_columns_meta, target_columns_meta)
-            common_cols = common_cols_df['column_name'].tolist()
-
-            if not common_cols:
-                raise MetadataError(f"No one column to compare, need to check tables or reduce the exclude_columns list: {','.join(exclude_columns)}")
-            
-            source_data, source_query, source_params = self._get_table_data(
-                self.source_engine, source_table, source_columns_meta, common_cols,
-                date_column, update_column, start_date, end_date, exclude_recent_hours
+            key_columns, source_columns_meta, target_columns_meta, \
+            common_cols, source_only_cols, target_only_cols = self._resolve_columns(
+                source_table, target_table, exclude_columns, include_columns, custom_key_columns
             )
+            source_filters = (self._get_sample_filters(self.source_db_type, key_columns, sample_rate, sample_seed) or []) \
+                + (source_filters or [])
+            target_filters = (self._get_sample_filters(self.target_db_type, key_columns, sample_rate, sample_seed) or []) \
+                + (target_filters or [])
+
+            verified_cols = []
+            if prune_columns:
+                common_cols, verified_cols = self._prune_matching_columns(
+                    source_table, target_table, source_columns_meta, target_columns_meta, key_columns, common_cols,
+                    date_column, start_date, end_date, source_filters, target_filters
+                )
+
+            prestats_df = None
+            if prestats:
+                prestats_df, recent_keys = self._get_prestats(
+                    source_table, target_table, key_columns, date_column, update_column, start_date, end_date,
+                    exclude_recent_hours, source_filters, target_filters, max_examples
+                )
+                if (prestats_df['total_rows'] == 0).all():
+                    return ct.COMPARISON_SKIPPED, None, None, None
+                elif (prestats_df['total_rows'] == 0).any():
+                    raise DQCompareException(f"Nothing to compare, rows in source: {prestats_df['total_rows'].iloc[0]}, "
+                                             f"in target: {prestats_df['total_rows'].iloc[1]}")
+                if update_column and exclude_recent_hours and self._recent_keys_fit_in_sql(recent_keys, key_columns):
+                    # recently changed rows are never fetched, no flag to clean them after the fetch
+                    if recent_keys:
+                        source_filters = source_filters + [self._get_adapter(self.source_db_type)
+                                                           .build_key_exclusion_condition(key_columns, recent_keys)]
+                        target_filters = target_filters + [self._get_adapter(self.target_db_type)
+                                                           .build_key_exclusion_condition(key_columns, recent_keys)]
+                    update_column, exclude_recent_hours = None, None
+
+            digest_cols = []
+            if lob_digest:
+                digest_cols = self._get_lob_columns(source_columns_meta, target_columns_meta, key_columns, common_cols)
+
+            value_cols = [col for col in common_cols if col not in key_columns]
+            notes = None
+            if column_batch_size and len(value_cols) > column_batch_size:
+                result = self._compare_column_groups(
+                    source_table, target_table, source_columns_meta, target_columns_meta, key_columns, value_cols,
+                    date_column, update_column, start_date, end_date, exclude_recent_hours,
+                    source_filters, target_filters, max_examples, column_batch_size, parallel_ranges, digest_cols
+                )
+                if result is None:
+                    return ct.COMPARISON_SKIPPED, None, None, None
+                stats, details, source_query, source_params, target_query, target_params = result
+                notes = [f"Columns compared in {-(-len(value_cols) // column_batch_size)} groups "
+                         f"of {column_batch_size}, queries of the first group"]
+            else:
+                source_data, source_query, source_params = self._get_table_data(
+                    self.source_engine, source_table, source_columns_meta, common_cols,
+                    date_column, update_column, start_date, end_date, exclude_recent_hours,
+                    source_filters,
+                    side='source',
+                    ranges=parallel_ranges,
+                    digest_columns=digest_cols,
+                    stream_key_columns=key_columns if stream_digest else None
+                )
+
+                target_data, target_query, target_params = self._get_table_data(
+                    self.target_engine, target_table, target_columns_meta, common_cols,
+                    date_column, update_column, start_date, end_date, exclude_recent_hours,
+                    target_filters,
+                    side='target',
+                    ranges=parallel_ranges,
+                    digest_columns=digest_cols,
+                    stream_key_columns=key_columns if stream_digest else None
+                )
+                status = None
+                #special case
+                if target_data.empty and source_data.empty:
+                    status = ct.COMPARISON_SKIPPED
+                    return status, None, None, None
+                elif source_data.empty or target_data.empty:
+                    raise DQCompareException(f"Nothing to compare, rows returned from source: {len(source_data)}, from target: {len(target_data)}")
+
+
+                if stream_digest:
+                    # chunks are prepared and hashed while streaming
+                    if update_column and exclude_recent_hours:
+                        with self._profile.phase('clean_recently_changed'):
+                            source_data, target_data = clean_recently_changed_data(source_data, target_data, key_columns)
+                    with self._profile.phase('compare_dataframes'):
+                        stats, details = compare_dataframes(source_data, target_data, key_columns, max_examples)
+                else:
+                    with self._profile.phase('prepare_dataframe', 'source') as phase:
+                        source_data = self.backend.prepare_dataframe(source_data)
+                        phase.rows += len(source_data)
+                    with self._profile.phase('prepare_dataframe', 'target') as phase:
+                        target_data = self.backend.prepare_dataframe(target_data)
+                        phase.rows += len(target_data)
+                    if update_column and exclude_recent_hours:
+                        with self._profile.phase('clean_recently_changed'):
+                            source_data, target_data = self.backend.clean_recently_changed_data(source_data, target_data, key_columns)
+
+                    with self._profile.phase('compare_dataframes'):
+                        stats, details = self._compare_dataframes(
+                            source_data, target_data,
+                            key_columns, max_examples
+                        )
 
-            target_data, target_query, target_params = self._get_table_data(
-                self.target_engine, target_table, target_columns_meta, common_cols,
-                date_column, update_column, start_date, end_date, exclude_recent_hours
-            )
-            status = None
-            #special case
-            if target_data.empty and source_data.empty:
+            if stats:
+                details.skipped_source_columns = source_only_cols
+                details.skipped_target_columns = target_only_cols
+                details.verified_columns = verified_cols
+                details.prestats = prestats_df
+                details.digest_columns = digest_cols
+                fetched_cols = value_cols if stream_digest else digest_cols
+                if fetched_cols:
+                    self._fetch_example_values(details, source_table, target_table, source_columns_meta,
+                                               target_columns_meta, key_columns, fetched_cols)
+                self._set_sample_stats(stats, sample_rate)
+
+                with self._profile.phase('report'):
+                    report = generate_comparison_sample_report(source_table.full_name,
+                                                                target_table.full_name,
+                                                                stats,
+                                                                details,
+                                                                self.timezone,
+                                                                source_query,
+                                                                source_params,
+                                                                target_query,
+                                                                target_params,
+                                                                notes,
+                                                                query_hints=self._query_hints
+                                                                )
+                status = ct.COMPARISON_FAILED if stats.final_diff_score > tolerance_percentage else ct.COMPARISON_SUCCESS
+                return status, report, stats, details
+            else:
                 status = ct.COMPARISON_SKIPPED
                 return status, None, None, None
-            elif source_data.empty or target_data.empty:
-                raise DQCompareException(f"Nothing to compare, rows returned from source: {len(source_data)}, from target: {len(target_data)}")
 
+        except Exception as e:
+            app_logger.error(f"Sample comparison failed: {str(e)}")
+            raise
 
+    def _get_lob_columns(
+        self,
+        source_columns_meta: pd.DataFrame,
+        target_columns_meta: pd.DataFrame,
+        key_columns: List[str],
+        common_cols: List[str]
+    ) -> List[str]:
+        """Compared value columns of a large object type on any side, selected as digests by both"""
+        lob_cols = set()
+        for db_type, columns_meta in ((self.source_db_type, source_columns_meta),
+                                      (self.target_db_type, target_columns_meta)):
+            adapter = self._get_adapter(db_type)
+            lob_cols.update(columns_meta.loc[columns_meta['data_type'].map(adapter.is_lob_type), 'column_name'])
+        digest_cols = [col for col in common_cols if col in lob_cols and col not in key_columns]
+        app_logger.info(f'large object columns compared by digests: {", ".join(digest_cols)}')
+        return digest_cols
+
+    def _fetch_example_values(
+        self,
+        details: ComparisonDiffDetails,
+        source_table: DataReference,
+        target_table: DataReference,
+        source_columns_meta: pd.DataFrame,
+        target_columns_meta: pd.DataFrame,
+        key_columns: List[str],
+        columns: List[str]
+    ) -> None:
+        """Replace digests or hashes of `columns` in the report examples by the values fetched by primary keys"""
+        examples = details.discrepancies_per_col_examples
+        pairs = details.discrepant_data_examples
+        if not examples.empty:
+            examples[['source_value', 'target_value']] = examples[['source_value', 'target_value']].astype(object)
+        column_examples = examples.loc[examples['column_name'].isin(columns)] if not examples.empty else examples
+        keys = {pk if isinstance(pk, tuple) else (pk,) for pk in column_examples.get('primary_key', [])}
+        if not pairs.empty:
+            keys.update(pairs[key_columns].itertuples(index=False, name=None))
+        if not keys:
+            return
+
+        content = self._fetch_prepared_rows(source_table, target_table, source_columns_meta, target_columns_meta,
+                                            key_columns, columns, sorted(keys))
+        for i, row in column_examples.iterrows():
+            key = row['primary_key'] if isinstance(row['primary_key'], tuple) else (row['primary_key'],)
+            for side, value_column in (('source', 'source_value'), ('target', 'target_value')):
+                examples.at[i, value_column] = content[side].get(key, {}).get(row['column_name'], row[value_column])
+        if not pairs.empty:
+            pair_columns = [col for col in columns if col in pairs.columns]
+            pairs[pair_columns] = pairs[pair_columns].astype(object)
+            for i, row in pairs.iterrows():
+                values = content['source' if row['xflg'] == 'src' else 'target'].get(tuple(row[key_columns]), {})
+                for col in pair_columns:
+                    pairs.at[i, col] = values.get(col, row[col])
+
+    def _fetch_prepared_rows(
+        self,
+        source_table: DataReference,
+        target_table: DataReference,
+        source_columns_meta: pd.DataFrame,
+        target_columns_meta: pd.DataFrame,
+        key_columns: List[str],
+        columns: List[str],
+        keys: List[tuple]
+    ) -> Dict[str, Dict[tuple, Dict[str, str]]]:
+        """Prepared values of `columns` by side and prepared primary key, fetched by the keys"""
+        content = {}
+        for side, table, columns_meta, engine in (
+                ('source', source_table, source_columns_meta, self.source_engine),
+                ('target', target_table, target_columns_meta, self.target_engine)):
+            df = self._get_rows_by_keys(engine, table, columns_meta, key_columns + columns, key_columns, keys, side=side)
+            df = prepare_dataframe(df.rename(columns=str.lower))
+            content[side] = {row[:len(key_columns)]: dict(zip(columns, row[len(key_columns):]))
+                             for row in df[key_columns + columns].itertuples(index=False, name=None)}
+        return content
+
+    def _compare_column_groups(
+        self,
+        source_table: DataReference,
+        target_table: DataReference,
+        source_columns_meta: pd.DataFrame,
+        target_columns_meta: pd.DataFrame,
+        key_columns: List[str],
+        value_columns: List[str],
+        date_column: Optional[str],
+        update_column: Optional[str],
+        start_date: Optional[str],
+        end_date: Optional[str],
+        exclude_recent_hours: Optional[int],
+        source_filters: List[Tuple[str, Dict]],
+        target_filters: List[Tuple[str, Dict]],
+        max_examples: int,
+        column_batch_size: int,
+        parallel_ranges: int = 1,
+        digest_columns: Optional[List[str]] = None
+    ) -> Optional[Tuple[ComparisonStats, ComparisonDiffDetails, str, Dict, str, Dict]]:
+        """
+        Fetch and compare the value columns in groups along with the primary key, only a 64-bit digest
+        of the groups compared so far is kept per key and side to count rows with a mismatch in any group.
+        Returns merged statistics, details and the queries of the first group, None when both sides are empty
+        """
+        groups = [value_columns[i:i + column_batch_size] for i in range(0, len(value_columns), column_batch_size)]
+        app_logger.info(f'comparing {len(value_columns)} columns in {len(groups)} groups')
+        group_details, digests, first = [], {}, None
+        for group in groups:
+            data = {}
+            for side, table, columns_meta, engine, filters in (
+                    ('source', source_table, source_columns_meta, self.source_engine, source_filters),
+                    ('target', target_table, target_columns_meta, self.target_engine, target_filters)):
+                data[side] = self._get_table_data(
+                    engine, table, columns_meta, key_columns + group, date_column, update_column, start_date, end_date,
+                    exclude_recent_hours, filters, side=side, ranges=parallel_ranges,
+                    digest_columns=[col for col in digest_columns or [] if col in group]
+                )
+            (source_data, source_query, source_params), (target_data, target_query, target_params) = \
+                data['source'], data['target']
+            if first is None:
+                if target_data.empty and source_data.empty:
+                    return None
+                elif source_data.empty or target_data.empty:
+                    raise DQCompareException(f"Nothing to compare, rows returned from source: {len(source_data)}, "
+                                             f"from target: {len(target_data)}")
+
+            with self._profile.phase('prepare_dataframe', 'source') as phase:
+                source_data = prepare_dataframe(source_data)
+                phase.rows += len(source_data)
+            with self._profile.phase('prepare_dataframe', 'target') as phase:
+                target_data = prepare_dataframe(target_data)
+                phase.rows += len(target_data)
+            if update_column and exclude_recent_hours:
+                with self._profile.phase('clean_recently_changed'):
+                    source_data, target_data = clean_recently_changed_data(source_data, target_data, key_columns)
+
+            with self._profile.phase('compare_dataframes'):
+                stats, details = compare_dataframes(source_data, target_data, key_columns, max_examples)
+                if stats is None:
+                    return None
+                group_details.append(details)
+                if first is None:
+                    first = stats, details, source_query, source_params, target_query, target_params
+                for side, df in (('source', source_data), ('target', target_data)):
+                    digest = digest_rows(df.drop_duplicates(subset=key_columns, keep='first'), key_columns, group) \
+                        .set_index(key_columns)['xrow_digest']
+                    previous = digests.get(side)
+                    digests[side] = digest if previous is None else \
+                        previous * np.uint64(1099511628211) ^ digest.reindex(previous.index, fill_value=0)
+
+        with self._profile.phase('compare_dataframes'):
+            common = digests['source'].index.intersection(digests['target'].index)
+            mismatched = common[digests['source'].reindex(common).to_numpy()
+                                != digests['target'].reindex(common).to_numpy()]
+            example_keys = sorted((key if isinstance(key, tuple) else (key,) for key in mismatched),
+                                  reverse=True)[:max_examples]
+
+        rows = []
+        if example_keys:
+            content = self._fetch_prepared_rows(source_table, target_table, source_columns_meta, target_columns_meta,
+                                                key_columns, value_columns, example_keys)
+            for key in example_keys:
+                for side, flag in (('source', 'src'), ('target', 'trg')):
+                    values = content[side].get(key, {})
+                    rows.append({**dict(zip(key_columns, key)), **{col: values.get(col) for col in value_columns},
+                                 'xflg': flag})
+
+        stats, details, source_query, source_params, target_query, target_params = first
+        stats, details = merge_column_group_results(stats, details, group_details, len(mismatched),
+                                                    pd.DataFrame(rows), value_columns, max_examples)
+        return stats, details, source_query, source_params, target_query, target_params
+
+    def _prune_matching_columns(
+        self,
+        source_table: DataReference,
+        target_table: DataReference,
+        source_columns_meta: pd.DataFrame,
+        target_columns_meta: pd.DataFrame,
+        key_columns: List[str],
+        common_cols: List[str],
+        date_column: Optional[str],
+        start_date: Optional[str],
+        end_date: Optional[str],
+        source_filters: List[Tuple[str, Dict]],
+        target_filters: List[Tuple[str, Dict]]
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Per column checksums of both sides over the same rows as the data queries,
+        returns the columns to fetch (keys and columns with different or no checksums) and the verified ones
+        """
+        value_cols = [col for col in common_cols if col not in key_columns]
+        checksums = []
+        for side, table, columns_meta, engine, filters in (
+                ('source', source_table, source_columns_meta, self.source_engine, source_filters),
+                ('target', target_table, target_columns_meta, self.target_engine, target_filters)):
+            adapter = self._get_adapter(DBMSType.from_engine(engine))
+            data_query = adapter.build_data_query_common(
+                table, key_columns + value_cols, date_column, None, start_date, end_date, None, filters
+            )
+            columns_meta = columns_meta.set_index('column_name').loc[value_cols].reset_index()
+            query = adapter.build_column_checksum_query(data_query, key_columns, columns_meta)
+            with self._profile.phase('checksum', side):
+                checksums.append(self._execute_query(query, engine, self.timezone).rename(columns=str.lower).iloc[0])
+
+        source_checksums, target_checksums = checksums
+        verified_cols = []
+        for i, col in enumerate(value_cols):
+            source_value, target_value = source_checksums.get(f'xchk_{i}'), target_checksums.get(f'xchk_{i}')
+            if not (pd.isna(source_value) or pd.isna(target_value)) and float(source_value) == float(target_value):
+                verified_cols.append(col)
+        app_logger.info(f'columns with equal checksums (not fetched): {", ".join(verified_cols)}')
+        return [col for col in common_cols if col not in verified_cols], verified_cols
+
+    def _get_prestats(
+        self,
+        source_table: DataReference,
+        target_table: DataReference,
+        key_columns: List[str],
+        date_column: Optional[str],
+        update_column: Optional[str],
+        start_date: Optional[str],
+        end_date: Optional[str],
+        exclude_recent_hours: Optional[int],
+        source_filters: List[Tuple[str, Dict]],
+        target_filters: List[Tuple[str, Dict]],
+        max_examples: int
+    ) -> Tuple[pd.DataFrame, List[tuple]]:
+        """
+        Per key statistics of both sides over the rows of the data queries,
+        returns the statistics (one row per side) and the recently changed keys of any side
+        """
+        exclude_recent = bool(update_column and exclude_recent_hours)
+        rows, recent_keys = [], {}
+        for side, table, engine, filters in (('source', source_table, self.source_engine, source_filters),
+                                             ('target', target_table, self.target_engine, target_filters)):
+            adapter = self._get_adapter(DBMSType.from_engine(engine))
+            data_query = adapter.build_data_query_common(
+                table, key_columns, date_column, update_column, start_date, end_date, exclude_recent_hours, filters
+            )
+            query = adapter.build_prestats_query(data_query, key_columns, exclude_recent, max_examples)
+            with self._profile.phase('prestats', side):
+                df = self._execute_query(query, engine, self.timezone).rename(columns=str.lower)
+
+            totals = df.iloc[0] if not df.empty else {}
+            duplicated = df.loc[(df['xcnt'] > 1) & (df['xrank'] <= max_examples)].sort_values('xrank')
+            recent = df.loc[df['xrecent'] == 'y', key_columns]
+            recent_keys.update(dict.fromkeys(BaseDatabaseAdapter._key_rows(recent, key_columns)))
+            rows.append({
+                'side': side,
+                'total_rows': int(totals.get('xtotal_rows', 0)),
+                'distinct_keys': int(totals.get('xkeys', 0)),
+                'duplicated_keys': int(totals.get('xdup_keys', 0)),
+                'duplicated_rows': int(totals.get('xdup_rows', 0)),
+                'recent_keys': len(recent),
+                'duplicated_keys_examples': format_keys(
+                    list(duplicated[key_columns].itertuples(index=False, name=None)), max_examples),
+            })
+        app_logger.info(f'prestats: {rows}, recently changed keys of both sides: {len(recent_keys)}')
+        return pd.DataFrame(rows), list(recent_keys)
+
+    def _recent_keys_fit_in_sql(self, recent_keys: List[tuple], key_columns: List[str]) -> bool:
+        """
+        Recently changed keys are excluded in SQL when they are one IN-list of both DBMS within half
+        of the bind parameters limit (the rest is for other conditions) and have no NULL parts
+        """
+        for db_type in (self.source_db_type, self.target_db_type):
+            adapter = self._get_adapter(db_type)
+            if len(recent_keys) > min(adapter.keyed_fetch_max_keys,
+                                      adapter.keyed_fetch_max_params // 2 // len(key_columns)):
+                app_logger.info(f'{len(recent_keys)} recently changed keys are excluded after the fetch')
+                return False
+        return not any(value is None for key in recent_keys for value in key)
+
+    def _compare_samples_pushdown(
+        self,
+        source_table: DataReference,
+        target_table: DataReference,
+        date_column: str,
+        update_column: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        exclude_columns: List[str],
+        include_columns: List[str],
+        custom_key_columns: Optional[List[str]],
+        tolerance_percentage:float,
+        exclude_recent_hours: Optional[int],
+        max_examples:Optional[int],
+        db_link: Optional[str] = None,
+        sample_rate: Optional[float] = None,
+        sample_seed: int = 0
+    ) -> Tuple[str, str, Optional[ComparisonStats], Optional[ComparisonDiffDetails]]:
+        """Sample comparison by FULL OUTER JOIN on the source engine, only counters and examples are fetched"""
+        if db_link:
+            if self.source_db_type != DBMSType.ORACLE:
+                raise ValueError("db_link is supported for Oracle source only")
+        elif self.source_engine is not self.target_engine and self.source_engine.url != self.target_engine.url:
+            raise ValueError("pushdown comparison requires the same engine for source and target or db_link")
+
+        key_columns, source_columns_meta, target_columns_meta, \
+        common_cols, source_only_cols, target_only_cols = self._resolve_columns(
+            source_table, target_table, exclude_columns, include_columns, custom_key_columns
+        )
+        value_columns = [col for col in common_cols if col not in key_columns]
+        if db_link:
+            target_table = replace(target_table, db_link=db_link)
+
+        adapter = self._get_adapter(self.source_db_type)
+        sample_filters = self._get_sample_filters(self.source_db_type, key_columns, sample_rate, sample_seed)
+        source_query, source_params = adapter.build_data_query_common(
+            source_table, list(common_cols), date_column, update_column, start_date, end_date, exclude_recent_hours,
+            sample_filters
+        )
+        target_query, target_params = adapter.build_data_query_common(
+            target_table, list(common_cols), date_column, update_column, start_date, end_date, exclude_recent_hours,
+            sample_filters
+        )
+        summary_query, examples_query = adapter.build_pushdown_diff_queries(
+            (source_query, source_params), (target_query, target_params), key_columns, value_columns,
+            bool(update_column and exclude_recent_hours), max_examples
+        )
+
+        with self._profile.phase('query', 'pushdown'):
+            summary = self._execute_query(summary_query, self.source_engine, self.timezone)
+            examples = self._execute_query(examples_query, self.source_engine, self.timezone)
+
+        source_data, target_data, flags = split_pushdown_examples(examples, key_columns, value_columns)
+        with self._profile.phase('convert_types', 'source') as phase:
+            source_data = adapter.convert_types(source_data, source_columns_meta, self.timezone)
+            phase.rows += len(source_data)
+        with self._profile.phase('convert_types', 'target') as phase:
+            target_data = self._get_adapter(self.target_db_type).convert_types(
+                target_data, target_columns_meta, self.timezone)
+            phase.rows += len(target_data)
+        with self._profile.phase('prepare_dataframe'):
             source_data = prepare_dataframe(source_data)
             target_data = prepare_dataframe(target_data)
-            if update_column and exclude_recent_hours:
-                source_data, target_data = clean_recently_changed_data(source_data, target_data, key_columns)
 
+        with self._profile.phase('compare_dataframes'):
+            stats, details = build_pushdown_result(
+                summary, source_data, target_data, flags, key_columns, value_columns, max_examples
+            )
+
+        if not stats:
+            return ct.COMPARISON_SKIPPED, None, None, None
+
+        details.skipped_source_columns = source_only_cols
+        details.skipped_target_columns = target_only_cols
+        self._set_sample_stats(stats, sample_rate)
+        with self._profile.phase('report'):
+            report = generate_comparison_sample_report(source_table.full_name,
+                                                       target_table.full_name,
+                                                       stats,
+                                                       details,
+                                                       self.timezone,
+                                                       source_query,
+                                                       source_params,
+                                                       target_query,
+                                                       target_params,
+                                                       notes=['compared on the source engine by FULL OUTER JOIN (pushdown), '
+                                                              'values are compared as stored by the engine'],
+                                                       query_hints=self._query_hints
+                                                       )
+        status = ct.COMPARISON_FAILED if stats.final_diff_score > tolerance_percentage else ct.COMPARISON_SUCCESS
+        return status, report, stats, details
+
+    def _compare_samples_incremental(
+        self,
+        source_table: DataReference,
+        target_table: DataReference,
+        date_column: str,
+        update_column: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        exclude_columns: List[str],
+        include_columns: List[str],
+        custom_key_columns: Optional[List[str]],
+        tolerance_percentage:float,
+        exclude_recent_hours: Optional[int],
+        max_examples:Optional[int]
+    ) -> Tuple[str, str, Optional[ComparisonStats], Optional[ComparisonDiffDetails]]:
+        """Sample comparison over key->digest state updated by rows changed since the previous run"""
+        if self.state_store is None:
+            raise ValueError("incremental comparison requires state_store to be configured")
+        if not update_column:
+            raise ValueError("incremental comparison requires update_column")
 
-            stats, details = compare_dataframes(
-                source_data, target_data,
-                key_columns, max_examples
+        try:
+            key_columns, source_columns_meta, target_columns_meta, \
+            common_cols, source_only_cols, target_only_cols = self._resolve_columns(
+                source_table, target_table, exclude_columns, include_columns, custom_key_columns
             )
+            value_columns = [col for col in common_cols if col not in key_columns]
 
-            if stats:
-                details.skipped_source_columns = source_only_cols
-                details.skipped_target_columns = target_only_cols
+            state_key = self._make_state_key('incremental', source_table, target_table)
+            state_params = self.state_store.make_key(
+                [key_columns, common_cols, date_column, update_column, start_date, end_date]
+            )
+            record = self.state_store.get(state_key) or {}
+            source_state = target_state = None
+            if record.get('params') == state_params:
+                source_state = self.state_store.load_frame(state_key, 'source')
+                target_state = self.state_store.load_frame(state_key, 'target')
+            if source_state is None or target_state is None:
+                app_logger.info('Incremental state not found or parameters changed, full fetch')
+                record, source_state, target_state = {}, None, None
+
+            source_delta, source_query, source_params = self._get_incremental_delta(
+                self.source_engine, source_table, source_columns_meta, common_cols, date_column,
+                update_column, start_date, end_date, exclude_recent_hours, record.get('source_watermark'),
+                side='source'
+            )
+            target_delta, target_query, target_params = self._get_incremental_delta(
+                self.target_engine, target_table, target_columns_meta, common_cols, date_column,
+                update_column, start_date, end_date, exclude_recent_hours, record.get('target_watermark'),
+                side='target'
+            )
 
-                report = generate_comparison_sample_report(source_table.full_name,
-                                                            target_table.full_name,
-                                                            stats,
-                                                            details,
-                                                            self.timezone,
-                                                            source_query,
-                                                            source_params,
-                                                            target_query,
-                                                            target_params
-                                                            )
-                status = ct.COMPARISON_FAILED if stats.final_diff_score > tolerance_percentage else ct.COMPARISON_SUCCESS
-                return status, report, stats, details
-            else:
-                status = ct.COMPARISON_SKIPPED
-                return status, None, None, None
+            excluded_keys = set()
+            if exclude_recent_hours:
+                for delta in (source_delta, target_delta):
+                    if not delta.empty:
+                        excluded_keys |= set(
+                            delta.loc[delta['xrecently_changed'] == 'y', key_columns].itertuples(index=False, name=None)
+                        )
+
+            source_state, source_watermark = apply_incremental_delta(
+                source_state, source_delta, key_columns, value_columns, excluded_keys, record.get('source_watermark')
+            )
+            target_state, target_watermark = apply_incremental_delta(
+                target_state, target_delta, key_columns, value_columns, excluded_keys, record.get('target_watermark')
+            )
+
+            with self._profile.phase('compare_dataframes'):
+                stats, details = compare_dataframes(source_state, target_state, key_columns, max_examples)
+
+            self.state_store.save_frame(state_key, 'source', source_state)
+            self.state_store.save_frame(state_key, 'target', target_state)
+            self.state_store.put(state_key, {
+                'source': source_table.full_name,
+                'target': target_table.full_name,
+                'params': state_params,
+                'source_watermark': source_watermark,
+                'target_watermark': target_watermark,
+                'compared_at': pd.Timestamp.now().strftime(ct.DATETIME_FORMAT),
+            })
+
+            if not stats:
+                return ct.COMPARISON_SKIPPED, None, None, None
+
+            details.skipped_source_columns = source_only_cols
+            details.skipped_target_columns = target_only_cols
+            notes = [
+                f"Incremental mode: previous watermarks source={record.get('source_watermark')}, target={record.get('target_watermark')}",
+                f"Delta rows fetched: source {len(source_delta)}, target {len(target_delta)}, held back as recently changed: {len(excluded_keys)} keys",
+                f"New watermarks: source={source_watermark}, target={target_watermark}",
+                "Rows are compared by digest of all common columns, per column statistics are not available",
+            ]
+            report = generate_comparison_sample_report(source_table.full_name,
+                                                       target_table.full_name,
+                                                       stats,
+                                                       details,
+                                                       self.timezone,
+                                                       source_query,
+                                                       source_params,
+                                                       target_query,
+                                                       target_params,
+                                                       notes,
+                                                       query_hints=self._query_hints
+                                                       )
+            status = ct.COMPARISON_FAILED if stats.final_diff_score > tolerance_percentage else ct.COMPARISON_SUCCESS
+            return status, report, stats, details
 
         except Exception as e:
-            app_logger.error(f"Sample comparison failed: {str(e)}")
+            app_logger.error(f"Incremental sample comparison failed: {str(e)}")
             raise
 
+    def _get_incremental_delta(
+        self,
+        engine: Engine,
+        data_ref: DataReference,
+        metadata: pd.DataFrame,
+        columns: List[str],
+        date_column: str,
+        update_column: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        exclude_recent_hours: Optional[int],
+        watermark: Optional[str],
+        side: Optional[str] = None
+    ) -> Tuple[pd.DataFrame, str, Dict]:
+        """Rows changed at or after the watermark with `update_column` value copied to `xwatermark`"""
+        adapter = self._get_adapter(DBMSType.from_engine(engine))
+
+        # update column type is needed to convert watermark with the same rules as other columns
+        with self._profile.phase('metadata'):
+            update_meta = self._get_metadata_cols(data_ref, engine)
+        update_meta = update_meta[update_meta['column_name'] == update_column].assign(column_name='xwatermark')
+        metadata = pd.concat([metadata, update_meta], ignore_index=True)
+
+        update_select = f'"{update_column}"' if update_column.lower() in ct.RESERVED_WORDS else update_column
+        filters = [adapter._build_watermark_condition(update_select, watermark)] if watermark else None
+
+        df, query, params = self._get_table_data(
+            engine, data_ref, metadata, columns + [f'{update_select} as xwatermark'],
+            date_column, update_column, start_date, end_date, exclude_recent_hours, filters, side
+        )
+        if not df.empty:
+            with self._profile.phase('prepare_dataframe', side) as phase:
+                df = prepare_dataframe(df)
+                phase.rows += len(df)
+        return df, query, params
+
+    def _resolve_columns(
+        self,
+        source_table: DataReference,
+        target_table: DataReference,
+        exclude_columns: List[str],
+        include_columns: List[str],
+        custom_key_columns: Optional[List[str]]
+    ) -> Tuple[List[str], pd.DataFrame, pd.DataFrame, List[str], List[str], List[str]]:
+        """Detect primary key and the columns to compare according to metadata and include/exclude lists"""
+        with self._profile.phase('metadata'):
+            return self._resolve_columns_meta(
+                source_table, target_table, exclude_columns, include_columns, custom_key_columns
+            )
+
+    def _resolve_columns_meta(
+        self,
+        source_table: DataReference,
+        target_table: DataReference,
+        exclude_columns: List[str],
+        include_columns: List[str],
+        custom_key_columns: Optional[List[str]]
+    ) -> Tuple[List[str], pd.DataFrame, pd.DataFrame, List[str], List[str], List[str]]:
+        source_object_type = self._get_object_type(source_table, self.source_engine)
+        target_object_type = self._get_object_type(target_table, self.target_engine)
+        app_logger.info(f'object type source: {source_object_type} vs target {target_object_type}')
+
+        source_columns_meta = self._get_metadata_cols(source_table, self.source_engine)
+        app_logger.info('source_columns meta:\n')
+        app_logger.info(source_columns_meta.to_string(index=False))
+
+        target_columns_meta = self._get_metadata_cols(target_table, self.target_engine)
+        app_logger.info('target_columns meta:\n')
+        app_logger.info(target_columns_meta.to_string(index=False))
+
+        intersect = list(set(include_columns)&set(exclude_columns))
+        if intersect:
+            app_logger.warning(f'Intersection columns between Include and exclude: {",".join(intersect)}')
+        
+        key_columns = None
+
+        if custom_key_columns:
+            key_columns = custom_key_columns
+            source_cols = source_columns_meta['column_name'].tolist()
+            target_cols = target_columns_meta['column_name'].tolist()
+
+            missing_in_source = [col for col in custom_key_columns if col not in source_cols]
+            missing_in_target = [col for col in custom_key_columns if col not in target_cols]
+
+            if missing_in_source:
+                raise MetadataError(f"Custom key columns missing in source: {missing_in_source}")
+            if missing_in_target:
+                raise MetadataError(f"Custom key columns missing in target: {missing_in_target}")
+        else:
+            source_pk = self._get_metadata_pk(source_table, self.source_engine) \
+                                     if source_object_type == ObjectType.TABLE else pd.DataFrame({'pk_column_name': []})
+            target_pk = self._get_metadata_pk(target_table, self.target_engine) \
+                                     if target_object_type == ObjectType.TABLE else pd.DataFrame({'pk_column_name': []})
+
+            if source_pk['pk_column_name'].tolist() != target_pk['pk_column_name'].tolist():
+                app_logger.warning(f"Primary keys differ: source={source_pk['pk_column_name'].tolist()}, target={target_pk['pk_column_name'].tolist()}")
+            key_columns = source_pk['pk_column_name'].tolist() or target_pk['pk_column_name'].tolist()
+            if not key_columns:
+                raise MetadataError(f"Primary key not found in the source neither in the target and not provided") 
+
+        if include_columns:
+        
+            if not set(include_columns) & set(key_columns):
+                app_logger.warning(f'The primary key was not included in the column list.\
+                                   The key column was included in the resulting query automatically. PK:{key_columns}') 
+
+            include_columns = list(set(include_columns + key_columns))
+
+            source_columns_meta = source_columns_meta[
+                source_columns_meta['column_name'].isin(include_columns)
+            ]
+            target_columns_meta = target_columns_meta[
+                target_columns_meta['column_name'].isin(include_columns)
+            ]
+        
+        if exclude_columns:
+
+            if set(exclude_columns) & set(key_columns):
+                app_logger.warning(f'The primary key has been excluded from the column list.\
+                                   However, the key column must be present in the resulting query.s PK:{key_columns}') 
+
+            exclude_columns = list(set(exclude_columns) - set(key_columns))
+
+            source_columns_meta = source_columns_meta[
+                ~source_columns_meta['column_name'].isin(exclude_columns)
+            ]
+            target_columns_meta = target_columns_meta[
+                ~target_columns_meta['column_name'].isin(exclude_columns)
+            ]
+
+        common_cols_df, source_only_cols, target_only_cols = self._analyze_columns_meta(source_columns_meta, target_columns_meta)
+        common_cols = common_cols_df['column_name'].tolist()
+
+        if not common_cols:
+            raise MetadataError(f"No one column to compare, need to check tables or reduce the exclude_columns list: {','.join(exclude_columns)}")
+
+        return key_columns, source_columns_meta, target_columns_meta, common_cols, source_only_cols, target_only_cols
+
     def compare_custom_query(
         self,
         source_query: str,
@@ -413,7 +1595,10 @@ class DataQualityComparator:
         custom_primary_key: List[str],
         exclude_columns: Optional[List[str]] = None,
         tolerance_percentage: float = 0.0,
-        max_examples:Optional[int] = ct.DEFAULT_MAX_EXAMPLES
+        max_examples:Optional[int] = ct.DEFAULT_MAX_EXAMPLES,
+        profile: bool = False,
+        profile_dir: Optional[str] = None,
+        semi_join: bool = False
     ) -> Tuple[str, str, Optional[ComparisonStats], Optional[ComparisonDiffDetails]]:
         """
         Compare data from custom queries with specified key columns
@@ -431,6 +1616,14 @@ class DataQualityComparator:
                 Tolerance percentage for discrepancies.
             max_examples: int
                 Maximum number of discrepancy examples per column 
+            profile: bool
+                Capture cProfile of this comparison and log top hot functions
+            profile_dir: Optional[str]
+                Also dump the cProfile stats to this directory (implies `profile`)
+            semi_join: bool
+                Load the source keys into a temporary table on the target side and fetch only
+                the target rows with these keys. Other target rows are counted, not fetched,
+                and reported as details.semi_join_extra_rows (they do not affect the status)
                 
         Returns:
         ----------
@@ -439,17 +1632,33 @@ class DataQualityComparator:
         source_engine = self.source_engine
         target_engine = self.target_engine
         timezone = self.timezone
+        extra_rows = None
 
         try:
             self.comparison_stats['compared'] += 1
+            self._start_profile('custom_query', profile, profile_dir)
+            self._set_query_hints()
 
             # Execute queries
-            source_data = self._execute_query((source_query,source_params), source_engine, timezone)
-            target_data = self._execute_query((target_query,target_params), target_engine, timezone)
+            with self._profile.phase('query', 'source'):
+                source_data = self._execute_query((source_query,source_params), source_engine, timezone)
+            if semi_join:
+                with self._profile.phase('query', 'target'):
+                    target_data, extra_rows = self._execute_semi_join(
+                        (target_query, target_params), target_engine, custom_primary_key,
+                        source_data[custom_primary_key].drop_duplicates(), timezone
+                    )
+            else:
+                with self._profile.phase('query', 'target'):
+                    target_data = self._execute_query((target_query,target_params), target_engine, timezone)
             app_logger.info('preparing source dataframe')
-            source_data_prepared = prepare_dataframe(source_data)
+            with self._profile.phase('prepare_dataframe', 'source') as phase:
+                source_data_prepared = self.backend.prepare_dataframe(source_data)
+                phase.rows += len(source_data_prepared)
             app_logger.info('preparing target dataframe')
-            target_data_prepared = prepare_dataframe(target_data)
+            with self._profile.phase('prepare_dataframe', 'target') as phase:
+                target_data_prepared = self.backend.prepare_dataframe(target_data)
+                phase.rows += len(target_data_prepared)
 
             # Exclude columns if specified
             exclude_cols = exclude_columns or []
@@ -459,29 +1668,34 @@ class DataQualityComparator:
             source_data_filtered = source_data_prepared[common_cols]
             target_data_filtered = target_data_prepared[common_cols]
             if 'xrecently_changed' in common_cols:
-                source_data_filtered, target_data_filtered = clean_recently_changed_data(source_data_filtered, target_data_filtered, custom_primary_key)
+                with self._profile.phase('clean_recently_changed'):
+                    source_data_filtered, target_data_filtered = self.backend.clean_recently_changed_data(source_data_filtered, target_data_filtered, custom_primary_key)
             # Compare dataframes
-            stats, details = compare_dataframes(
-                source_data_filtered, target_data_filtered, custom_primary_key, max_examples
-            )
+            with self._profile.phase('compare_dataframes'):
+                stats, details = self._compare_dataframes(
+                    source_data_filtered, target_data_filtered, custom_primary_key, max_examples
+                )
 
             if stats:
-                report = generate_comparison_sample_report(None,
-                                                           None,
-                                                           stats,
-                                                           details,
-                                                           self.timezone,
-                                                           source_query,
-                                                           source_params,
-                                                           target_query,
-                                                           target_params
-                                                          )
+                details.semi_join_extra_rows = extra_rows
+                with self._profile.phase('report'):
+                    report = generate_comparison_sample_report(None,
+                                                               None,
+                                                               stats,
+                                                               details,
+                                                               self.timezone,
+                                                               source_query,
+                                                               source_params,
+                                                               target_query,
+                                                               target_params,
+                                                               query_hints=self._query_hints
+                                                              )
                 status = ct.COMPARISON_FAILED if stats.final_diff_score > tolerance_percentage else ct.COMPARISON_SUCCESS
             else:
                 status = ct.COMPARISON_SKIPPED
 
 
-            self._update_stats(status, None)
+            self._update_stats(status, None, stats)
             return status, report, stats, details
 
         except Exception as e:
@@ -489,6 +1703,99 @@ class DataQualityComparator:
             status = ct.COMPARISON_FAILED
             self._update_stats(status, None)
             return status, None, None, None
+
+    def _make_state_key(self, method: str, source_table: DataReference, target_table: DataReference) -> str:
+        """
+        State record key of the compared pair. Engine URLs (without passwords) keep apart the objects
+        with the same names in other databases (dev and prod comparators sharing a state store)
+        """
+        return self.state_store.make_key(
+            method,
+            self.source_engine.url.render_as_string(hide_password=True), source_table.full_name,
+            self.target_engine.url.render_as_string(hide_password=True), target_table.full_name
+        )
+
+    def _get_change_fingerprint(self, data_ref: DataReference, engine: Engine) -> Optional[List[str]]:
+        """Catalog change fingerprint of the table, None when the object can not be tracked"""
+        adapter = self._get_adapter(DBMSType.from_engine(engine))
+
+        query = adapter.build_change_fingerprint_query(data_ref)
+        if query is None or self._get_object_type(data_ref, engine) != ObjectType.TABLE:
+            return None
+
+        result = self._execute_query(query, engine)
+        if len(result) != 1:
+            return None
+        return [str(value) for value in result.iloc[0].tolist()]
+
+    def _get_change_state(
+        self,
+        method: str,
+        source_table: DataReference,
+        target_table: DataReference,
+        call_params: List[Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Current fingerprints of both sides, None when any side can not be tracked"""
+        if self.state_store is None:
+            raise ValueError("skip_unchanged requires state_store to be configured")
+
+        with self._profile.phase('metadata'):
+            source_fingerprint = self._get_change_fingerprint(source_table, self.source_engine)
+            target_fingerprint = self._get_change_fingerprint(target_table, self.target_engine)
+        if source_fingerprint is None or target_fingerprint is None:
+            app_logger.info(f'Change fingerprint is not available for {source_table.full_name} or {target_table.full_name}')
+            return None
+
+        return {
+            'key': self._make_state_key(method, source_table, target_table),
+            'method': method,
+            'source': source_table.full_name,
+            'target': target_table.full_name,
+            'params': self.state_store.make_key(call_params),
+            'fingerprint': {'source': source_fingerprint, 'target': target_fingerprint},
+        }
+
+    def _get_unchanged_result(
+        self,
+        change_state: Optional[Dict[str, Any]],
+        source_table: DataReference,
+        target_table: DataReference
+    ) -> Optional[Tuple[str, str, Optional[ComparisonStats]]]:
+        """Previous result when neither side changed since the last comparison with the same parameters"""
+        if not change_state:
+            return None
+
+        record = self.state_store.get(change_state['key'])
+        if not record or record.get('params') != change_state['params'] \
+                or record.get('fingerprint') != change_state['fingerprint']:
+            return None
+
+        app_logger.info(f"{source_table.full_name} and {target_table.full_name} unchanged since {record['compared_at']}, reusing result")
+        stats = None
+        if record.get('stats'):
+            stats_fields = {f.name for f in fields(ComparisonStats)}
+            stats = ComparisonStats(**{k: v for k, v in record['stats'].items() if k in stats_fields})
+
+        report = generate_unchanged_report(source_table.full_name, target_table.full_name,
+                                           record['status'], record['compared_at'], stats)
+        return ct.COMPARISON_SKIPPED, report, stats
+
+    def _save_change_state(
+        self,
+        change_state: Optional[Dict[str, Any]],
+        status: str,
+        stats: Optional[ComparisonStats]
+    ):
+        """Remember fingerprints taken before the comparison together with its result"""
+        if not change_state or status not in (ct.COMPARISON_SUCCESS, ct.COMPARISON_FAILED):
+            return
+
+        record = dict(change_state)
+        record['status'] = status
+        record['stats'] = {k: v for k, v in asdict(stats).items() if k != 'profile'} if stats else None
+        record['compared_at'] = pd.Timestamp.now().strftime(ct.DATETIME_FORMAT)
+        self.state_store.put(change_state['key'], record)
+
     def _get_metadata_cols(self, data_ref: DataReference, engine: Engine) -> pd.DataFrame:
         """Get metadata with proper source handling"""
         adapter = self._get_adapter(DBMSType.from_engine(engine))
@@ -527,25 +1834,113 @@ class DataQualityComparator:
         update_column: str,
         start_date: Optional[str],
         end_date: Optional[str],
-        exclude_recent_hours: Optional[int]
+        exclude_recent_hours: Optional[int],
+        filters: Optional[List[Tuple[str, Dict]]] = None,
+        side: Optional[str] = None,
+        ranges: int = 1,
+        digest_columns: Optional[List[str]] = None,
+        stream_key_columns: Optional[List[str]] = None
     ) -> Tuple[pd.DataFrame, str, Dict] :
-        """Retrieve and prepare table data"""
+        """
+        Retrieve and prepare table data, split into concurrently fetched physical `ranges` of a table,
+        `digest_columns` are selected as LOB digests under the column names and not converted.
+        With `stream_key_columns` the data is streamed and reduced to prepared keys and value hashes
+        """
         db_type = DBMSType.from_engine(engine)
         adapter = self._get_adapter(db_type)
         app_logger.info(db_type)
 
+        if digest_columns:
+            data_types = metadata.set_index('column_name')['data_type']
+            columns = [f"{adapter.build_lob_digest_expression(adapter._quote_column(col), data_types[col])} "
+                       f"AS {adapter._quote_column(col)}" if col in digest_columns else col
+                       for col in columns]
+            metadata = metadata[~metadata['column_name'].isin(digest_columns)]
+
         query, params = adapter.build_data_query_common(
             data_ref, columns, date_column, update_column,
-            start_date, end_date, exclude_recent_hours
+            start_date, end_date, exclude_recent_hours, filters
         )
 
-        df = self._execute_query((query,params), engine, self.timezone)
+        if stream_key_columns:
+            with self._profile.phase('query', side):
+                df = self._fetch_hashed(adapter, engine, (query, params), metadata, stream_key_columns)
+            return df, query, params
+
+        range_conditions = []
+        if ranges > 1 and self._get_object_type(data_ref, engine) == ObjectType.TABLE:
+            range_conditions = adapter.get_extraction_ranges(engine, data_ref, ranges)
+
+        with self._profile.phase('query', side):
+            if range_conditions:
+                app_logger.info(f'fetching {data_ref.full_name} in {len(range_conditions)} ranges')
+                queries = [adapter.build_data_query_common(data_ref, columns, date_column, update_column,
+                                                           start_date, end_date, exclude_recent_hours,
+                                                           (filters or []) + [condition])
+                           for condition in range_conditions]
+                df = adapter.fetch_concurrently(engine, queries, self.timezone, len(queries))
+                size_gb = get_dataframe_size_gb(df)
+                self._profile.add_fetched(len(df), int(size_gb * 1024 ** 3))
+                validate_dataframe_size(df, ct.DEFAULT_MAX_SAMPLE_SIZE_GB, size_gb)
+            else:
+                df = self._execute_query((query,params), engine, self.timezone)
 
         # Apply type conversions
-        df = adapter.convert_types(df, metadata, self.timezone)
+        with self._profile.phase('convert_types', side) as phase:
+            df = adapter.convert_types(df, metadata, self.timezone)
+            phase.rows += len(df)
 
         return df, query, params
 
+    def _fetch_hashed(
+        self,
+        adapter: BaseDatabaseAdapter,
+        engine,
+        query: Tuple[str, Dict],
+        metadata,
+        key_columns: List[str]
+    ) -> pd.DataFrame:
+        """
+        Stream the query result in chunks converted and prepared as usual, value columns of every chunk
+        are reduced to 64-bit hashes, so only prepared keys and hashes are held
+        """
+        frames, fetched_bytes = [], 0
+        for chunk in adapter.iter_query_chunks(query, engine, self.timezone, ct.DEFAULT_STREAM_CHUNK_ROWS):
+            fetched_bytes += int(get_dataframe_size_gb(chunk) * 1024 ** 3)
+            chunk = prepare_dataframe(adapter.convert_types(chunk, metadata, self.timezone))
+            frames.append(hash_value_columns(chunk, key_columns))
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        self._profile.add_fetched(len(df), fetched_bytes)
+        size_gb = get_dataframe_size_gb(df)
+        app_logger.info(f'{len(df)} rows streamed in {len(frames)} chunks, {size_gb * 1024:.1f} MB held as keys and hashes')
+        validate_dataframe_size(df, ct.DEFAULT_MAX_SAMPLE_SIZE_GB, size_gb)
+        return df
+
+    def _get_rows_by_keys(
+        self,
+        engine,
+        data_ref: DataReference,
+        metadata,
+        columns: List[str],
+        key_columns: List[str],
+        keys: List,
+        filters: Optional[List[Tuple[str, Dict]]] = None,
+        side: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Retrieve rows by primary keys in concurrent batches and convert types as _get_table_data"""
+        adapter = self._get_adapter(DBMSType.from_engine(engine))
+
+        with self._profile.phase('query', side):
+            df = adapter.fetch_by_keys(engine, data_ref, columns, key_columns, keys, self.timezone, filters,
+                                       self.keyed_fetch_workers)
+            self._profile.add_fetched(len(df), int(get_dataframe_size_gb(df) * 1024 ** 3))
+
+        with self._profile.phase('convert_types', side) as phase:
+            df = adapter.convert_types(df, metadata, self.timezone)
+            phase.rows += len(df)
+
+        return df
+
     def _get_adapter(self, db_type: DBMSType) -> BaseDatabaseAdapter:
         """Get adapter for specific DBMS"""
         try:
@@ -558,9 +1953,21 @@ class DataQualityComparator:
         db_type = DBMSType.from_engine(engine)
         adapter = self._get_adapter(db_type)
         df = adapter._execute_query(query, engine, timezone)
-        validate_dataframe_size(df, ct.DEFAULT_MAX_SAMPLE_SIZE_GB)
+        size_gb = get_dataframe_size_gb(df)
+        self._profile.add_fetched(len(df), int(size_gb * 1024 ** 3))
+        validate_dataframe_size(df, ct.DEFAULT_MAX_SAMPLE_SIZE_GB, size_gb)
         return df
 
+    def _execute_semi_join(self, query: Union[str, Tuple[str, Dict]], engine: Engine, key_columns: List[str],
+                           keys: pd.DataFrame, timezone: str = None) -> Tuple[pd.DataFrame, int]:
+        """Rows of the query with the given keys and the count of the others, see fetch_semi_join"""
+        adapter = self._get_adapter(DBMSType.from_engine(engine))
+        df, extra_rows = adapter.fetch_semi_join(engine, query, key_columns, keys, timezone)
+        size_gb = get_dataframe_size_gb(df)
+        self._profile.add_fetched(len(df), int(size_gb * 1024 ** 3))
+        validate_dataframe_size(df, ct.DEFAULT_MAX_SAMPLE_SIZE_GB, size_gb)
+        return df, extra_rows
+
     def _analyze_columns_meta(
         self,
         source_columns_meta: pd.DataFrame,
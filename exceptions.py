@@ -12,4 +12,8 @@ class QueryExecutionError(DQCompareException):
 
 class TypeConversionError(DQCompareException):
     """Exception raised for type conversion failures"""
-    pass
\ No newline at end of file
+    pass
+
+class ComparisonCancelled(DQCompareException):
+    """Exception raised when a cancelled or timed out comparison reaches its next phase"""
+    pass
@@ -0,0 +1,103 @@
+from typing import Dict
+
+try:
+    import prometheus_client
+except ImportError:
+    # optional dependency, MetricsRecorder can not be created without it
+    prometheus_client = None
+
+try:
+    from .profiling import ComparisonProfile
+except ImportError:
+    # for cases when used as standalone script
+    from profiling import ComparisonProfile
+
+# seconds, from catalog lookups to multi-minute extractions
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+# bytes, 1 MB .. 8 GB
+SIZE_BUCKETS = tuple(2 ** power for power in range(20, 34))
+
+
+class MetricsRecorder:
+    """
+    Prometheus/OpenMetrics counters and histograms for comparison runs
+
+    Metrics are fed from the per comparison profile when a comparison finishes,
+    so nothing is recorded on the hot path. Exposed either by local http endpoint
+    (`start_http_server`) or as node_exporter textfile (`write_textfile`)
+    """
+
+    def __init__(self, registry=None, namespace: str = 'xoverrr'):
+        if prometheus_client is None:
+            raise ImportError("prometheus_client is required for metrics: pip install prometheus_client")
+
+        self.registry = registry or prometheus_client.CollectorRegistry()
+
+        self.comparisons = prometheus_client.Counter(
+            'comparisons', 'Finished comparisons by method and status',
+            ['method', 'status'], namespace=namespace, registry=self.registry
+        )
+        self.rows_fetched = prometheus_client.Counter(
+            'rows_fetched', 'Rows fetched from databases',
+            ['engine', 'side'], namespace=namespace, registry=self.registry
+        )
+        self.bytes_fetched = prometheus_client.Counter(
+            'bytes_fetched', 'Size of fetched dataframes in memory',
+            ['engine', 'side'], namespace=namespace, registry=self.registry
+        )
+        self.phase_duration = prometheus_client.Histogram(
+            'phase_duration_seconds', 'Wall time of comparison phases',
+            ['engine', 'phase'], namespace=namespace, registry=self.registry, buckets=LATENCY_BUCKETS
+        )
+        self.comparison_duration = prometheus_client.Histogram(
+            'comparison_duration_seconds', 'Wall time of whole comparisons',
+            ['method'], namespace=namespace, registry=self.registry, buckets=LATENCY_BUCKETS
+        )
+        self.comparison_bytes = prometheus_client.Histogram(
+            'comparison_bytes', 'Bytes fetched per comparison',
+            ['method'], namespace=namespace, registry=self.registry, buckets=SIZE_BUCKETS
+        )
+        self.peak_memory = prometheus_client.Gauge(
+            'peak_memory_bytes', 'Process peak resident memory after the last comparison',
+            namespace=namespace, registry=self.registry
+        )
+
+    def observe_comparison(self, method: str, status: str, profile: ComparisonProfile, engines: Dict[str, str]) -> None:
+        """
+        Record finished comparison
+
+        Parameters:
+            engines: `Dict[str, str]`
+                engine label per side, e.g. {'source': 'oracle', 'target': 'postgresql'},
+                phases without side are labeled 'local'
+        """
+        self.comparisons.labels(method, status).inc()
+
+        total_bytes = 0
+        process_peak_rss = None
+        for phase in profile.phases:
+            engine = engines.get(phase.side, 'local')
+            self.phase_duration.labels(engine, phase.phase).observe(phase.wall_time)
+            if phase.phase == 'query' and phase.side:
+                self.rows_fetched.labels(engine, phase.side).inc(phase.rows)
+                self.bytes_fetched.labels(engine, phase.side).inc(phase.bytes)
+                total_bytes += phase.bytes
+            if phase.process_peak_rss is not None:
+                process_peak_rss = max(process_peak_rss or 0, phase.process_peak_rss)
+
+        self.comparison_duration.labels(method).observe(profile.total_wall_time)
+        self.comparison_bytes.labels(method).observe(total_bytes)
+        if process_peak_rss is not None:
+            self.peak_memory.set(process_peak_rss)
+
+    def start_http_server(self, port: int, addr: str = '0.0.0.0') -> None:
+        """Serve metrics on http://addr:port/metrics from a daemon thread"""
+        prometheus_client.start_http_server(port, addr=addr, registry=self.registry)
+
+    def write_textfile(self, path: str) -> None:
+        """Write metrics for node_exporter textfile collector (atomically)"""
+        prometheus_client.write_to_textfile(path, self.registry)
+
+    def generate_latest(self) -> bytes:
+        """Metrics in prometheus exposition format"""
+        return prometheus_client.generate_latest(self.registry)
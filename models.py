@@ -16,6 +16,8 @@ class DBMSType(Enum):
     ORACLE = auto()
     POSTGRESQL = auto()
     CLICKHOUSE = auto()
+    SQLITE = auto()
+    DUCKDB = auto()
 
     @classmethod
     def from_engine(cls, engine: Engine) -> 'DBMSType':
@@ -27,14 +29,22 @@ class DBMSType(Enum):
             return cls.POSTGRESQL
         elif dialect == 'clickhouse':
             return cls.CLICKHOUSE
+        elif dialect == 'sqlite':
+            return cls.SQLITE
+        elif dialect == 'duckdb':
+            return cls.DUCKDB
         raise ValueError(f"Unsupported engine dialect: {dialect}")
 
 
 @dataclass(frozen=True)
 class DataReference:
-    """Immutable reference to a database object"""
+    """
+    Immutable reference to a database object,
+    `db_link` addresses the object through an Oracle database link (pushdown comparisons)
+    """
     name: str
     schema: Optional[str] = None
+    db_link: Optional[str] = None
 
     def __post_init__(self):
         self._validate()
@@ -45,8 +55,11 @@ class DataReference:
             raise ValueError(f"Invalid table name: {self.name}")
         if self.schema and not re.match(r'^[a-zA-Z0-9_]+$', self.schema):
             raise ValueError(f"Invalid schema name: {self.schema}")
+        if self.db_link and not re.match(r'^[a-zA-Z0-9_.$#]+$', self.db_link):
+            raise ValueError(f"Invalid database link name: {self.db_link}")
 
     @property
     def full_name(self) -> str:
         """Get fully qualified object name"""
-        return f"{self.schema}.{self.name}" if self.schema else self.name
\ No newline at end of file
+        full_name = f"{self.schema}.{self.name}" if self.schema else self.name
+        return f"{full_name}@{self.db_link}" if self.db_link else full_name
\ No newline at end of file
@@ -0,0 +1,281 @@
+import heapq
+import itertools
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+try:
+    from .constants import DEFAULT_MAX_EXAMPLES
+    from .logger import app_logger
+    from .utils import (
+        ComparisonStats,
+        ComparisonDiffDetails,
+        compare_dataframes,
+        compare_dataframes_meta,
+        scan_column_discrepancies,
+        summarize_column_discrepancies,
+        build_comparison_result,
+        encode_keys,
+        format_keys,
+        _validate_input_data,
+    )
+except ImportError:
+    # for cases when used as standalone script
+    from constants import DEFAULT_MAX_EXAMPLES
+    from logger import app_logger
+    from utils import (
+        ComparisonStats,
+        ComparisonDiffDetails,
+        compare_dataframes,
+        compare_dataframes_meta,
+        scan_column_discrepancies,
+        summarize_column_discrepancies,
+        build_comparison_result,
+        encode_keys,
+        format_keys,
+        _validate_input_data,
+    )
+
+
+def partition_by_key_hash(df: pd.DataFrame, key_columns: List[str], shards: int) -> List[np.ndarray]:
+    """
+    Row positions of every shard, rows with the same primary key always go to the same shard.
+    Positions inside a shard keep the original row order
+    """
+    if df.empty:
+        return [np.empty(0, dtype=np.int64) for _ in range(shards)]
+    shard_ids = (pd.util.hash_pandas_object(df[key_columns], index=False).to_numpy() % shards).astype(np.int64)
+    order = np.argsort(shard_ids, kind='stable')
+    bounds = np.cumsum(np.bincount(shard_ids, minlength=shards))[:-1]
+    return np.split(order, bounds)
+
+
+def _write_ipc(df: pd.DataFrame, path: str) -> None:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_ipc(path: str) -> pd.DataFrame:
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def _compare_shard(source_path: str, target_path: str, key_columns: List[str], max_examples: int) -> dict:
+    """
+    compare_dataframes of one shard, returns everything needed for the exact merge:
+    counters, duplicates and dropped rows by local position, only keys in sorted order,
+    the first discrepant pairs and the per column scan
+    """
+    source_df = _read_ipc(source_path)
+    target_df = _read_ipc(target_path)
+
+    result = {}
+    codes = dict(zip(('source', 'target'), encode_keys([source_df, target_df], key_columns)))
+    for side, df in (('source', source_df), ('target', target_df)):
+        dup_mask = pd.Series(codes[side]).duplicated(keep=False).to_numpy()
+        kept_mask = ~pd.Series(codes[side]).duplicated(keep='first').to_numpy()
+        result[f'{side}_dup_positions'] = np.flatnonzero(dup_mask)
+        result[f'{side}_dup_keys'] = list(df.loc[dup_mask, key_columns].itertuples(index=False, name=None))
+        result[f'{side}_kept_positions'] = np.flatnonzero(kept_mask)
+        result[f'{side}_dropped_positions'] = np.flatnonzero(~kept_mask)
+
+    source_clean = source_df.iloc[result['source_kept_positions']]
+    target_clean = target_df.iloc[result['target_kept_positions']]
+
+    non_key_columns = compare_dataframes_meta(source_clean, target_clean, key_columns)
+
+    source_clean = source_clean.assign(xflg='src', xkey=codes['source'][result['source_kept_positions']])
+    target_clean = target_clean.assign(xflg='trg', xkey=codes['target'][result['target_kept_positions']])
+
+    xor_combined_df = (
+        pd.concat([source_clean, target_clean], ignore_index=True)
+        .drop_duplicates(subset=['xkey'] + non_key_columns, keep=False)
+    )
+    xor_combined_sorted = xor_combined_df.sort_values(
+        by=key_columns + ['xflg'],
+        ascending=[False] * len(key_columns) + [True]
+    )
+
+    mask = xor_combined_sorted['xkey'].duplicated(keep=False)
+    xor_combined_sorted = xor_combined_sorted.drop(columns=['xkey'])
+    xor_df_multi = xor_combined_sorted[mask]
+
+    mask_source = xor_combined_sorted['xflg'] == 'src'
+    mask_target = xor_combined_sorted['xflg'] == 'trg'
+    # already sorted by keys desc, merged across shards with heapq
+    result['source_only_keys'] = list(xor_combined_sorted.loc[~mask & mask_source, key_columns].itertuples(index=False, name=None))
+    result['target_only_keys'] = list(xor_combined_sorted.loc[~mask & mask_target, key_columns].itertuples(index=False, name=None))
+    result['xor_common_keys_cnt'] = int(len(xor_df_multi)/2)
+
+    # first pairs with the local positions of the rows before deduplication
+    multi_head = xor_df_multi.head(max_examples*2)
+    labels = multi_head.index.to_numpy()
+    source_clean_cnt = len(source_clean)
+    is_source = labels < source_clean_cnt
+    result['multi_head'] = multi_head.reset_index(drop=True)
+    result['multi_head_is_source'] = is_source
+    positions = np.empty(len(labels), dtype=np.int64)
+    positions[is_source] = result['source_kept_positions'][labels[is_source]]
+    positions[~is_source] = result['target_kept_positions'][labels[~is_source] - source_clean_cnt]
+    result['multi_head_positions'] = positions
+
+    result['diff_counters'], result['diff_examples'], result['first_mismatch_keys'] = \
+        scan_column_discrepancies(xor_df_multi, key_columns, non_key_columns, max_examples)
+
+    return result
+
+
+def _merge_column_discrepancies(shard_results: List[dict], non_key_columns: List[str], max_examples: int):
+    """Per column counters and examples in the order of the single scan over all pairs sorted by keys desc"""
+    first_keys = {}
+    diff_counters = {}
+    diff_examples = {}
+    for col in non_key_columns:
+        counts = [r['diff_counters'].get(col, 0) for r in shard_results]
+        if not sum(counts):
+            diff_examples[col] = []
+            continue
+        diff_counters[col] = sum(counts)
+        first_keys[col] = max(r['first_mismatch_keys'][col] for r in shard_results if col in r['first_mismatch_keys'])
+        examples = [e for r in shard_results for e in r['diff_examples'][col]]
+        diff_examples[col] = sorted(examples, key=lambda e: e['pk'], reverse=True)[:max_examples]
+
+    # columns of the same pair keep their order, python sort is stable with reverse as well
+    ordered = sorted(diff_counters, key=lambda col: first_keys[col], reverse=True)
+    return {col: diff_counters[col] for col in ordered}, diff_examples
+
+
+def compare_dataframes_parallel(
+    source_df: pd.DataFrame,
+    target_df: pd.DataFrame,
+    key_columns: List[str],
+    max_examples: int = DEFAULT_MAX_EXAMPLES,
+    workers: Optional[int] = None,
+    shm_dir: Optional[str] = None
+) -> tuple[ComparisonStats, ComparisonDiffDetails]:
+    """
+    compare_dataframes split by hash of primary key into shards compared in separate processes.
+    Shards are passed as Arrow IPC files (in /dev/shm when available) mapped into worker memory,
+    per shard results are merged into exactly the same stats and details as compare_dataframes returns.
+
+    Frames are expected to be prepared (prepare_dataframe): equal keys must have equal dtypes on both sides.
+    Falls back to compare_dataframes without pyarrow or with a single worker
+
+    Parameters:
+        workers : int, optional
+            Number of processes (and shards), os.cpu_count() by default
+        shm_dir : str, optional
+            Directory for the shard files, /dev/shm or the system temporary directory by default
+    """
+    app_logger.info('start')
+
+    if source_df.empty and target_df.empty:
+        return None, None
+    _validate_input_data(source_df, target_df, key_columns)
+
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or pa is None:
+        if pa is None:
+            app_logger.warning('pyarrow is not installed, comparing in a single process')
+        return compare_dataframes(source_df, target_df, key_columns, max_examples)
+
+    source_parts = partition_by_key_hash(source_df, key_columns, workers)
+    target_parts = partition_by_key_hash(target_df, key_columns, workers)
+
+    if shm_dir is None and os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        shm_dir = '/dev/shm'
+    workdir = tempfile.mkdtemp(prefix='xoverrr_', dir=shm_dir)
+    try:
+        tasks = []
+        for shard, (source_pos, target_pos) in enumerate(zip(source_parts, target_parts)):
+            source_path = os.path.join(workdir, f'source_{shard}.arrow')
+            target_path = os.path.join(workdir, f'target_{shard}.arrow')
+            _write_ipc(source_df.iloc[source_pos], source_path)
+            _write_ipc(target_df.iloc[target_pos], target_path)
+            tasks.append((source_path, target_path))
+
+        app_logger.info(f'comparing {workers} shards in {workers} processes')
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_compare_shard, source_path, target_path, key_columns, max_examples)
+                       for source_path, target_path in tasks]
+            shard_results = [future.result() for future in futures]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # global positions of shard rows
+    def global_positions(side, name, parts):
+        return [parts[i][r[f'{side}_{name}']] for i, r in enumerate(shard_results)]
+
+    # duplicated keys in the original row order
+    dup_keys_examples = {}
+    for side, parts in (('source', source_parts), ('target', target_parts)):
+        positions = np.concatenate(global_positions(side, 'dup_positions', parts))
+        keys = [key for r in shard_results for key in r[f'{side}_dup_keys']]
+        dup_keys = set(keys[i] for i in np.argsort(positions, kind='stable'))
+        dup_keys_examples[side] = format_keys(dup_keys, max_examples)
+
+    source_clean_cnt = sum(len(r['source_kept_positions']) for r in shard_results)
+    target_clean_cnt = sum(len(r['target_kept_positions']) for r in shard_results)
+
+    # first only keys in keys desc order, as selected by compare_dataframes
+    xor_source_only_keys = set(itertools.islice(
+        heapq.merge(*(r['source_only_keys'] for r in shard_results), reverse=True), max_examples))
+    xor_target_only_keys = set(itertools.islice(
+        heapq.merge(*(r['target_only_keys'] for r in shard_results), reverse=True), max_examples))
+    source_only_cnt = sum(len(r['source_only_keys']) for r in shard_results)
+    target_only_cnt = sum(len(r['target_only_keys']) for r in shard_results)
+    xor_common_keys_cnt = sum(r['xor_common_keys_cnt'] for r in shard_results)
+
+    # first pairs of all shards sorted again, index as in the concatenation of deduplicated frames
+    heads = [(i, r) for i, r in enumerate(shard_results) if not r['multi_head'].empty]
+    if heads:
+        dropped = {
+            side: np.sort(np.concatenate(global_positions(side, 'dropped_positions', parts)))
+            for side, parts in (('source', source_parts), ('target', target_parts))
+        }
+        labels = []
+        for i, r in heads:
+            is_source = r['multi_head_is_source']
+            local = r['multi_head_positions']
+            source_global = source_parts[i][local[is_source]]
+            target_global = target_parts[i][local[~is_source]]
+            shard_labels = np.empty(len(local), dtype=np.int64)
+            shard_labels[is_source] = source_global - np.searchsorted(dropped['source'], source_global)
+            shard_labels[~is_source] = source_clean_cnt + target_global - np.searchsorted(dropped['target'], target_global)
+            labels.append(shard_labels)
+        xor_df_multi_example = pd.concat([r['multi_head'] for _, r in heads], ignore_index=True)
+        xor_df_multi_example.index = pd.Index(np.concatenate(labels))
+        xor_df_multi_example = xor_df_multi_example.sort_values(
+            by=key_columns + ['xflg'],
+            ascending=[False] * len(key_columns) + [True]
+        ).head(max_examples*2)
+    else:
+        xor_df_multi_example = pd.DataFrame()
+
+    non_key_columns = compare_dataframes_meta(source_df, target_df, key_columns)
+    diff_counters, diff_examples = _merge_column_discrepancies(shard_results, non_key_columns, max_examples)
+
+    comparison_stats, comparison_diff_detais = build_comparison_result(
+        len(source_df), len(target_df), source_clean_cnt, target_clean_cnt,
+        xor_common_keys_cnt, source_only_cnt, target_only_cnt,
+        dup_keys_examples['source'], dup_keys_examples['target'],
+        format_keys(xor_source_only_keys, max_examples), format_keys(xor_target_only_keys, max_examples),
+        xor_df_multi_example, non_key_columns,
+        lambda common_keys_cnt: summarize_column_discrepancies(diff_counters, diff_examples, common_keys_cnt)
+    )
+
+    app_logger.info('end')
+    return comparison_stats, comparison_diff_detais
@@ -0,0 +1,319 @@
+"""
+Polars implementation of the comparison core (prepare, clean recently changed, compare).
+
+Works on Arrow memory with multi-threaded expressions, results are the same
+ComparisonStats/ComparisonDiffDetails as pandas implementation in utils.py,
+detail frames are converted to pandas for the report
+"""
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError:
+    # optional dependency, polars backend can not be selected without it
+    pl = None
+
+try:
+    from .constants import NULL_REPLACEMENT, DEFAULT_MAX_EXAMPLES
+    from .logger import app_logger
+    from .utils import (
+        ComparisonStats,
+        ComparisonDiffDetails,
+        compare_dataframes_meta,
+        format_keys,
+        prepare_dataframe as prepare_dataframe_pandas,
+    )
+except ImportError:
+    # for cases when used as standalone script
+    from constants import NULL_REPLACEMENT, DEFAULT_MAX_EXAMPLES
+    from logger import app_logger
+    from utils import (
+        ComparisonStats,
+        ComparisonDiffDetails,
+        compare_dataframes_meta,
+        format_keys,
+        prepare_dataframe as prepare_dataframe_pandas,
+    )
+
+# the same as null-like strings pattern of pandas prepare_dataframe,
+#   python `$` also matches before trailing newline and python `\s` includes \x1c-\x1f
+NULL_LIKE_PATTERN = r'(?i)^(?:None|nan|[\s\x1c-\x1f]*)(\n?)$'
+INT64_LIMIT = 2 ** 63
+
+
+def check_polars() -> None:
+    if pl is None:
+        raise ImportError("polars (and pyarrow) is required for polars backend: pip install polars pyarrow")
+
+
+def _prepare_column(series: pd.Series) -> 'pl.Series':
+    """
+    Column as polars strings with the same values as pandas prepare_dataframe gives,
+    vectorized for common dtypes, other columns go through pandas implementation
+    """
+    name = series.name
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        if not series.hasnans:
+            return pl.Series(name, series.to_numpy()).cast(pl.Utf8).replace({'true': 'True', 'false': 'False'})
+
+    elif pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype=np.float64)
+        is_integer = np.isfinite(values) & (values == np.floor(values))
+        if not (np.abs(values[is_integer]) >= INT64_LIMIT).any():
+            # pandas prepare keeps float dtype (and '.0') unless every value is integer
+            if is_integer.all():
+                return pl.Series(name, values.astype(np.int64)).cast(pl.Utf8)
+            strings = series.astype(str).to_numpy(dtype=object)
+            strings[np.isnan(values)] = NULL_REPLACEMENT
+            return pl.Series(name, strings, dtype=pl.Utf8)
+
+    elif series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+        return (
+            pl.from_pandas(series.where(series.notna(), None).astype(object))
+            .cast(pl.Utf8)
+            .fill_null(NULL_REPLACEMENT)
+            .str.replace(NULL_LIKE_PATTERN, f'{NULL_REPLACEMENT}$1')
+            .alias(name)
+        )
+
+    return pl.Series(name, prepare_dataframe_pandas(series.to_frame())[name].to_numpy(dtype=object), dtype=pl.Utf8)
+
+
+def prepare_dataframe(df: pd.DataFrame) -> 'pl.DataFrame':
+    """Prepare DataFrame for comparison by handling nulls and empty strings, returns polars DataFrame of strings"""
+    check_polars()
+    return pl.DataFrame([_prepare_column(df[column]) for column in df.columns])
+
+
+def clean_recently_changed_data(df1: 'pl.DataFrame', df2: 'pl.DataFrame', primary_keys: List[str]):
+    """
+    Mutually removes rows with recently changed records
+
+    Parameters:
+        df1, df2: polars.DataFrame
+        primary_keys: list
+
+    Returns:
+        tuple: (df1_processed, df2_processed)
+    """
+    app_logger.info(f'before exclusion recently changed rows source: {len(df1)}, target {len(df2)}')
+
+    excluded_keys = pl.concat([
+        df1.filter(pl.col('xrecently_changed') == 'y').select(primary_keys),
+        df2.filter(pl.col('xrecently_changed') == 'y').select(primary_keys),
+    ]).unique()
+
+    # anti join keeps order of rows, it matters for duplicates (first one is compared)
+    df1_processed = df1.join(excluded_keys, on=primary_keys, how='anti', maintain_order='left').drop('xrecently_changed')
+    df2_processed = df2.join(excluded_keys, on=primary_keys, how='anti', maintain_order='left').drop('xrecently_changed')
+
+    app_logger.info(f'after exclusion recently changed rows source: {len(df1_processed)}, target {len(df2_processed)}')
+
+    return df1_processed, df2_processed
+
+
+def analyze_column_discrepancies(df: 'pl.DataFrame', primary_key_columns: List[str], value_columns: List[str],
+                                 common_keys_cnt: int, examples_count: int = 3):
+    """
+    Vectorized version of utils.analyze_column_discrepancies:
+    df holds (source, target) row pairs one after another, sorted by key
+    """
+    metrics = {'max_pct': 0.0, 'median_pct': 0.0}
+
+    source_rows = df.gather_every(2)
+    target_rows = df.gather_every(2, offset=1)
+    pairs_cnt = min(len(source_rows), len(target_rows))
+    source_rows, target_rows = source_rows.head(pairs_cnt), target_rows.head(pairs_cnt)
+
+    mismatches = pl.DataFrame([
+        source_rows[col].ne_missing(target_rows[col]).alias(col) for col in value_columns
+    ]) if value_columns else pl.DataFrame()
+
+    # counters are ordered by the first mismatch as pandas scan does, examples by column order
+    counters = []
+    diff_records = []
+    for position, col in enumerate(value_columns):
+        mismatch = mismatches[col]
+        mismatch_count = int(mismatch.sum())
+        if not mismatch_count:
+            continue
+        first_mismatch = int(mismatch.arg_true()[0])
+        counters.append((first_mismatch, position, col, mismatch_count))
+
+        example_rows = mismatch.arg_true().head(examples_count)
+        keys = source_rows[primary_key_columns][example_rows].rows()
+        for key, src_val, trg_val in zip(keys, source_rows[col][example_rows], target_rows[col][example_rows]):
+            diff_records.append({
+                'primary_key': key if len(primary_key_columns) > 1 else key[0],
+                'column_name': col,
+                'source_value': src_val,
+                'target_value': trg_val,
+            })
+    counters.sort()
+
+    if counters:
+        values = (np.array([counter[3] for counter in counters]) / common_keys_cnt) * 100
+        metrics['max_pct'] = float(values.max())
+        metrics['median_pct'] = float(np.median(values))
+
+    df_diff_examples = pd.DataFrame(diff_records)
+    df_diff_counters = pd.DataFrame(
+        [(counter[2], counter[3]) for counter in counters],
+        columns=['column_name', 'mismatch_count']
+    )
+    return metrics, df_diff_examples, df_diff_counters
+
+
+def _keys_set(df: 'pl.DataFrame', key_columns: List[str]) -> set:
+    return set(df.select(key_columns).rows())
+
+
+def compare_dataframes(
+    source_df: 'pl.DataFrame',
+    target_df: 'pl.DataFrame',
+    key_columns: List[str],
+    max_examples: int = DEFAULT_MAX_EXAMPLES
+) -> Tuple[Optional[ComparisonStats], Optional[ComparisonDiffDetails]]:
+    """
+    Polars version of utils.compare_dataframes with the same statistics and details,
+    detail frames are pandas DataFrames
+    """
+    app_logger.info('start')
+    check_polars()
+
+    if source_df.is_empty() and target_df.is_empty():
+        return None, None
+    for side, df in (('source', source_df), ('target', target_df)):
+        missing = [col for col in key_columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"Key columns missing in {side}: {missing}")
+
+    source_dup_keys = _keys_set(source_df.filter(source_df.select(key_columns).is_duplicated()), key_columns)
+    target_dup_keys = _keys_set(target_df.filter(target_df.select(key_columns).is_duplicated()), key_columns)
+    source_dup_keys_examples = format_keys(source_dup_keys, max_examples)
+    target_dup_keys_examples = format_keys(target_dup_keys, max_examples)
+
+    source_clean = source_df.unique(subset=key_columns, keep='first', maintain_order=True)
+    target_clean = target_df.unique(subset=key_columns, keep='first', maintain_order=True)
+
+    source_dup_cnt = len(source_df) - len(source_clean)
+    target_dup_cnt = len(target_df) - len(target_clean)
+
+    non_key_columns = compare_dataframes_meta(source_clean, target_clean, key_columns)
+
+    combined = pl.concat([
+        source_clean.with_columns(xflg=pl.lit('src')),
+        target_clean.with_columns(xflg=pl.lit('trg')),
+    ], how='diagonal')
+    # symmetrical difference between two datasets, sorted
+    xor_combined_sorted = (
+        combined
+        .filter(~combined.select(key_columns + non_key_columns).is_duplicated())
+        .with_columns(xcount_pairs=pl.len().over(key_columns))
+        .sort(key_columns + ['xflg'], descending=[True] * len(key_columns) + [False])
+    )
+
+    xor_df_multi = xor_combined_sorted.filter(pl.col('xcount_pairs') > 1)
+    xor_single = xor_combined_sorted.filter(pl.col('xcount_pairs') == 1)
+    xor_source_only = xor_single.filter(pl.col('xflg') == 'src')
+    xor_target_only = xor_single.filter(pl.col('xflg') == 'trg')
+
+    xor_common_keys_cnt = len(xor_df_multi) // 2
+    xor_source_only_keys_cnt = len(xor_source_only)
+    xor_target_only_keys_cnt = len(xor_target_only)
+
+    # take n pairs that is why examples x2
+    xor_df_multi_example = xor_df_multi.head(max_examples * 2).drop('xcount_pairs').to_pandas() \
+        if not xor_df_multi.is_empty() else pd.DataFrame()
+
+    # the largest keys as in the pandas core, rows of one side only are sorted by key desc already
+    xor_source_only_keys_examples = format_keys(_keys_set(xor_source_only.head(max_examples), key_columns), max_examples)
+    xor_target_only_keys_examples = format_keys(_keys_set(xor_target_only.head(max_examples), key_columns), max_examples)
+
+    common_keys_cnt = int((len(source_clean) - xor_source_only_keys_cnt + len(target_clean) - xor_target_only_keys_cnt) / 2)
+
+    if not common_keys_cnt:
+        # Special case when there is no matched primary keys at all
+        comparison_stats = ComparisonStats(
+            total_source_rows=len(source_df),
+            total_target_rows=len(target_df),
+            dup_source_rows=source_dup_cnt,
+            dup_target_rows=target_dup_cnt,
+            only_source_rows=xor_source_only_keys_cnt,
+            only_target_rows=xor_target_only_keys_cnt,
+            common_pk_rows=0,
+            total_matched_rows=0,
+            dup_source_percentage_rows=100,
+            dup_target_percentage_rows=100,
+            source_only_percentage_rows=100,
+            target_only_percentage_rows=100,
+            total_diff_percentage_rows=100,
+            max_diff_percentage_cols=100,
+            median_diff_percentage_cols=100,
+            final_diff_score=100,
+            final_score=0
+        )
+        comparison_diff_details = ComparisonDiffDetails(
+            mismatches_per_column=pd.DataFrame(),
+            discrepancies_per_col_examples=pd.DataFrame(),
+            dup_source_keys_examples=source_dup_keys_examples,
+            dup_target_keys_examples=target_dup_keys_examples,
+            common_attribute_columns=non_key_columns,
+            source_only_keys_examples=xor_source_only_keys_examples,
+            target_only_keys_examples=xor_target_only_keys_examples,
+            discrepant_data_examples=pd.DataFrame())
+        app_logger.info('end')
+        return comparison_stats, comparison_diff_details
+
+    total_matched_records_cnt = common_keys_cnt - xor_common_keys_cnt
+
+    source_only_percentage = (xor_source_only_keys_cnt / common_keys_cnt) * 100
+    target_only_percentage = (xor_target_only_keys_cnt / common_keys_cnt) * 100
+
+    source_dup_percentage = (source_dup_cnt / len(source_df)) * 100
+    target_dup_percentage = (target_dup_cnt / len(target_df)) * 100
+
+    diff_col_metrics, diff_col_examples, diff_col_counters = analyze_column_discrepancies(
+        xor_df_multi, key_columns, non_key_columns, common_keys_cnt, max_examples
+    )
+
+    source_and_target_total_diff_percentage = (1 - total_matched_records_cnt / common_keys_cnt) * 100
+
+    final_diff_score = source_dup_percentage * 0.1 + target_dup_percentage * 0.1 + \
+                       source_only_percentage * 0.15 + target_only_percentage * 0.15 + \
+                       source_and_target_total_diff_percentage * 0.5
+
+    comparison_stats = ComparisonStats(
+        total_source_rows=len(source_df),
+        total_target_rows=len(target_df),
+        dup_source_rows=source_dup_cnt,
+        dup_target_rows=target_dup_cnt,
+        only_source_rows=xor_source_only_keys_cnt,
+        only_target_rows=xor_target_only_keys_cnt,
+        common_pk_rows=common_keys_cnt,
+        total_matched_rows=total_matched_records_cnt,
+        dup_source_percentage_rows=source_dup_percentage,
+        dup_target_percentage_rows=target_dup_percentage,
+        source_only_percentage_rows=source_only_percentage,
+        target_only_percentage_rows=target_only_percentage,
+        total_diff_percentage_rows=source_and_target_total_diff_percentage,
+        max_diff_percentage_cols=diff_col_metrics['max_pct'],
+        median_diff_percentage_cols=diff_col_metrics['median_pct'],
+        final_diff_score=final_diff_score,
+        final_score=100 - final_diff_score
+    )
+
+    comparison_diff_details = ComparisonDiffDetails(
+        mismatches_per_column=diff_col_counters,
+        discrepancies_per_col_examples=diff_col_examples,
+        dup_source_keys_examples=source_dup_keys_examples,
+        dup_target_keys_examples=target_dup_keys_examples,
+        source_only_keys_examples=xor_source_only_keys_examples,
+        target_only_keys_examples=xor_target_only_keys_examples,
+        discrepant_data_examples=xor_df_multi_example,
+        common_attribute_columns=non_key_columns)
+
+    app_logger.info('end')
+    return comparison_stats, comparison_diff_details
@@ -0,0 +1,187 @@
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    from .constants import DATE_FORMAT, DATETIME_FORMAT, DEFAULT_MAX_EXAMPLES
+    from .utils import format_query_hints
+except ImportError:
+    # for cases when used as standalone script
+    from constants import DATE_FORMAT, DATETIME_FORMAT, DEFAULT_MAX_EXAMPLES
+    from utils import format_query_hints
+
+# metric name by the prefix of the positional alias of BaseDatabaseAdapter.build_profile_query
+PROFILE_METRICS = {
+    'xnn': 'non_null_count',
+    'xmin': 'min',
+    'xmax': 'max',
+    'xsum': 'sum',
+    'xhash': 'hash',
+}
+# pseudo column of the daily row count
+ROWS_COLUMN = '*'
+
+
+@dataclass
+class ProfileComparisonDetails:
+    # dt, column_name, metric, source_value, target_value of every mismatched profile metric
+    mismatches: pd.DataFrame
+    # column_name, mismatched_days, metrics
+    mismatches_per_column: pd.DataFrame
+    profiled_columns: List[str]
+    compared_days: int
+    mismatched_days: int
+    discrepancies_percentage: float
+    skipped_source_columns: List[str] = field(default_factory=list)
+    skipped_target_columns: List[str] = field(default_factory=list)
+
+
+def unpack_profile(profile: pd.DataFrame, columns: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Frames of every metric (and 'count' of rows) indexed by day with original column names
+    instead of the positional aliases, missing columns are metrics the type has no profile for
+    """
+    profile = profile.rename(columns=str.lower)
+    profile.index = pd.Index(pd.to_datetime(profile['dt'], format=DATE_FORMAT).dt.strftime(DATE_FORMAT), name='dt')
+    metrics = {'count': profile[['cnt']].rename(columns={'cnt': ROWS_COLUMN})}
+    for prefix, metric in PROFILE_METRICS.items():
+        aliases = {f'{prefix}_{i}': col for i, col in enumerate(columns) if f'{prefix}_{i}' in profile.columns}
+        metrics[metric] = profile[list(aliases)].rename(columns=aliases)
+    return metrics
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NA or value is pd.NaT
+
+
+def profile_values_equal(metric: str, source_value, target_value) -> bool:
+    """
+    Sums of fractional numbers are equal up to the rounding of the summation order,
+    hash sums may come as exact integers or floats depending on the driver
+    """
+    if _is_missing(source_value) or _is_missing(target_value):
+        return _is_missing(source_value) and _is_missing(target_value)
+    if metric == 'sum':
+        return math.isclose(float(source_value), float(target_value), rel_tol=1e-9, abs_tol=1e-9)
+    if metric == 'hash':
+        return float(source_value) == float(target_value)
+    if metric in ('count', 'non_null_count'):
+        return int(source_value) == int(target_value)
+    return source_value == target_value
+
+
+def compare_column_profiles(source_metrics: Dict[str, pd.DataFrame], target_metrics: Dict[str, pd.DataFrame],
+                            columns: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame, int, int]:
+    """
+    Mismatched metrics of every day and column, metrics present on one side only
+    (type profiles differ between DBMS) are not compared. Days of one side only differ by row count.
+    Returns (mismatches, mismatches_per_column, compared days, mismatched (day, column) cells)
+    """
+    days = source_metrics['count'].index.union(target_metrics['count'].index).sort_values(ascending=False)
+    rows = []
+    for metric in ['count'] + list(PROFILE_METRICS.values()):
+        source, target = source_metrics[metric], target_metrics[metric]
+        source_counts, target_counts = source_metrics['count'].reindex(days), target_metrics['count'].reindex(days)
+        for col in [ROWS_COLUMN] if metric == 'count' else columns:
+            if col not in source.columns or col not in target.columns:
+                continue
+            source_values, target_values = source[col].reindex(days), target[col].reindex(days)
+            for day, source_value, target_value in zip(days, source_values, target_values):
+                # day of one side only has zero rows and nulls counted on the other side
+                if metric in ('count', 'non_null_count'):
+                    source_value = 0 if pd.isna(source_counts.loc[day, ROWS_COLUMN]) else source_value
+                    target_value = 0 if pd.isna(target_counts.loc[day, ROWS_COLUMN]) else target_value
+                if not profile_values_equal(metric, source_value, target_value):
+                    rows.append((day, col, metric, source_value, target_value))
+
+    mismatches = pd.DataFrame(rows, columns=['dt', 'column_name', 'metric', 'source_value', 'target_value'])
+    order = {col: i for i, col in enumerate([ROWS_COLUMN] + columns)}
+    mismatches = mismatches.sort_values(
+        ['dt', 'column_name'], ascending=[False, True], key=lambda s: s.map(order) if s.name == 'column_name' else s,
+        kind='stable', ignore_index=True
+    )
+    mismatches_per_column = (
+        mismatches.groupby('column_name', sort=False)
+        .agg(mismatched_days=('dt', 'nunique'), metrics=('metric', lambda m: ', '.join(dict.fromkeys(m))))
+        .reset_index()
+    )
+    mismatched_cells = len(mismatches[['dt', 'column_name']].drop_duplicates())
+    return mismatches, mismatches_per_column, len(days), mismatched_cells
+
+
+def build_profile_result(source_metrics: Dict[str, pd.DataFrame], target_metrics: Dict[str, pd.DataFrame],
+                         columns: List[str]) -> ProfileComparisonDetails:
+    """ProfileComparisonDetails, discrepancies percentage is the share of mismatched (day, column) cells"""
+    mismatches, mismatches_per_column, compared_days, mismatched_cells = \
+        compare_column_profiles(source_metrics, target_metrics, columns)
+    cells = compared_days * (len(columns) + 1)
+    return ProfileComparisonDetails(
+        mismatches=mismatches,
+        mismatches_per_column=mismatches_per_column,
+        profiled_columns=columns,
+        compared_days=compared_days,
+        mismatched_days=mismatches['dt'].nunique(),
+        discrepancies_percentage=100*mismatched_cells/cells if cells else 0.0,
+    )
+
+
+def generate_comparison_profile_report(source_table: str,
+                                       target_table: str,
+                                       details: ProfileComparisonDetails,
+                                       timezone: str,
+                                       max_examples: int = DEFAULT_MAX_EXAMPLES,
+                                       source_query: str = None,
+                                       source_params: Dict = None,
+                                       target_query: str = None,
+                                       target_params: Dict = None,
+                                       query_hints: Optional[Dict[str, Dict]] = None) -> str:
+    """Generates column profile comparison report"""
+    rl = []
+    rl.append("=" * 80)
+    current_datetime = datetime.now()
+    rl.append(current_datetime.strftime(DATETIME_FORMAT))
+    rl.append(f"PROFILE COMPARISON REPORT:")
+    rl.append(f"{source_table}")
+    rl.append(f"VS")
+    rl.append(f"{target_table}")
+    rl.append("=" * 80)
+
+    if source_query and target_query:
+        rl.append(f"timezone: {timezone}")
+        rl.append(f"    {source_query}")
+        if source_params:
+            rl.append(f"    params: {source_params}")
+        rl.append("-" * 40)
+        rl.append(f"    {target_query}")
+        if target_params:
+            rl.append(f"    params: {target_params}")
+    if query_hints and any(query_hints.values()):
+        rl.append(format_query_hints(query_hints))
+    rl.append("-" * 40)
+
+    rl.append(f"\nSUMMARY:")
+    rl.append(f"  Compared days: {details.compared_days}")
+    rl.append(f"  Profiled columns: {len(details.profiled_columns)}")
+    rl.append(f"  Mismatched days: {details.mismatched_days}")
+    rl.append(f"  Mismatched columns: {len(details.mismatches_per_column)}")
+    rl.append(f"  Discrepancies percentage (day x column): {details.discrepancies_percentage:.5f}%")
+    rl.append(f"  Final data quality score: {(100-details.discrepancies_percentage):.5f}")
+
+    if details.skipped_source_columns:
+        rl.append(f"Skipped source columns: {', '.join(details.skipped_source_columns)}")
+    if details.skipped_target_columns:
+        rl.append(f"Skipped target columns: {', '.join(details.skipped_target_columns)}")
+
+    if not details.mismatches_per_column.empty:
+        rl.append(f"\nCOLUMN PROFILE DIFFERENCES ('{ROWS_COLUMN}' is the row count):")
+        rl.append(details.mismatches_per_column.to_string(index=False))
+
+        rl.append(f"\nDISCREPANT PROFILES (first days per column):")
+        examples = details.mismatches.groupby('column_name', sort=False).head(max_examples)
+        rl.append(examples.to_string(index=False))
+    rl.append("=" * 80)
+
+    return "\n".join(rl)
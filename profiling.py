@@ -0,0 +1,222 @@
+import os
+import io
+import re
+import sys
+import time
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import List, Optional
+import pandas as pd
+
+try:
+    from .constants import DEFAULT_PROFILE_TOP_N
+    from .exceptions import ComparisonCancelled
+    from .logger import app_logger
+except ImportError:
+    # for cases when used as standalone script
+    from constants import DEFAULT_PROFILE_TOP_N
+    from exceptions import ComparisonCancelled
+    from logger import app_logger
+
+try:
+    import resource
+except ImportError:
+    # not available on windows, peak memory is not collected there
+    resource = None
+
+
+@dataclass
+class PhaseProfile:
+    """Resources spent by one phase of a comparison"""
+    phase: str
+    side: Optional[str] = None
+    calls: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    # peak of memory allocated by python and numpy during the phase above its start (tracemalloc),
+    # None when allocations are not traced
+    peak_memory: Optional[int] = None
+    # process lifetime peak resident memory observed at the end of the phase
+    process_peak_rss: Optional[int] = None
+
+
+def get_process_peak_rss() -> Optional[int]:
+    """Process lifetime peak resident set size in bytes"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macos bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@dataclass
+class ComparisonProfile:
+    """
+    Per phase and per side profile of a comparison (or aggregate of several comparisons)
+
+    Phases: metadata, query, convert_types, prepare_dataframe, clean_recently_changed,
+    compare_dataframes, report. Side is 'source', 'target' or None for phases over both datasets
+    """
+    phases: List[PhaseProfile] = field(default_factory=list)
+    # path of cProfile dump when comparison was run with profile_dir
+    dump_path: Optional[str] = None
+    _active: List[PhaseProfile] = field(default_factory=list, repr=False, compare=False)
+    # [traced memory at the start, peak so far] of the active phases while tracemalloc is tracing
+    _memory_marks: List[List[int]] = field(default_factory=list, repr=False, compare=False)
+    # threading.Event of the async comparator, no new phase is started once it is set.
+    # Not a field: asdict of the stats would deepcopy its lock
+    cancel_event = None
+
+    def _get_phase(self, name: str, side: Optional[str]) -> PhaseProfile:
+        for phase in self.phases:
+            if phase.phase == name and phase.side == side:
+                return phase
+        phase = PhaseProfile(name, side)
+        self.phases.append(phase)
+        return phase
+
+    @contextmanager
+    def phase(self, name: str, side: Optional[str] = None):
+        """
+        Measure wall and cpu time of the block, repeated phases are accumulated.
+        Peak memory of the phase is measured while tracemalloc is tracing
+        """
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ComparisonCancelled(f'comparison cancelled before phase {name}')
+        phase = self._get_phase(name, side)
+        self._active.append(phase)
+        memory_mark = self._start_memory()
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield phase
+        finally:
+            phase.calls += 1
+            phase.wall_time += time.perf_counter() - start_wall
+            phase.cpu_time += time.process_time() - start_cpu
+            peak_memory = self._stop_memory(memory_mark)
+            if peak_memory is not None:
+                phase.peak_memory = max(phase.peak_memory or 0, peak_memory)
+            phase.process_peak_rss = get_process_peak_rss()
+            self._active.pop()
+
+    def _start_memory(self) -> Optional[List[int]]:
+        """Reset the traced peak for the new phase, the peak reached by the enclosing phases is kept in their marks"""
+        if not tracemalloc.is_tracing():
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        for mark in self._memory_marks:
+            mark[1] = max(mark[1], peak)
+        tracemalloc.reset_peak()
+        mark = [current, current]
+        self._memory_marks.append(mark)
+        return mark
+
+    def _stop_memory(self, mark: Optional[List[int]]) -> Optional[int]:
+        """Peak traced memory of the phase above its start"""
+        if mark is None:
+            return None
+        self._memory_marks.pop()
+        if not tracemalloc.is_tracing():
+            return None
+        peak = tracemalloc.get_traced_memory()[1]
+        for enclosing in self._memory_marks:
+            enclosing[1] = max(enclosing[1], peak)
+        return max(mark[1], peak) - mark[0]
+
+    def add_fetched(self, rows: int, size_bytes: int) -> None:
+        """Account fetched rows and bytes to the innermost active phase"""
+        if self._active:
+            self._active[-1].rows += rows
+            self._active[-1].bytes += size_bytes
+
+    def aggregate(self, other: 'ComparisonProfile') -> None:
+        """Add phases of another profile to this one"""
+        for other_phase in other.phases:
+            phase = self._get_phase(other_phase.phase, other_phase.side)
+            phase.calls += other_phase.calls
+            phase.wall_time += other_phase.wall_time
+            phase.cpu_time += other_phase.cpu_time
+            phase.rows += other_phase.rows
+            phase.bytes += other_phase.bytes
+            if other_phase.peak_memory is not None:
+                phase.peak_memory = max(phase.peak_memory or 0, other_phase.peak_memory)
+            if other_phase.process_peak_rss is not None:
+                phase.process_peak_rss = max(phase.process_peak_rss or 0, other_phase.process_peak_rss)
+
+    @property
+    def total_wall_time(self) -> float:
+        return sum(phase.wall_time for phase in self.phases)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Phases as dataframe, one row per phase and side"""
+        columns = ['phase', 'side', 'calls', 'wall_time', 'cpu_time', 'rows', 'bytes', 'peak_memory', 'process_peak_rss']
+        return pd.DataFrame([[getattr(p, c) for c in columns] for p in self.phases], columns=columns)
+
+    def summary(self) -> str:
+        """Human readable table of phases"""
+        if not self.phases:
+            return 'no phases recorded'
+        df = self.to_frame()
+        df['side'] = df['side'].fillna('')
+        df['wall_time'] = df['wall_time'].round(3)
+        df['cpu_time'] = df['cpu_time'].round(3)
+        return df.to_string(index=False)
+
+
+class HotPathProfiler:
+    """
+    cProfile of a single comparison
+
+    The dump (when `profile_dir` is set) can be opened with pstats, snakeviz etc,
+    top N functions by cumulative time are returned by `stop` for the log.
+    Allocations are traced meanwhile (unless already traced), so the phases get their peak memory
+    """
+
+    def __init__(self, label: str, profile_dir: Optional[str] = None, top_n: int = DEFAULT_PROFILE_TOP_N):
+        self.label = label
+        self.profile_dir = profile_dir
+        self.top_n = top_n
+        self.dump_path = None
+        self._profiler = None
+        self._tracing = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # another profiler is already active (e.g. nested comparisons or external profiler)
+            app_logger.warning(f'cProfile is not started: {str(e)}')
+            return
+        self._profiler = profiler
+
+    def stop(self) -> Optional[str]:
+        """Stop profiling, write the dump and return top N hot functions"""
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        if self._profiler is None:
+            return None
+        self._profiler.disable()
+
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            label = re.sub(r'[^\w.-]+', '_', self.label)
+            now = time.time()
+            timestamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(now)) + f'{now % 1:.3f}'[1:]
+            self.dump_path = os.path.join(self.profile_dir, f'{label}_{timestamp}_{os.getpid()}.prof')
+            self._profiler.dump_stats(self.dump_path)
+
+        output = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        self._profiler = None
+        return output.getvalue()
@@ -0,0 +1,101 @@
+import pandas as pd
+from typing import Dict, List, Tuple
+
+try:
+    from .utils import (
+        ComparisonStats,
+        ComparisonDiffDetails,
+        summarize_column_discrepancies,
+        build_comparison_result,
+        format_keys,
+    )
+except ImportError:
+    # for cases when used as standalone script
+    from utils import (
+        ComparisonStats,
+        ComparisonDiffDetails,
+        summarize_column_discrepancies,
+        build_comparison_result,
+        format_keys,
+    )
+
+
+def split_pushdown_examples(examples: pd.DataFrame, key_columns: List[str], value_columns: List[str]
+                           ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Split rows of the pushdown examples query into source and target rows (key and value columns
+    with original names, to be converted and prepared as usual) and the service flags and ranks
+    """
+    examples = examples.rename(columns=str.lower).reset_index(drop=True)
+    keys = {f'xk_{col}': col for col in key_columns}
+    source = examples[list(keys) + [f'xs_{col}' for col in value_columns]].rename(
+        columns={**keys, **{f'xs_{col}': col for col in value_columns}})
+    target = examples[list(keys) + [f'xt_{col}' for col in value_columns]].rename(
+        columns={**keys, **{f'xt_{col}': col for col in value_columns}})
+    flags = examples.drop(columns=list(keys) + [f'{side}_{col}' for side in ('xs', 'xt') for col in value_columns])
+    return source, target, flags
+
+
+def build_pushdown_result(summary: pd.DataFrame, source: pd.DataFrame, target: pd.DataFrame, flags: pd.DataFrame,
+                          key_columns: List[str], value_columns: List[str], max_examples: int
+                         ) -> Tuple[ComparisonStats, ComparisonDiffDetails]:
+    """
+    ComparisonStats and ComparisonDiffDetails from the pushdown summary row and the prepared
+    source/target example rows (same row order as flags)
+    """
+    counters = {col: 0 if pd.isna(value) else int(value)
+                for col, value in summary.rename(columns=str.lower).iloc[0].items()}
+    if not counters['xs_total_rows'] and not counters['xt_total_rows']:
+        return None, None
+    flags = flags.astype({col: 'int64' for col in flags.columns})
+
+    def keys_of(mask: pd.Series, rank: str) -> set:
+        rows = source.loc[mask, key_columns].assign(xrank=flags.loc[mask, rank]).sort_values('xrank')
+        return set(rows[key_columns].itertuples(index=False, name=None))
+
+    def key_value(i: int):
+        key = tuple(source.loc[i, key_columns])
+        return key if len(key) > 1 else key[0]
+
+    both = (flags['xin_s'] == 1) & (flags['xin_t'] == 1)
+    only_source_keys = keys_of((flags['xin_s'] == 1) & (flags['xin_t'] == 0) & (flags['xrank'] <= max_examples), 'xrank')
+    only_target_keys = keys_of((flags['xin_s'] == 0) & (flags['xin_t'] == 1) & (flags['xrank'] <= max_examples), 'xrank')
+    # keys are the joined key columns, prepared along with source rows
+    dup_source_keys = keys_of((flags['xs_cnt'] > 1) & (flags['xrank_dup_s'] <= max_examples), 'xrank_dup_s')
+    dup_target_keys = keys_of((flags['xt_cnt'] > 1) & (flags['xrank_dup_t'] <= max_examples), 'xrank_dup_t')
+
+    # first mismatched pairs sorted by primary key and dataset
+    mismatched = flags.index[both & (flags['xdiff'] == 1) & (flags['xrank'] <= max_examples)]
+    mismatched = sorted(mismatched, key=lambda i: flags.loc[i, 'xrank'])
+    if mismatched:
+        xor_df_multi_example = pd.concat([
+            source.loc[mismatched].assign(xflg='src', xorder=range(0, 2*len(mismatched), 2)),
+            target.loc[mismatched].assign(xflg='trg', xorder=range(1, 2*len(mismatched), 2)),
+        ]).sort_values('xorder').drop(columns='xorder').reset_index(drop=True)
+    else:
+        xor_df_multi_example = pd.DataFrame()
+
+    diff_counters: Dict[str, int] = {}
+    diff_examples = {col: [] for col in value_columns}
+    first_mismatch = {}
+    for col in value_columns:
+        if not counters[f'xd_{col}']:
+            continue
+        diff_counters[col] = counters[f'xd_{col}']
+        rows = flags.index[(flags[f'xd_{col}'] == 1) & (flags[f'xrank_{col}'] <= max_examples)]
+        rows = sorted(rows, key=lambda i: flags.loc[i, f'xrank_{col}'])
+        diff_examples[col] = [{'pk': key_value(i), 'src_val': source.loc[i, col], 'trg_val': target.loc[i, col]}
+                              for i in rows]
+        first_mismatch[col] = flags.loc[rows[0], 'xrank'] if rows else 0
+    # counters ordered by the first mismatch as in the scan over sorted pairs
+    diff_counters = {col: diff_counters[col] for col in sorted(diff_counters, key=lambda col: first_mismatch[col])}
+
+    return build_comparison_result(
+        counters['xs_total_rows'], counters['xt_total_rows'],
+        counters['xs_total_rows'] - counters['xs_dup_rows'], counters['xt_total_rows'] - counters['xt_dup_rows'],
+        counters['mismatched_rows'], counters['xs_only_rows'], counters['xt_only_rows'],
+        format_keys(dup_source_keys, max_examples), format_keys(dup_target_keys, max_examples),
+        format_keys(only_source_keys, max_examples), format_keys(only_target_keys, max_examples),
+        xor_df_multi_example, value_columns,
+        lambda common_keys_cnt: summarize_column_discrepancies(diff_counters, diff_examples, common_keys_cnt)
+    )
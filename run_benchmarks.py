@@ -0,0 +1,519 @@
+"""
+Micro-benchmarks of the comparison engine on synthetic data
+
+    python3 run_benchmarks.py                                  # quick suite, print timings
+    python3 run_benchmarks.py --save-baseline bench.json       # store baseline
+    python3 run_benchmarks.py --baseline bench.json            # compare, exit code 1 on regression
+    python3 run_benchmarks.py --suite full --filter compare_dataframes
+    python3 run_benchmarks.py --rows 1000000,5000000 --key-type uuid --mismatch-ratio 0,0.5
+    python3 run_benchmarks.py --engine sqlite,duckdb --rows 10000000     # end-to-end on local databases
+    python3 run_benchmarks.py --backend pandas,polars --filter compare_dataframes,prepare_dataframe
+    python3 run_benchmarks.py --workers 8 --filter compare_dataframes     # multi-process comparison core
+
+Baselines are machine specific, compare only runs made on the same host.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import importlib
+import itertools
+import tempfile
+import statistics
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import sqlalchemy
+
+# benchmark the checkout itself, not an installed version of the package
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+xoverrr = importlib.import_module(os.path.basename(ROOT))
+utils = importlib.import_module(f'{xoverrr.__name__}.utils')
+adapters = importlib.import_module(f'{xoverrr.__name__}.adapters')
+logger = importlib.import_module(f'{xoverrr.__name__}.logger')
+backends = importlib.import_module(f'{xoverrr.__name__}.backends')
+parallel = importlib.import_module(f'{xoverrr.__name__}.parallel')
+
+KEY_TYPES = ('int', 'uuid', 'compound')
+# embedded databases for end-to-end runs (duckdb needs duckdb_engine)
+LOCAL_ENGINES = ('sqlite', 'duckdb')
+# value column kinds, cycled over the requested column count
+COLUMN_KINDS = ('str', 'float', 'int', 'datetime', 'bool')
+
+# column data types as returned by metadata queries of each adapter
+ADAPTER_TYPES = {
+    'oracle': {
+        'int': 'number', 'uuid': 'varchar2', 'str': 'varchar2', 'float': 'number',
+        'datetime': 'date', 'bool': 'number',
+    },
+    'postgres': {
+        'int': 'integer', 'uuid': 'uuid', 'str': 'character varying', 'float': 'numeric',
+        'datetime': 'timestamp without time zone', 'bool': 'boolean',
+    },
+    'clickhouse': {
+        'int': 'int64', 'uuid': 'uuid', 'str': 'string', 'float': 'decimal(18, 2)',
+        'datetime': 'datetime64(3)', 'bool': 'uint8',
+    },
+}
+
+ADAPTERS = {
+    'oracle': adapters.OracleAdapter,
+    'postgres': adapters.PostgresAdapter,
+    'clickhouse': adapters.ClickHouseAdapter,
+}
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Shape of synthetic source/target pair"""
+    rows: int
+    columns: int = 10
+    key_type: str = 'int'
+    mismatch_ratio: float = 0.001
+    duplicate_ratio: float = 0.0
+    null_ratio: float = 0.05
+    recent_ratio: float = 0.01
+
+    @property
+    def name(self) -> str:
+        return (f'rows={self.rows},cols={self.columns},key={self.key_type},mismatch={self.mismatch_ratio:g},'
+                f'dup={self.duplicate_ratio:g},null={self.null_ratio:g}')
+
+
+def make_keys(rows: int, key_type: str, rng: np.random.Generator) -> pd.DataFrame:
+    """Primary key columns of the requested type"""
+    match key_type:
+        case 'int':
+            return pd.DataFrame({'id': np.arange(1, rows + 1, dtype=np.int64)})
+        case 'uuid':
+            high = pd.Series(rng.integers(0, 2 ** 63, rows, dtype=np.int64)).map('{:016x}'.format)
+            low = pd.Series(rng.integers(0, 2 ** 63, rows, dtype=np.int64)).map('{:016x}'.format)
+            uuid = high.str[:8] + '-' + high.str[8:12] + '-' + high.str[12:16] + '-' + low.str[:4] + '-' + low.str[4:16]
+            return pd.DataFrame({'id': uuid})
+        case 'compound':
+            # (account, day) pairs, unique by construction
+            ids = np.arange(rows, dtype=np.int64)
+            return pd.DataFrame({
+                'account_id': ids // 1000,
+                'dt': pd.Timestamp('2024-01-01') + pd.to_timedelta(ids % 1000, unit='D'),
+            })
+        case _:
+            raise ValueError(f'unknown key type {key_type}, expected one of {KEY_TYPES}')
+
+
+def make_values(rows: int, columns: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Value columns as fetched from database (not converted yet)"""
+    data = {}
+    for i in range(columns):
+        kind = COLUMN_KINDS[i % len(COLUMN_KINDS)]
+        name = f'{kind}_{i}'
+        match kind:
+            case 'str':
+                data[name] = 'text_' + pd.Series(rng.integers(0, rows, rows)).astype(str)
+            case 'float':
+                data[name] = np.round(rng.random(rows) * 1000, 2)
+            case 'int':
+                data[name] = rng.integers(0, 10 ** 6, rows)
+            case 'datetime':
+                seconds = rng.integers(0, 5 * 365 * 86400, rows)
+                data[name] = pd.Timestamp('2020-01-01') + pd.to_timedelta(seconds, unit='s')
+            case 'bool':
+                data[name] = rng.random(rows) < 0.5
+    return pd.DataFrame(data)
+
+
+def make_metadata(df: pd.DataFrame, adapter_name: str) -> pd.DataFrame:
+    """Metadata frame (column_name, data_type) in the form returned by adapter for the generated columns"""
+    types = ADAPTER_TYPES[adapter_name]
+    rows = []
+    for column in df.columns:
+        if column == 'xrecently_changed':
+            continue
+        kind = column.split('_')[0]
+        if column == 'id':
+            kind = 'int' if pd.api.types.is_integer_dtype(df[column]) else 'uuid'
+        elif column == 'account_id':
+            kind = 'int'
+        elif column == 'dt':
+            kind = 'datetime'
+        rows.append((column, types[kind]))
+    return pd.DataFrame(rows, columns=['column_name', 'data_type'])
+
+
+def change_values(values: pd.Series, column: str) -> pd.Series:
+    """Different values of the same type (so generated tables keep column types)"""
+    match column.split('_')[0]:
+        case 'str':
+            return pd.Series('changed', index=values.index)
+        case 'float' | 'int':
+            return values.map(lambda value: 1 if pd.isna(value) else value + 1)
+        case 'datetime':
+            return values.map(lambda value: pd.Timestamp('2020-01-01') if pd.isna(value) else value + pd.Timedelta(days=1))
+        case 'bool':
+            return values.map(lambda value: True if pd.isna(value) else not value)
+
+
+def make_pair(scenario: Scenario, seed: int = 42) -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
+    """
+    Source and target dataframes (raw, as fetched) and key columns for the scenario
+
+    Target differs from source by one value in `mismatch_ratio` of rows, `duplicate_ratio` of rows
+    are duplicated by key on both sides, `null_ratio` of values are nulls and `recent_ratio`
+    of rows are marked as recently changed
+    """
+    rng = np.random.default_rng(seed)
+    keys = make_keys(scenario.rows, scenario.key_type, rng)
+    values = make_values(scenario.rows, scenario.columns, rng)
+
+    if scenario.null_ratio:
+        for column in values.columns:
+            values[column] = values[column].astype(object).mask(rng.random(scenario.rows) < scenario.null_ratio)
+
+    source = pd.concat([keys, values], axis=1)
+    source['xrecently_changed'] = np.where(rng.random(scenario.rows) < scenario.recent_ratio, 'y', None)
+    target = source.copy()
+
+    mismatched = rng.random(scenario.rows) < scenario.mismatch_ratio
+    if mismatched.any() and len(values.columns):
+        column_positions = rng.integers(0, len(values.columns), mismatched.sum())
+        for position, column in enumerate(values.columns):
+            rows_to_change = target.index[np.flatnonzero(mismatched)[column_positions == position]]
+            target.loc[rows_to_change, column] = change_values(target.loc[rows_to_change, column], column)
+
+    if scenario.duplicate_ratio:
+        duplicated = rng.random(scenario.rows) < scenario.duplicate_ratio
+        source = pd.concat([source, source[duplicated]], ignore_index=True)
+        target = pd.concat([target, target[duplicated]], ignore_index=True)
+
+    return source, target, list(keys.columns)
+
+
+def prepare_pair(source: pd.DataFrame, target: pd.DataFrame, metadata: pd.DataFrame,
+                 adapter) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Run the same conversion chain as comparator does for table samples"""
+    source = utils.prepare_dataframe(adapter.convert_types(source.copy(), metadata, 'UTC'))
+    target = utils.prepare_dataframe(adapter.convert_types(target.copy(), metadata, 'UTC'))
+    return source, target
+
+
+@dataclass
+class BenchmarkResult:
+    benchmark: str
+    scenario: str
+    rows: int
+    repeat: int
+    min_seconds: float
+    median_seconds: float
+    rows_per_second: float
+
+
+def measure(func: Callable, setup: Callable[[], tuple], repeat: int) -> List[float]:
+    """Wall times of `func(*setup())`, setup is excluded from timing"""
+    timings = []
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_scenario(scenario: Scenario, repeat: int, selected: Optional[List[str]],
+                 backend_names: List[str] = ('pandas',), workers: Optional[int] = None) -> List[BenchmarkResult]:
+    source_raw, target_raw, key_columns = make_pair(scenario)
+    metadata = make_metadata(source_raw, 'postgres')
+    source, target = prepare_pair(source_raw, target_raw, metadata, adapters.PostgresAdapter())
+    source_compare = source.drop(columns='xrecently_changed')
+    target_compare = target.drop(columns='xrecently_changed')
+
+    benchmarks: Dict[str, Tuple[Callable, Callable]] = {
+        'prepare_dataframe': (utils.prepare_dataframe, lambda: (source_raw,)),
+        'compare_dataframes': (utils.compare_dataframes, lambda: (source_compare, target_compare, key_columns)),
+        'clean_recently_changed_data': (utils.clean_recently_changed_data, lambda: (source, target, key_columns)),
+    }
+    if workers:
+        benchmarks[f'compare_dataframes[{workers} workers]'] = (
+            parallel.compare_dataframes_parallel,
+            lambda: (source_compare, target_compare, key_columns, 3, workers)
+        )
+    for backend_name in backend_names:
+        if backend_name == 'pandas':
+            continue
+        # other backends get the same pandas input and work on their own frames after prepare_dataframe
+        backend = backends.get_backend(backend_name)
+        backend_source, backend_target = backend.prepare_dataframe(source), backend.prepare_dataframe(target)
+        backend_source_compare = backend_source.drop('xrecently_changed')
+        backend_target_compare = backend_target.drop('xrecently_changed')
+        benchmarks.update({
+            f'prepare_dataframe[{backend_name}]': (backend.prepare_dataframe, lambda: (source_raw,)),
+            f'compare_dataframes[{backend_name}]': (
+                backend.compare_dataframes,
+                lambda s=backend_source_compare, t=backend_target_compare: (s, t, key_columns)
+            ),
+            f'clean_recently_changed_data[{backend_name}]': (
+                backend.clean_recently_changed_data,
+                lambda s=backend_source, t=backend_target: (s, t, key_columns)
+            ),
+        })
+    for adapter_name, adapter_class in ADAPTERS.items():
+        adapter = adapter_class()
+        adapter_metadata = make_metadata(source_raw, adapter_name)
+        benchmarks[f'convert_types[{adapter_name}]'] = (
+            adapter.convert_types,
+            # conversion works in place
+            lambda adapter_metadata=adapter_metadata: (source_raw.copy(), adapter_metadata, 'UTC')
+        )
+
+    if not selected or any(name.startswith('generate_comparison_sample_report') for name in selected):
+        stats, details = utils.compare_dataframes(source_compare, target_compare, key_columns)
+        if stats:
+            benchmarks['generate_comparison_sample_report'] = (
+                utils.generate_comparison_sample_report,
+                lambda: ('source', 'target', stats, details, 'UTC')
+            )
+
+    results = []
+    for name, (func, setup) in benchmarks.items():
+        if selected and not any(name.startswith(s) for s in selected):
+            continue
+        results.append(make_result(name, scenario, len(source_raw), measure(func, setup, repeat)))
+    return results
+
+
+def make_result(name: str, scenario: Scenario, rows: int, timings: List[float]) -> BenchmarkResult:
+    best = min(timings)
+    median = statistics.median(timings)
+    print(f'{name:<40} {scenario.name:<80} min {best:9.4f}s  median {median:9.4f}s', flush=True)
+    return BenchmarkResult(name, scenario.name, rows, len(timings), best, median,
+                           rows / best if best else float('inf'))
+
+
+def create_local_engine(engine_name: str, workdir: str):
+    """File based embedded database for end-to-end runs"""
+    match engine_name:
+        case 'sqlite':
+            return sqlalchemy.create_engine(f'sqlite:///{os.path.join(workdir, "benchmark.sqlite")}')
+        case 'duckdb':
+            return sqlalchemy.create_engine(f'duckdb:///{os.path.join(workdir, "benchmark.duckdb")}')
+        case _:
+            raise ValueError(f'unknown engine {engine_name}, expected one of {LOCAL_ENGINES}')
+
+
+def make_table(df: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """Generated frame as table: creation date spread over 30 days, recently changed rows updated now"""
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None).floor('s')
+    table = df.drop(columns='xrecently_changed')
+    table['created_at'] = now - pd.Timedelta(days=31) + pd.to_timedelta(np.arange(len(df)) % (30 * 86400), unit='s')
+    table['updated_at'] = table['created_at'].where(df['xrecently_changed'] != 'y', now)
+    return table
+
+
+def load_table(engine, name: str, df: pd.DataFrame) -> None:
+    """(Re)create table from dataframe, bulk paths of the engine are used for large frames"""
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f'DROP TABLE IF EXISTS {name}')
+    if engine.dialect.name == 'duckdb':
+        with engine.begin() as connection:
+            driver_connection = connection.connection.driver_connection
+            driver_connection.register('benchmark_frame', df)
+            driver_connection.execute(f'CREATE TABLE {name} AS SELECT * FROM benchmark_frame')
+            driver_connection.unregister('benchmark_frame')
+    else:
+        # sqlite stores timestamps as text, the same format as comparator expects
+        df = df.copy()
+        for column in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[column]) or column.startswith('datetime'):
+                df[column] = pd.to_datetime(df[column]).dt.strftime('%Y-%m-%d %H:%M:%S')
+        df.to_sql(name, engine, index=False, chunksize=100_000)
+
+
+def run_end_to_end(scenario: Scenario, engine_name: str, repeat: int, workdir: str,
+                   selected: Optional[List[str]], backend_names: List[str] = ('pandas',)) -> List[BenchmarkResult]:
+    """Full compare_sample/compare_counts pipeline (fetch, conversion, comparison, report) on a local database"""
+    source_raw, target_raw, key_columns = make_pair(scenario)
+    rng = np.random.default_rng(0)
+    engine = create_local_engine(engine_name, workdir)
+    load_table(engine, 'benchmark_source', make_table(source_raw, rng))
+    load_table(engine, 'benchmark_target', make_table(target_raw, rng))
+    del source_raw, target_raw
+
+    source, target = xoverrr.DataReference('benchmark_source'), xoverrr.DataReference('benchmark_target')
+    results = []
+    for backend_name in backend_names:
+        comparator = xoverrr.DataQualityComparator(engine, engine, backend=backend_name)
+        runs = {
+            'compare_sample': lambda: comparator.compare_sample(
+                source, target, date_column='created_at', update_column='updated_at',
+                custom_primary_key=key_columns, exclude_recent_hours=1
+            ),
+            'compare_counts': lambda: comparator.compare_counts(source, target, date_column='created_at'),
+        }
+        engine_label = engine_name if backend_name == 'pandas' else f'{engine_name},{backend_name}'
+
+        for method, run in runs.items():
+            name = f'e2e[{engine_label}].{method}'
+            if selected and not any(name.startswith(s) or method.startswith(s) for s in selected):
+                continue
+            if method == 'compare_counts' and backend_name != 'pandas':
+                # counts are compared on pandas regardless of backend
+                continue
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                status, *_ = run()
+                timings.append(time.perf_counter() - start)
+                if status == xoverrr.constants.COMPARISON_SKIPPED:
+                    print(f'{name}: comparison skipped')
+            results.append(make_result(name, scenario, scenario.rows, timings))
+            # phases of the last run show where the time goes
+            for phase in comparator.last_profile.phases:
+                print(f'    {phase.phase:<24} {phase.side or "":<8} {phase.wall_time:9.4f}s')
+    engine.dispose()
+    return results
+
+
+def get_suite(name: str) -> List[Scenario]:
+    """Predefined scenario sets: quick (seconds) and full (up to 20M rows, needs tens of GB of RAM)"""
+    match name:
+        case 'quick':
+            base = 50_000
+            scenarios = [Scenario(10_000), Scenario(base)]
+            sizes = []
+        case 'full':
+            base = 1_000_000
+            scenarios = [Scenario(rows) for rows in (10_000, 100_000, 1_000_000, 5_000_000, 20_000_000)]
+            sizes = [Scenario(base, columns=columns) for columns in (50, 100)]
+        case _:
+            raise ValueError(f'unknown suite {name}')
+    variants = [
+        Scenario(base, key_type='uuid'),
+        Scenario(base, key_type='compound'),
+        Scenario(base, mismatch_ratio=0.0),
+        Scenario(base, mismatch_ratio=0.5),
+        Scenario(base, mismatch_ratio=1.0),
+        Scenario(base, duplicate_ratio=0.01),
+        Scenario(base, null_ratio=0.5),
+        Scenario(base, columns=50),
+    ]
+    return list(dict.fromkeys(scenarios + sizes + variants))
+
+
+def get_custom_scenarios(args) -> List[Scenario]:
+    """Cartesian product of the scenario parameters given on command line"""
+    grid = itertools.product(args.rows, args.columns, args.key_type, args.mismatch_ratio,
+                             args.duplicate_ratio, args.null_ratio)
+    return [Scenario(*params) for params in grid]
+
+
+def get_environment() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'node': platform.node(),
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def result_key(result: BenchmarkResult) -> str:
+    return f'{result.benchmark}[{result.scenario}]'
+
+
+def find_regressions(results: List[BenchmarkResult], baseline: Dict, threshold: float,
+                     min_delta: float) -> List[str]:
+    """Benchmarks slower than baseline by more than `threshold` (relative) and `min_delta` seconds"""
+    regressions = []
+    baseline_results = baseline.get('results', {})
+    for result in results:
+        previous = baseline_results.get(result_key(result))
+        if previous is None:
+            continue
+        before, after = previous['min_seconds'], result.min_seconds
+        if after > before * (1 + threshold) and after - before > min_delta:
+            regressions.append(f'{result_key(result)}: {before:.4f}s -> {after:.4f}s (+{(after / before - 1) * 100:.0f}%)')
+    return regressions
+
+
+def parse_list(cast: Callable) -> Callable[[str], list]:
+    return lambda value: [cast(item) for item in value.split(',')]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--suite', choices=['quick', 'full'], default='quick')
+    parser.add_argument('--rows', type=parse_list(int), help='custom grid: comma separated row counts')
+    parser.add_argument('--columns', type=parse_list(int), default=[10])
+    parser.add_argument('--key-type', type=parse_list(str), default=['int'])
+    parser.add_argument('--mismatch-ratio', type=parse_list(float), default=[0.001])
+    parser.add_argument('--duplicate-ratio', type=parse_list(float), default=[0.0])
+    parser.add_argument('--null-ratio', type=parse_list(float), default=[0.05])
+    parser.add_argument('--engine', type=parse_list(str),
+                        help=f'end-to-end runs of comparator against local databases: {",".join(LOCAL_ENGINES)}')
+    parser.add_argument('--backend', type=parse_list(str), default=['pandas'],
+                        help=f'comparison core backends: {",".join(backends.BACKENDS)}')
+    parser.add_argument('--workers', type=int, help='also benchmark compare_dataframes split into this many processes')
+    parser.add_argument('--workdir', help='directory for local database files (temporary by default)')
+    parser.add_argument('--filter', type=parse_list(str), help='benchmark name prefixes, e.g. compare_dataframes,convert_types')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write results json')
+    parser.add_argument('--baseline', help='baseline json to compare with')
+    parser.add_argument('--save-baseline', help='write results as baseline json')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative slowdown (0.25 = 25%%)')
+    parser.add_argument('--min-delta', type=float, default=0.01, help='ignore slowdowns below this many seconds')
+    args = parser.parse_args(argv)
+
+    for backend_name in args.backend:
+        if backend_name not in backends.BACKENDS:
+            parser.error(f'--backend must be one of {backends.BACKENDS}')
+    for engine_name in args.engine or []:
+        if engine_name not in LOCAL_ENGINES:
+            parser.error(f'--engine must be one of {LOCAL_ENGINES}')
+    for key_type in args.key_type:
+        if key_type not in KEY_TYPES:
+            parser.error(f'--key-type must be one of {KEY_TYPES}')
+
+    # comparison functions log every step, keep the output readable
+    logger.app_logger.setLevel(logging.WARNING)
+
+    scenarios = get_custom_scenarios(args) if args.rows else get_suite(args.suite)
+    results = []
+    if args.engine:
+        with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+            for scenario in scenarios:
+                for engine_name in args.engine:
+                    results.extend(run_end_to_end(scenario, engine_name, args.repeat, workdir, args.filter, args.backend))
+    else:
+        for scenario in scenarios:
+            results.extend(run_scenario(scenario, args.repeat, args.filter, args.backend, args.workers))
+
+    document = {
+        'environment': get_environment(),
+        'results': {result_key(result): asdict(result) for result in results},
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        print(f'results written to {path}')
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f'\nREGRESSIONS (threshold {args.threshold:.0%}):')
+            for regression in regressions:
+                print(f'  {regression}')
+            return 1
+        print(f'\nno regressions against {args.baseline} (threshold {args.threshold:.0%})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,13 @@ import unittest
 import pandas as pd
 import numpy as np
 import time
+import tempfile
+from dataclasses import asdict
+from state import ComparisonStateStore
+from profiling import ComparisonProfile, HotPathProfiler
+from metrics import MetricsRecorder, prometheus_client
+import polars_utils
+from parallel import compare_dataframes_parallel, pa
 from utils import (
     compare_dataframes,
     prepare_dataframe,
@@ -11,7 +18,11 @@ from utils import (
     ComparisonStats,
     ComparisonDiffDetails,
     validate_dataframe_size,
-    get_dataframe_size_gb
+    get_dataframe_size_gb,
+    apply_incremental_delta,
+    clean_recently_changed_data,
+    encode_keys,
+    wilson_interval
 )
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -463,6 +474,1008 @@ class TestUtils(unittest.TestCase):
         # 1/4*0.1 + 1/3 * 0.15
         self.assertAlmostEqual(stats.final_diff_score, 7.5, places=5)
 
+    def test_state_store_roundtrip(self):
+        """Test state records are keyed per pair and survive numpy values"""
+        store = ComparisonStateStore(tempfile.mkdtemp())
+        key = store.make_key('sample', 'public.account', 'stage.account')
+
+        self.assertIsNone(store.get(key))
+        store.put(key, {'fingerprint': {'source': ['1'], 'target': ['2']}, 'cnt': np.int64(5)})
+
+        record = store.get(key)
+        self.assertEqual(record['fingerprint'], {'source': ['1'], 'target': ['2']})
+        self.assertEqual(record['cnt'], 5)
+        self.assertNotEqual(key, store.make_key('sample', 'stage.account', 'public.account'))
+
+    def test_state_key_engine_identity(self):
+        """Test state keys of the same object names in other databases differ, passwords are not part of them"""
+        from types import SimpleNamespace
+        from run_benchmarks import xoverrr, create_local_engine
+        from sqlalchemy.engine import make_url
+
+        store = ComparisonStateStore(tempfile.mkdtemp())
+        dev, prod = create_local_engine('sqlite', tempfile.mkdtemp()), create_local_engine('sqlite', tempfile.mkdtemp())
+        source, target = xoverrr.DataReference('orders'), xoverrr.DataReference('orders_copy')
+        dev_key = xoverrr.DataQualityComparator(dev, dev, state_store=store)._make_state_key('incremental', source, target)
+        prod_key = xoverrr.DataQualityComparator(prod, prod, state_store=store)._make_state_key('incremental', source, target)
+        self.assertNotEqual(dev_key, prod_key)
+
+        comparator = xoverrr.DataQualityComparator(dev, dev, state_store=store)
+        comparator.source_engine = SimpleNamespace(url=make_url('postgresql://user:secret@db/dwh'))
+        key = comparator._make_state_key('incremental', source, target)
+        comparator.source_engine = SimpleNamespace(url=make_url('postgresql://user:rotated@db/dwh'))
+        self.assertEqual(key, comparator._make_state_key('incremental', source, target))
+
+    def test_skip_unchanged(self):
+        """Test the comparison is skipped while the change fingerprints of both tables stay the same"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+        from sqlalchemy import text
+
+        df = pd.DataFrame({'id': range(100), 'amount': np.arange(100) * 1.5})
+        engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        load_table(engine, 'source_table', df)
+        load_table(engine, 'target_table', df)
+        comparator = xoverrr.DataQualityComparator(engine, engine, state_store=ComparisonStateStore(tempfile.mkdtemp()))
+        # sqlite has no modification catalog, the table contents stand for it
+        comparator._get_adapter(comparator.source_db_type).build_change_fingerprint_query = lambda data_ref: (
+            f"SELECT count(*) AS row_count, sum(amount) AS total FROM {data_ref.name}", {})
+        source_ref, target_ref = xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table')
+
+        status, _, stats, _ = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'], skip_unchanged=True)
+        self.assertEqual(status, 'success')
+        status, report, skipped_stats, details = comparator.compare_sample(
+            source_ref, target_ref, custom_primary_key=['id'], skip_unchanged=True)
+        self.assertEqual(status, 'skipped')
+        self.assertIsNone(details)
+        self.assertEqual(skipped_stats.total_matched_rows, stats.total_matched_rows)
+        # other parameters are another comparison
+        status, _, _, _ = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'],
+                                                    exclude_columns=['amount'], skip_unchanged=True)
+        self.assertEqual(status, 'success')
+
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE target_table SET amount = -1 WHERE id = 7"))
+        status, _, stats, _ = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'], skip_unchanged=True)
+        self.assertEqual(status, 'failed')
+        self.assertEqual(stats.total_matched_rows, 99)
+        self.assertEqual(comparator.comparison_stats['tables_skipped'], {'source_table'})
+
+    def test_incremental_sample(self):
+        """Test incremental comparison fetches only rows changed since the previous pass with full comparison statistics"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+        from sqlalchemy import text
+
+        df = pd.DataFrame({
+            'id': range(100),
+            'amount': np.arange(100) * 1.5,
+            'updated_at': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(100), unit='min'),
+        })
+        engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        load_table(engine, 'source_table', df)
+        load_table(engine, 'target_table', df.drop(index=[0]))
+        comparator = xoverrr.DataQualityComparator(engine, engine, state_store=ComparisonStateStore(tempfile.mkdtemp()))
+        source_ref, target_ref = xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table')
+
+        status, report, _, _ = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'],
+                                                         update_column='updated_at', incremental=True)
+        self.assertEqual(status, 'failed')
+        self.assertIn('Delta rows fetched: source 100, target 99', report)
+
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE source_table SET amount = -1, updated_at = '2024-01-02 00:00:00' WHERE id IN (5, 6)"))
+            connection.execute(text("UPDATE target_table SET amount = -1, updated_at = '2024-01-02 00:00:00' WHERE id = 5"))
+        status, report, stats, _ = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'],
+                                                             update_column='updated_at', incremental=True)
+        # rows of the previous watermark are fetched again, the updated ones after it
+        self.assertIn('Delta rows fetched: source 3, target 2', report)
+
+        status_full, _, full_stats, _ = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'])
+        self.assertEqual(status, status_full)
+        for name in ('total_source_rows', 'total_target_rows', 'only_source_rows', 'only_target_rows',
+                     'common_pk_rows', 'total_matched_rows', 'total_diff_percentage_rows'):
+            self.assertEqual(getattr(stats, name), getattr(full_stats, name), name)
+        self.assertEqual(stats.total_matched_rows, 98)
+
+    def test_apply_incremental_delta(self):
+        """Test delta upsert into key digest state and watermark hold back for recent keys"""
+        delta = pd.DataFrame({
+            'id': ['1', '2', '3'],
+            'value': ['a', 'b', 'c'],
+            'xwatermark': ['2024-01-01', '2024-01-03', '2024-01-02 10:00:00'],
+        })
+        state, watermark = apply_incremental_delta(None, delta, ['id'], ['value'], {('3',)}, None)
+
+        self.assertEqual(sorted(state['id']), ['1', '2'])
+        self.assertEqual(watermark, '2024-01-02 10:00:00')
+
+        update = pd.DataFrame({'id': ['2', '3'], 'value': ['B', 'c'], 'xwatermark': ['2024-01-04', '2024-01-02 10:00:00']})
+        new_state, new_watermark = apply_incremental_delta(state, update, ['id'], ['value'], set(), watermark)
+
+        self.assertEqual(sorted(new_state['id']), ['1', '2', '3'])
+        self.assertEqual(new_watermark, '2024-01-04')
+        self.assertNotEqual(new_state.loc[new_state['id'] == '2', 'xrow_digest'].iloc[0],
+                            state.loc[state['id'] == '2', 'xrow_digest'].iloc[0])
+
+    def test_comparison_profile_aggregate(self):
+        """Test phases are accumulated per side and aggregated between comparisons"""
+        profile = ComparisonProfile()
+        for _ in range(2):
+            with profile.phase('query', 'source'):
+                profile.add_fetched(10, 100)
+        with profile.phase('compare_dataframes'):
+            pass
+
+        self.assertEqual(len(profile.phases), 2)
+        self.assertEqual(profile.phases[0].calls, 2)
+        self.assertEqual(profile.phases[0].rows, 20)
+        self.assertEqual(profile.phases[0].bytes, 200)
+
+        batch = ComparisonProfile()
+        batch.aggregate(profile)
+        batch.aggregate(profile)
+        self.assertEqual(batch.to_frame().set_index('phase').loc['query', 'rows'], 40)
+
+    def test_phase_peak_memory(self):
+        """Test peak memory is measured per phase, not as the process high-water mark"""
+        import tracemalloc
+
+        profile = ComparisonProfile()
+        with profile.phase('metadata'):
+            pass
+        self.assertIsNone(profile.phases[0].peak_memory)
+
+        tracemalloc.start()
+        try:
+            with profile.phase('convert_types'):
+                with profile.phase('query', 'source'):
+                    data = np.ones(4_000_000)
+                    del data
+                small = np.ones(1000)
+            with profile.phase('compare_dataframes'):
+                small = small + 1
+        finally:
+            tracemalloc.stop()
+
+        peaks = profile.to_frame().set_index('phase')['peak_memory']
+        self.assertGreaterEqual(peaks['query'], 32_000_000)
+        # the enclosing phase keeps the peak of the nested one, later phases do not repeat it
+        self.assertGreaterEqual(peaks['convert_types'], 32_000_000)
+        self.assertLess(peaks['compare_dataframes'], 1_000_000)
+        self.assertIsNotNone(profile.phases[-1].process_peak_rss)
+
+    def test_hot_path_profiler(self):
+        """Test cProfile hook dumps stats and returns hot functions"""
+        profile_dir = tempfile.mkdtemp()
+        profiler = HotPathProfiler('sample_schema.table', profile_dir, top_n=5)
+        profiler.start()
+        prepare_dataframe(pd.DataFrame({'id': [1, 2, 3], 'name': ['a', None, 'c']}))
+        hot_functions = profiler.stop()
+
+        self.assertIn('prepare_dataframe', hot_functions)
+        self.assertTrue(os.path.basename(profiler.dump_path).startswith('sample_schema.table_'))
+        self.assertTrue(os.path.exists(profiler.dump_path))
+
+    def test_benchmark_data_generator(self):
+        """Test synthetic benchmark pair has the requested shape and discrepancies"""
+        from run_benchmarks import Scenario, make_pair, make_metadata, prepare_pair, adapters
+
+        scenario = Scenario(rows=2000, columns=7, key_type='compound', mismatch_ratio=0.1, duplicate_ratio=0.0)
+        source, target, key_columns = make_pair(scenario)
+        self.assertEqual(key_columns, ['account_id', 'dt'])
+        self.assertEqual(len(source), 2000)
+        self.assertEqual(len(source.columns), 2 + 7 + 1)
+
+        metadata = make_metadata(source, 'postgres')
+        source, target = prepare_pair(source, target, metadata, adapters.PostgresAdapter())
+        stats, _ = compare_dataframes(source.drop(columns='xrecently_changed'),
+                                      target.drop(columns='xrecently_changed'), key_columns)
+        changed_rows = stats.common_pk_rows - stats.total_matched_rows
+        self.assertEqual(stats.common_pk_rows, 2000)
+        self.assertTrue(150 < changed_rows < 250)
+
+    def test_sqlite_end_to_end(self):
+        """Test full sample and count comparison against local sqlite database"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        source = pd.DataFrame({
+            'id': [1, 2, 3, 4],
+            'name': ['a', 'b', None, 'd'],
+            'amount': [1.0, 2.5, 3.0, 4.0],
+            'created_at': pd.to_datetime(['2024-01-01 10:00:00', '2024-01-01 11:00:00', '2024-01-02 00:00:00', '2024-01-03 00:00:00']),
+        })
+        target = source.drop(index=3).copy()
+        target.loc[1, 'name'] = 'changed'
+        # NULL and empty string are the same value after prepare_dataframe, on the server too
+        target.loc[2, 'name'] = ''
+
+        engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        load_table(engine, 'source_table', source)
+        load_table(engine, 'target_table', target)
+        comparator = xoverrr.DataQualityComparator(engine, engine)
+        source_ref, target_ref = xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table')
+
+        status, _, stats, details = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'])
+        self.assertEqual(status, 'failed')
+        self.assertEqual(stats.only_source_rows, 1)
+        self.assertEqual(stats.total_matched_rows, 2)
+        self.assertEqual(details.mismatches_per_column['column_name'].tolist(), ['name'])
+
+        # the same comparison on the server, only counters and examples are fetched
+        status, report, pushdown_stats, pushdown_details = comparator.compare_sample(
+            source_ref, target_ref, custom_primary_key=['id'], pushdown=True)
+        self.assertEqual(status, 'failed')
+        self.assertIn('pushdown', report)
+        self.assertEqual({**asdict(stats), 'profile': None}, {**asdict(pushdown_stats), 'profile': None})
+        self.assertEqual(pushdown_details.source_only_keys_examples, {'4'})
+        pd.testing.assert_frame_equal(details.discrepancies_per_col_examples, pushdown_details.discrepancies_per_col_examples)
+        self.assertEqual(pushdown_details.mismatches_per_column['mismatch_count'].tolist(), [1])
+
+        status, report, _, _ = comparator.compare_counts(source_ref, target_ref, date_column='created_at')
+        self.assertEqual(status, 'failed')
+        self.assertIn('2024-01-03', report)
+
+    def test_pushdown_same_results(self):
+        """Test FULL OUTER JOIN pushdown gives the client comparison results, different engines are refused"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        source = pd.DataFrame({'id': list(range(60)) + [3, 4], 'name': [f'n{i}' for i in range(60)] + ['dup3', 'dup4'],
+                               'note': ['x'] * 62, 'amount': list(np.arange(60) * 1.5) + [0.0, 0.0]})
+        target = pd.concat([source.iloc[:60], pd.DataFrame({'id': [100, 101, 7], 'name': ['t100', 't101', 'dup7'],
+                                                            'note': ['x'] * 3, 'amount': [1.0, 2.0, 3.0]})],
+                           ignore_index=True)
+        target = target[target['id'] != 10].reset_index(drop=True)
+        target.loc[target['id'] == 20, 'name'] = 'changed'
+        target.loc[target['id'] == 21, 'amount'] = -1.0
+        # NULL-like values are equal to each other, not to other values
+        for key, source_note, target_note in ((30, None, ''), (31, 'nan', None), (32, ' ', 'None'), (33, None, 'y')):
+            source.loc[source['id'] == key, 'note'] = source_note
+            target.loc[target['id'] == key, 'note'] = target_note
+        source_ref, target_ref = xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table')
+
+        for dbms in ('sqlite', 'duckdb'):
+            engine = create_local_engine(dbms, tempfile.mkdtemp())
+            load_table(engine, 'source_table', source)
+            load_table(engine, 'target_table', target)
+            comparator = xoverrr.DataQualityComparator(engine, engine)
+            status, _, stats, details = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'])
+            pushdown_status, report, pushdown_stats, pushdown_details = comparator.compare_sample(
+                source_ref, target_ref, custom_primary_key=['id'], pushdown=True)
+            self.assertIn('pushdown', report)
+            self.assertEqual(status, pushdown_status)
+            self.assertEqual({**asdict(stats), 'profile': None}, {**asdict(pushdown_stats), 'profile': None})
+            self.assertEqual((stats.only_source_rows, stats.only_target_rows, stats.dup_source_rows,
+                              stats.dup_target_rows, stats.total_matched_rows), (1, 2, 2, 1, 56))
+            for name in ('source_only_keys_examples', 'target_only_keys_examples',
+                         'dup_source_keys_examples', 'dup_target_keys_examples'):
+                self.assertEqual(getattr(details, name), getattr(pushdown_details, name), name)
+            pd.testing.assert_frame_equal(details.mismatches_per_column, pushdown_details.mismatches_per_column)
+            pd.testing.assert_frame_equal(details.discrepancies_per_col_examples,
+                                          pushdown_details.discrepancies_per_col_examples)
+            self.assertEqual(details.discrepancies_per_col_examples['primary_key'].tolist(), ['20', '33', '21'])
+
+        other_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        comparator = xoverrr.DataQualityComparator(engine, other_engine)
+        status, _, stats, _ = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'], pushdown=True)
+        self.assertEqual((status, stats), ('failed', None))
+        with self.assertRaisesRegex(ValueError, 'same engine'):
+            comparator._compare_samples_pushdown(source_ref, target_ref, None, None, None, None, [], [], ['id'],
+                                                 0.0, None, 3)
+
+    def test_key_hash_sampling(self):
+        """Test key hash sample selects the same keys on both sides and reports confidence intervals"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        source = pd.DataFrame({'id': range(2000), 'name': [f'name_{i}' for i in range(2000)]})
+        target = source.copy()
+        target.loc[::10, 'name'] = 'changed'
+
+        source_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        target_engine = create_local_engine('duckdb', tempfile.mkdtemp())
+        load_table(source_engine, 'source_table', source)
+        load_table(target_engine, 'target_table', target)
+        comparator = xoverrr.DataQualityComparator(source_engine, target_engine)
+
+        status, report, stats, _ = comparator.compare_sample(
+            xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table'),
+            custom_primary_key=['id'], sample_rate=0.2)
+        self.assertEqual(stats.only_source_rows + stats.only_target_rows, 0)
+        self.assertTrue(300 < stats.common_pk_rows < 500)
+        self.assertEqual(stats.sample_rate, 0.2)
+        low, high = stats.confidence_intervals['total_diff_percentage_rows']
+        self.assertTrue(low <= stats.total_diff_percentage_rows <= high)
+        self.assertIn('Key hash sample: 20%', report)
+
+        low, high = wilson_interval(10, 100)
+        self.assertAlmostEqual(low, 0.0552, places=4)
+        self.assertAlmostEqual(high, 0.1744, places=4)
+
+    def test_count_drill_down(self):
+        """Test count drill-down localizes missing rows to the hour and key hash buckets"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        source = pd.DataFrame({
+            'id': range(2400),
+            'created_at': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(2400) * 60, unit='s'),
+        })
+        # two rows missing in 2024-01-02 05:00
+        target = source.drop(index=[1750, 1790])
+
+        source_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        target_engine = create_local_engine('duckdb', tempfile.mkdtemp())
+        load_table(source_engine, 'source_table', source)
+        load_table(target_engine, 'target_table', target)
+        comparator = xoverrr.DataQualityComparator(source_engine, target_engine)
+
+        status, report, _, details = comparator.compare_counts(
+            xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table'), date_column='created_at',
+            drill_down=True, drill_down_min_rows=10, drill_down_buckets=4,
+            drill_down_key_columns=['id'], drill_down_sample=True)
+        self.assertEqual(status, 'failed')
+        self.assertIn('DRILL-DOWN', report)
+        drill_down = details.drill_down
+        self.assertEqual(set(drill_down['dt']), {'2024-01-02 05:00:00'})
+        self.assertEqual((drill_down['source_cnt'] - drill_down['target_cnt']).sum(), 2)
+        self.assertTrue((drill_down['source_cnt'] <= 10).all())
+        self.assertEqual(drill_down['only_source_rows'].sum(), 2)
+        self.assertEqual(set(drill_down['status']), {'failed'})
+
+    def test_key_bucket_query_pyformat(self):
+        """Test key bucket queries of pyformat adapters survive parameter substitution"""
+        from run_benchmarks import adapters, xoverrr
+
+        for adapter in (adapters.PostgresAdapter(), adapters.ClickHouseAdapter()):
+            period = adapter._build_period_condition('created_at', '2024-01-01 00:00:00', '2024-01-02 00:00:00')
+            query, params = adapter.build_key_bucket_count_query(xoverrr.DataReference('orders', 'sales'),
+                                                                 ['id', 'part'], 16, [period])
+            rendered = query % params
+            self.assertIn('mod(', rendered)
+            self.assertIn('2024-01-01 00:00:00', rendered)
+            condition, condition_params = adapter.build_key_bucket_condition(['id'], 16, 3)
+            self.assertIn(', 16) = 3', ' AND '.join([period[0], condition]) % {**period[1], **condition_params})
+
+    def test_compare_profiles(self):
+        """Test column profiles flag only changed columns and days across DBMS"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        source = pd.DataFrame({
+            'id': range(300),
+            'name': [f'name_{i}' if i % 7 else None for i in range(300)],
+            'amount': np.arange(300) * 1.1,
+            'created_at': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(300) * 1000, unit='s'),
+        })
+        target = source.copy()
+        target.loc[5, 'name'] = 'changed'
+        target.loc[200, 'amount'] = 0.5
+
+        source_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        target_engine = create_local_engine('duckdb', tempfile.mkdtemp())
+        load_table(source_engine, 'source_table', source)
+        load_table(target_engine, 'target_table', target)
+        comparator = xoverrr.DataQualityComparator(source_engine, target_engine)
+        source_ref, target_ref = xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table')
+
+        status, report, _, details = comparator.compare_profiles(source_ref, target_ref, date_column='created_at')
+        self.assertEqual(status, 'failed')
+        self.assertIn('PROFILE COMPARISON REPORT', report)
+        self.assertEqual(details.compared_days, 4)
+        mismatches = details.mismatches
+        self.assertEqual(mismatches.loc[mismatches['column_name'] == 'name', ['dt', 'metric']].values.tolist(),
+                         [['2024-01-01', 'hash']])
+        self.assertEqual(set(mismatches.loc[mismatches['column_name'] == 'amount', 'metric']), {'min', 'sum'})
+        self.assertEqual(set(mismatches['dt']), {'2024-01-01', '2024-01-03'})
+
+        status, _, _, details = comparator.compare_profiles(source_ref, target_ref, date_column='created_at',
+                                                            exclude_columns=['name', 'amount'])
+        self.assertEqual(status, 'success')
+        self.assertTrue(details.mismatches.empty)
+
+    def test_prune_columns(self):
+        """Test checksum pre-pass fetches only changed columns with the same statistics"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        source = pd.DataFrame({
+            'id': range(500),
+            'name': [f'name_{i}' if i % 7 else None for i in range(500)],
+            'code': np.arange(500) % 13,
+            'amount': np.arange(500) * 1.1,
+            'other': [f'other_{i}' for i in range(500)],
+        })
+        target = source.copy()
+        target.loc[5, 'name'] = 'changed'
+        # values swapped between rows keep column aggregates, but not the key bound checksum
+        target.loc[[1, 2], 'other'] = target.loc[[2, 1], 'other'].values
+
+        source_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        target_engine = create_local_engine('duckdb', tempfile.mkdtemp())
+        load_table(source_engine, 'source_table', source)
+        load_table(target_engine, 'target_table', target)
+        comparator = xoverrr.DataQualityComparator(source_engine, target_engine)
+        source_ref, target_ref = xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table')
+
+        _, _, stats, _ = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'])
+        status, report, pruned_stats, details = comparator.compare_sample(
+            source_ref, target_ref, custom_primary_key=['id'], prune_columns=True)
+        self.assertEqual(status, 'failed')
+        self.assertEqual(details.verified_columns, ['code'])
+        # fractional numbers have no checksum and are always fetched
+        self.assertEqual(details.common_attribute_columns, ['name', 'amount', 'other'])
+        self.assertEqual({**asdict(stats), 'profile': None}, {**asdict(pruned_stats), 'profile': None})
+        self.assertIn('Verified columns', report)
+
+    def test_keyed_fetch(self):
+        """Test rows are fetched by primary keys in batches within DBMS limits"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        df = pd.DataFrame({'id': range(3000), 'part': [f'p{i % 3}' for i in range(3000)], 'amount': np.arange(3000) * 1.5})
+        engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        load_table(engine, 'source_table', df)
+        comparator = xoverrr.DataQualityComparator(engine, engine)
+        adapter = comparator._get_adapter(comparator.source_db_type)
+        table = xoverrr.DataReference('source_table')
+
+        keys = list(range(0, 3000, 2)) + [1, 1, 5000]
+        self.assertEqual([len(batch) for batch in adapter.split_keys(['id'], keys)], [999, 503])
+        rows = adapter.fetch_by_keys(engine, table, ['id', 'amount'], ['id'], keys, None)
+        self.assertEqual(sorted(rows['id']), sorted(list(range(0, 3000, 2)) + [1]))
+
+        # compound keys as row constructors, bind parameters limit the batch
+        keys = [(i, f'p{i % 3}') for i in range(0, 3000, 3)] + [(1, 'p0')]
+        self.assertEqual([len(batch) for batch in adapter.split_keys(['id', 'part'], keys)], [499, 499, 3])
+        rows = adapter.fetch_by_keys(engine, table, ['id', 'part', 'amount'], ['id', 'part'], keys, None)
+        self.assertEqual(sorted(rows['id']), list(range(0, 3000, 3)))
+
+        oracle = xoverrr.adapters.oracle.OracleAdapter()
+        self.assertEqual([len(batch) for batch in oracle.split_keys(['id'], range(2500))], [1000, 1000, 500])
+        query, params = oracle.build_keyed_fetch_query(xoverrr.DataReference('t', 's'), ['id', 'dt'], ['id', 'dt'], [(1, 2), (3, 4)])
+        self.assertIn('(id, dt) IN ((:xkey_0_0, :xkey_0_1), (:xkey_1_0, :xkey_1_1))', query)
+        self.assertEqual(params, {'xkey_0_0': 1, 'xkey_0_1': 2, 'xkey_1_0': 3, 'xkey_1_1': 4})
+
+    def test_prestats(self):
+        """Test recently changed keys of both sides are excluded in SQL with the same statistics"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        now = pd.Timestamp.now().floor('s')
+        source = pd.DataFrame({'id': range(300), 'name': [f'name_{i}' for i in range(300)],
+                               'updated': now - pd.Timedelta(days=3)})
+        source.loc[[10, 20], 'updated'] = now - pd.Timedelta(hours=1)
+        target = source.copy()
+        target.loc[[10, 30, 40], 'name'] = 'changed'
+        target.loc[30, 'updated'] = now - pd.Timedelta(hours=2)
+        source = pd.concat([source, source.iloc[[3, 3, 5]]], ignore_index=True)
+
+        source_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        target_engine = create_local_engine('duckdb', tempfile.mkdtemp())
+        load_table(source_engine, 'source_table', source)
+        load_table(target_engine, 'target_table', target)
+        comparator = xoverrr.DataQualityComparator(source_engine, target_engine)
+        source_ref, target_ref = xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table')
+        options = dict(custom_primary_key=['id'], update_column='updated', exclude_columns=['updated'],
+                       exclude_recent_hours=24)
+
+        _, _, stats, _ = comparator.compare_sample(source_ref, target_ref, **options)
+        status, report, prestats_stats, details = comparator.compare_sample(source_ref, target_ref, prestats=True, **options)
+        self.assertEqual(status, 'failed')
+        self.assertEqual({**asdict(stats), 'profile': None}, {**asdict(prestats_stats), 'profile': None})
+        prestats = details.prestats.set_index('side')
+        self.assertEqual(prestats.loc['source', ['total_rows', 'distinct_keys', 'duplicated_rows', 'recent_keys']].tolist(),
+                         [303, 300, 3, 2])
+        self.assertEqual(prestats.loc['source', 'duplicated_keys_examples'], {3, 5})
+        # rows of the keys 10, 20, 30 are not fetched
+        phases = comparator.last_profile.to_frame().set_index(['phase', 'side'])
+        self.assertEqual(phases.loc[[('query', 'source'), ('query', 'target')], 'rows'].tolist(), [300, 297])
+        self.assertIn('PRE-STATS', report)
+
+    def test_parallel_ranges(self):
+        """Test table split into rowid ranges fetched concurrently gives the same statistics"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        source = pd.DataFrame({'id': range(1000), 'name': [f'name_{i}' for i in range(1000)]})
+        target = source.copy()
+        target.loc[5, 'name'] = 'changed'
+        source_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        target_engine = create_local_engine('duckdb', tempfile.mkdtemp())
+        load_table(source_engine, 'source_table', source)
+        load_table(target_engine, 'target_table', target)
+        comparator = xoverrr.DataQualityComparator(source_engine, target_engine)
+        source_ref, target_ref = xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table')
+
+        ranges = comparator._get_adapter(comparator.source_db_type).get_extraction_ranges(source_engine, source_ref, 4)
+        self.assertEqual([params for _, params in ranges], [
+            {'xrange_high': 251}, {'xrange_low': 251, 'xrange_high': 501},
+            {'xrange_low': 501, 'xrange_high': 751}, {'xrange_low': 751}])
+
+        _, _, stats, _ = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'])
+        status, _, ranges_stats, _ = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'],
+                                                               parallel_ranges=4)
+        self.assertEqual(status, 'failed')
+        self.assertEqual({**asdict(stats), 'profile': None}, {**asdict(ranges_stats), 'profile': None})
+
+    def test_query_hints(self):
+        """Test query hints are applied by the supporting DBMS and recorded in the report"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        df = pd.DataFrame({'id': range(10), 'name': [f'name_{i}' for i in range(10)]})
+        source_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        target_engine = create_local_engine('duckdb', tempfile.mkdtemp())
+        load_table(source_engine, 'source_table', df)
+        load_table(target_engine, 'target_table', df)
+        comparator = xoverrr.DataQualityComparator(source_engine, target_engine, query_hints={'threads': 2, 'parallel': 4})
+        source_ref, target_ref = xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table')
+
+        status, report, _, _ = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'],
+                                                         query_hints={'memory_limit': '1GB'})
+        self.assertEqual(status, 'success')
+        self.assertIn("query hints: target {'threads': 2, 'memory_limit': '1GB'}", report)
+
+        oracle = xoverrr.adapters.oracle.OracleAdapter()
+        self.assertEqual(oracle.set_query_hints({'parallel': 8, 'full': True, 'threads': 2}), {'parallel': 8, 'full': True})
+        query, _ = oracle.build_data_query_common(xoverrr.DataReference('t', 's'), ['id'], None, None, None, None)
+        self.assertIn('SELECT /*+ PARALLEL(8) FULL(t) */ id', query)
+        clickhouse = xoverrr.adapters.clickhouse.ClickHouseAdapter()
+        clickhouse.set_query_hints({'max_threads': 8})
+        self.assertEqual(clickhouse._session_statements('UTC'), ["SET session_timezone = 'UTC'", 'SET max_threads = 8'])
+
+    def test_lob_digest(self):
+        """Test large text compared by digests gives the same statistics and real content in the examples"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        source = pd.DataFrame({'id': range(200), 'body': ['x' * 1000 + str(i) for i in range(200)]})
+        source.loc[7, 'body'] = None
+        target = source.copy()
+        target.loc[[5, 7], 'body'] = 'changed'
+        source_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        target_engine = create_local_engine('duckdb', tempfile.mkdtemp())
+        load_table(source_engine, 'source_table', source)
+        load_table(target_engine, 'target_table', target)
+        comparator = xoverrr.DataQualityComparator(source_engine, target_engine)
+        source_ref, target_ref = xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table')
+
+        _, _, stats, _ = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id'])
+        status, report, digest_stats, details = comparator.compare_sample(source_ref, target_ref,
+                                                                          custom_primary_key=['id'], lob_digest=True)
+        self.assertEqual(status, 'failed')
+        self.assertEqual({**asdict(stats), 'profile': None}, {**asdict(digest_stats), 'profile': None})
+        # body is a large object of SQLite (text), selected as a digest on both sides
+        self.assertEqual(details.digest_columns, ['body'])
+        examples = details.discrepancies_per_col_examples.set_index('primary_key')
+        self.assertEqual(examples.loc['5', ['source_value', 'target_value']].tolist(), ['x' * 1000 + '5', 'changed'])
+        self.assertEqual(examples.loc['7', 'target_value'], 'changed')
+        self.assertIn('Digested columns', report)
+
+    def test_stream_digest(self):
+        """Test streamed keys and value hashes give the same statistics and examples as the full fetch"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        now = pd.Timestamp.now().floor('s')
+        source = pd.DataFrame({'id': [i // 2 for i in range(400)], 'part': [i % 2 for i in range(400)],
+                               'name': [f'name_{i}' for i in range(400)], 'amount': [i * 0.5 for i in range(400)],
+                               'updated': now - pd.Timedelta(days=3)})
+        source.loc[20, 'updated'] = now - pd.Timedelta(hours=1)
+        target = source.copy()
+        target.loc[[5, 20, 300], 'name'] = 'changed'
+        target.loc[9, 'amount'] = None
+        target = target.drop(index=[11])
+        source_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        target_engine = create_local_engine('duckdb', tempfile.mkdtemp())
+        load_table(source_engine, 'source_table', source)
+        load_table(target_engine, 'target_table', target)
+        comparator = xoverrr.DataQualityComparator(source_engine, target_engine)
+        source_ref, target_ref = xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table')
+
+        chunks = list(comparator._get_adapter(comparator.target_db_type).iter_query_chunks(
+            'SELECT id FROM target_table', target_engine, 'UTC', 100))
+        self.assertEqual([len(chunk) for chunk in chunks], [100, 100, 100, 99])
+
+        options = dict(custom_primary_key=['id', 'part'], update_column='updated', exclude_columns=['updated'],
+                       exclude_recent_hours=24)
+        _, _, stats, details = comparator.compare_sample(source_ref, target_ref, **options)
+        status, _, stream_stats, stream_details = comparator.compare_sample(source_ref, target_ref,
+                                                                            stream_digest=True, **options)
+        self.assertEqual(status, 'failed')
+        self.assertEqual({**asdict(stats), 'profile': None}, {**asdict(stream_stats), 'profile': None})
+        self.assertTrue(stream_details.discrepancies_per_col_examples.equals(details.discrepancies_per_col_examples))
+        self.assertEqual(stream_details.discrepant_data_examples.values.tolist(),
+                         details.discrepant_data_examples.values.tolist())
+
+    def test_column_batch_size(self):
+        """Test comparison of column groups merges into the same statistics and examples as one comparison"""
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+
+        source = pd.DataFrame({'id': [i // 2 for i in range(400)], 'part': [i % 2 for i in range(400)],
+                               **{f'c{j}': [f'v{j}_{i}' for i in range(400)] for j in range(12)}})
+        target = source.copy()
+        target.loc[[5, 70], 'c3'] = 'changed'
+        target.loc[[5, 90, 150], 'c10'] = 'changed'
+        target.loc[33, 'c0'] = None
+        target = target.drop(index=[11])
+        source = pd.concat([source, source.iloc[[40]]], ignore_index=True)
+        source_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        target_engine = create_local_engine('duckdb', tempfile.mkdtemp())
+        load_table(source_engine, 'source_table', source)
+        load_table(target_engine, 'target_table', target)
+        comparator = xoverrr.DataQualityComparator(source_engine, target_engine)
+        source_ref, target_ref = xoverrr.DataReference('source_table'), xoverrr.DataReference('target_table')
+
+        _, _, stats, details = comparator.compare_sample(source_ref, target_ref, custom_primary_key=['id', 'part'])
+        status, report, group_stats, group_details = comparator.compare_sample(
+            source_ref, target_ref, custom_primary_key=['id', 'part'], column_batch_size=5)
+        self.assertEqual(status, 'failed')
+        self.assertEqual({**asdict(stats), 'profile': None}, {**asdict(group_stats), 'profile': None})
+        self.assertEqual(group_stats.total_matched_rows, stats.common_pk_rows - 5)
+        self.assertTrue(group_details.mismatches_per_column.equals(details.mismatches_per_column))
+        self.assertTrue(group_details.discrepancies_per_col_examples.equals(details.discrepancies_per_col_examples))
+        self.assertEqual(group_details.discrepant_data_examples.values.tolist(),
+                         details.discrepant_data_examples.values.tolist())
+        self.assertIn('3 groups of 5', report)
+
+    def test_encode_keys(self):
+        """Test equal compound keys get equal int64 codes in both frames, also over the int64 range"""
+        source = pd.DataFrame({'a': ['1', '1', '2', 'N/A'], 'b': ['x', 'y', 'x', 'x']})
+        target = pd.DataFrame({'a': ['2', '1', '3'], 'b': ['x', 'y', 'x']})
+        source_codes, target_codes = encode_keys([source, target], ['a', 'b'])
+        self.assertEqual(source_codes.dtype, np.int64)
+        self.assertEqual(len(set(source_codes)), 4)
+        self.assertEqual(target_codes[0], source_codes[2])
+        self.assertEqual(target_codes[1], source_codes[1])
+        self.assertNotIn(target_codes[2], source_codes)
+
+        # 5 columns of 10^4 distinct values are renumbered before the int64 overflow
+        wide = pd.DataFrame({f'k{j}': [str(i) for i in range(10_000)] for j in range(5)})
+        wide_codes, shifted_codes = encode_keys([wide, wide.iloc[::-1]], list(wide.columns))
+        self.assertEqual(len(set(wide_codes)), 10_000)
+        self.assertEqual(list(shifted_codes), list(wide_codes[::-1]))
+
+    def test_encode_keys_missing_parts(self):
+        """Test missing parts of compound keys do not make distinct keys collide"""
+        # ('y', 'q') and ('x', None) collided when missing values were coded as -1
+        source = pd.DataFrame({'a': ['y', 'x', None, None, 'x'], 'b': ['q', None, 'q', None, np.nan], 'value': range(5)})
+        target = source.drop(index=[2])
+        target.loc[3, 'value'] = 7
+
+        # the key equality of duplicated / merge the comparison used before key codes
+        for df, codes in zip((source, target), encode_keys([source, target], ['a', 'b'])):
+            self.assertEqual(pd.Series(codes).duplicated().tolist(), df.duplicated(subset=['a', 'b']).tolist())
+        common = source.drop_duplicates(['a', 'b']).merge(target.drop_duplicates(['a', 'b']), on=['a', 'b'])
+
+        stats, details = compare_dataframes(source, target, ['a', 'b'], 3)
+        self.assertEqual((stats.dup_source_rows, stats.dup_target_rows), (1, 1))
+        self.assertEqual(stats.common_pk_rows, len(common))
+        self.assertEqual(stats.total_matched_rows, 2)
+        self.assertEqual(stats.only_source_rows, 1)
+        self.assertEqual(stats.only_target_rows, 0)
+
+        stats, _ = compare_dataframes(source.iloc[:2], source.iloc[:2].copy(), ['a', 'b'], 3)
+        self.assertEqual(stats.final_score, 100.0)
+
+    def test_top_key_examples(self):
+        """Test examples are the largest keys selected without sorting the symmetrical difference"""
+        source = pd.DataFrame({'id': [str(i) for i in range(20)], 'part': ['1', '2'] * 10,
+                               'value': [str(i) for i in range(20)]})
+        target = source.iloc[:4].copy()
+        target.loc[[1, 2], 'value'] = 'changed'
+        stats, details = compare_dataframes(source, target, ['id', 'part'], max_examples=3)
+        self.assertEqual(stats.only_source_rows, 16)
+        self.assertEqual(details.source_only_keys_examples, {('9', '2'), ('8', '1'), ('7', '2')})
+        self.assertEqual(details.discrepant_data_examples['id'].tolist(), ['2', '2', '1', '1'])
+        self.assertEqual(details.discrepancies_per_col_examples['primary_key'].tolist(), [('2', '1'), ('1', '2')])
+
+    def test_top_key_examples_numeric_keys(self):
+        """Test examples of numeric keys are the largest ones in numeric (not string) order"""
+        source = pd.DataFrame({'id': np.arange(20), 'value': np.arange(20) * 1.5})
+        target = source.copy()
+        target['value'] = -1.0
+        stats, details = compare_dataframes(source, target, ['id'], max_examples=3)
+        self.assertEqual(details.discrepant_data_examples['id'].tolist(), [19, 19, 18, 18, 17, 17])
+        self.assertEqual(details.discrepancies_per_col_examples['primary_key'].tolist(), [19, 18, 17])
+        target = source.iloc[[0, 1]]
+        stats, details = compare_dataframes(source, target, ['id'], max_examples=3)
+        self.assertEqual(details.source_only_keys_examples, {19, 18, 17})
+
+    def test_async_comparator(self):
+        """Test concurrent comparisons of the async comparator, timeouts and cancellation of phases"""
+        import asyncio
+        import threading
+        from run_benchmarks import xoverrr, create_local_engine, load_table
+        from exceptions import ComparisonCancelled
+
+        df = pd.DataFrame({'id': range(500), 'amount': np.arange(500) * 1.5})
+        target_df = df.copy()
+        target_df.loc[target_df['id'] == 7, 'amount'] = -1.0
+        source_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        target_engine = create_local_engine('duckdb', tempfile.mkdtemp())
+        for i in range(3):
+            load_table(source_engine, f'table_{i}', df)
+            load_table(target_engine, f'table_{i}', target_df if i == 1 else df)
+
+        async def run():
+            async with xoverrr.AsyncDataQualityComparator(source_engine, target_engine, max_concurrency=2) as comparator:
+                results = await asyncio.gather(*[
+                    comparator.compare_sample(xoverrr.DataReference(f'table_{i}'), xoverrr.DataReference(f'table_{i}'),
+                                              custom_primary_key=['id'])
+                    for i in range(3)
+                ])
+                with self.assertRaises(asyncio.TimeoutError):
+                    await comparator.compare_sample(xoverrr.DataReference('table_0'), xoverrr.DataReference('table_0'),
+                                                    custom_primary_key=['id'], timeout=0)
+                # comparators of timed out comparisons are reused once their threads finish
+                after_timeout = await comparator.compare_sample(xoverrr.DataReference('table_2'),
+                                                                xoverrr.DataReference('table_2'),
+                                                                custom_primary_key=['id'])
+                return results, after_timeout, comparator.comparison_stats
+
+        results, after_timeout, stats = asyncio.run(run())
+        self.assertEqual([status for status, *_ in results],
+                         [xoverrr.COMPARISON_SUCCESS, xoverrr.COMPARISON_FAILED, xoverrr.COMPARISON_SUCCESS])
+        self.assertEqual(results[1][2].total_matched_rows, 499)
+        self.assertEqual(after_timeout[0], xoverrr.COMPARISON_SUCCESS)
+        self.assertEqual(stats[xoverrr.COMPARISON_SUCCESS], 3)
+        self.assertIn(stats['compared'], (4, 5))
+        self.assertEqual(stats['tables_failed'], {'table_1'} | ({'table_0'} if stats['compared'] == 5 else set()))
+
+        profile = ComparisonProfile()
+        profile.cancel_event = threading.Event()
+        with profile.phase('query', 'source'):
+            pass
+        profile.cancel_event.set()
+        with self.assertRaises(ComparisonCancelled):
+            with profile.phase('compare_dataframes'):
+                pass
+        self.assertEqual(len(profile.phases), 1)
+
+        with self.assertRaises(ValueError):
+            xoverrr.AsyncDataQualityComparator(source_engine, target_engine, max_concurrency=0)
+
+        # the timeout covers waiting for a free comparator
+        slow_query = ("WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r WHERE i < 3000000) "
+                      "SELECT max(i) AS id, 1 AS amount FROM r")
+
+        async def run_busy():
+            async with xoverrr.AsyncDataQualityComparator(source_engine, source_engine, max_concurrency=1) as comparator:
+                busy = asyncio.ensure_future(comparator.compare_custom_query(slow_query, None, slow_query, None, ['id']))
+                await asyncio.sleep(0.05)
+                start = time.perf_counter()
+                with self.assertRaises(asyncio.TimeoutError):
+                    await comparator.compare_sample(xoverrr.DataReference('table_0'), xoverrr.DataReference('table_0'),
+                                                    custom_primary_key=['id'], timeout=0.1)
+                waited = time.perf_counter() - start
+                status, *_ = await busy
+                return waited, status
+
+        waited, status = asyncio.run(run_busy())
+        self.assertEqual(status, xoverrr.COMPARISON_SUCCESS)
+        # the slow comparison takes about a second
+        self.assertLess(waited, 0.5)
+
+        # a comparison timed out during its query keeps the comparator until the query finishes, then releases it
+        async def run_timed_out():
+            async with xoverrr.AsyncDataQualityComparator(source_engine, source_engine, max_concurrency=1) as comparator:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await comparator.compare_custom_query(slow_query, None, slow_query, None, ['id'], timeout=0.1)
+                busy = comparator._idle.empty()
+                status, *_ = await comparator.compare_sample(xoverrr.DataReference('table_0'),
+                                                             xoverrr.DataReference('table_0'), custom_primary_key=['id'])
+                return busy, status, comparator._idle.qsize(), comparator.comparison_stats
+
+        busy, status, idle, stats = asyncio.run(run_timed_out())
+        self.assertTrue(busy)
+        self.assertEqual(status, xoverrr.COMPARISON_SUCCESS)
+        self.assertEqual(idle, 1)
+        self.assertEqual((stats[xoverrr.COMPARISON_FAILED], stats[xoverrr.COMPARISON_SUCCESS]), (1, 1))
+
+    def test_postgres_ctid_ranges_version(self):
+        """Test ctid page ranges are used only with TID range scans (PostgreSQL 14+)"""
+        from run_benchmarks import xoverrr, adapters
+
+        def fake_execute(version_num):
+            def execute(query, engine, timezone):
+                if 'version()' in str(query):
+                    return pd.DataFrame({'version': ['PostgreSQL'], 'version_num': [version_num]})
+                return pd.DataFrame({'relpages': [1000]})
+            return execute
+
+        adapter = adapters.PostgresAdapter()
+        adapter._execute_query = fake_execute(160002)
+        ranges = adapter.get_extraction_ranges(None, xoverrr.DataReference('orders', 'sales'), 4)
+        self.assertEqual(len(ranges), 4)
+        self.assertIn('ctid', ranges[0][0])
+        adapter._execute_query = fake_execute(130011)
+        self.assertEqual(adapter.get_extraction_ranges(None, xoverrr.DataReference('orders', 'sales'), 4), [])
+
+    def test_oracle_rowid_ranges(self):
+        """Test ROWID ranges are contiguous and open at both ends, the table is not split without dba_extents"""
+        from run_benchmarks import xoverrr, adapters
+
+        adapter = adapters.OracleAdapter()
+        adapter._execute_query = lambda query, engine, timezone: pd.DataFrame({'xlow': ['AAA1', 'AAA2', 'AAB1']})
+        ranges = adapter.get_extraction_ranges(None, xoverrr.DataReference('orders', 'sales'), 3)
+        self.assertEqual([condition for condition, _ in ranges], [
+            'ROWID < CHARTOROWID(:xrange_high)',
+            'ROWID >= CHARTOROWID(:xrange_low) AND ROWID < CHARTOROWID(:xrange_high)',
+            'ROWID >= CHARTOROWID(:xrange_low)'])
+        self.assertEqual([params for _, params in ranges], [
+            {'xrange_high': 'AAA2'}, {'xrange_low': 'AAA2', 'xrange_high': 'AAB1'}, {'xrange_low': 'AAB1'}])
+
+        def no_privilege(query, engine, timezone):
+            raise xoverrr.exceptions.QueryExecutionError('ORA-00942: table or view does not exist')
+        adapter._execute_query = no_privilege
+        self.assertEqual(adapter.get_extraction_ranges(None, xoverrr.DataReference('orders', 'sales'), 3), [])
+
+    def test_oracle_integer_numbers_profiled(self):
+        """Test Oracle NUMBER with scale 0 or without precision gets the integer hash and checksum"""
+        from run_benchmarks import xoverrr, adapters
+
+        columns_meta = pd.DataFrame({
+            'column_name': ['code', 'id', 'amount', 'name'],
+            'data_type': ['number', 'number', 'number', 'varchar2'],
+            'column_id': [1, 2, 3, 4],
+            'data_precision': [10, np.nan, 12, np.nan],
+            'data_scale': [0, np.nan, 2, np.nan],
+        })
+        adapter = adapters.OracleAdapter()
+        query, _ = adapter.build_column_checksum_query(("SELECT * FROM orders", {}), ['id'], columns_meta)
+        self.assertIn('xchk_0', query)
+        self.assertIn('xchk_1', query)
+        self.assertNotIn('xchk_2', query)
+        self.assertIn('xchk_3', query)
+        query, _ = adapter.build_profile_query(xoverrr.DataReference('orders', 'sales'), 'created_at', None, None,
+                                               columns_meta)
+        self.assertIn('xhash_0', query)
+        self.assertIn('xsum_2', query)
+        self.assertNotIn('xhash_2', query)
+
+    def test_checksum_query_pyformat(self):
+        """Test column checksum queries of pyformat adapters survive parameter substitution of date ranges"""
+        from run_benchmarks import adapters, xoverrr
+
+        columns_meta = pd.DataFrame({'column_name': ['id', 'name'], 'data_type': ['bigint', 'text'], 'column_id': [1, 2]})
+        for adapter in (adapters.PostgresAdapter(), adapters.ClickHouseAdapter()):
+            data_query = adapter.build_data_query_common(xoverrr.DataReference('orders', 'sales'), ['id', 'name'],
+                                                         'created_at', None, '2024-01-01', '2024-01-31')
+            query, params = adapter.build_column_checksum_query(data_query, ['id'], columns_meta)
+            self.assertTrue(params)
+            rendered = query % params
+            self.assertIn(', 4294967296) as xchk_1', rendered)
+
+    def test_semi_join_custom_query(self):
+        """Test only target rows with source keys are fetched through the temporary key table"""
+        from run_benchmarks import xoverrr, adapters, create_local_engine, load_table
+
+        df = pd.DataFrame({'id': range(1000), 'part': [f'p{i % 3}' for i in range(1000)], 'amount': np.arange(1000) * 1.5})
+        target_df = df.copy()
+        target_df.loc[target_df['id'] == 10, 'amount'] = -1.0
+        source_engine = create_local_engine('sqlite', tempfile.mkdtemp())
+        load_table(source_engine, 'source_table', df)
+        for dbms in ('sqlite', 'duckdb'):
+            target_engine = create_local_engine(dbms, tempfile.mkdtemp())
+            load_table(target_engine, 'target_table', target_df)
+            comparator = xoverrr.DataQualityComparator(source_engine, target_engine)
+            status, report, stats, details = comparator.compare_custom_query(
+                "select id, part, amount from source_table where id < 100", None,
+                "select id, part, amount from target_table", None,
+                ['id', 'part'], semi_join=True
+            )
+            self.assertEqual(status, xoverrr.COMPARISON_FAILED)
+            self.assertEqual((stats.total_target_rows, stats.only_target_rows, stats.total_matched_rows), (100, 0, 99))
+            self.assertEqual(details.semi_join_extra_rows, 900)
+            self.assertIn('semi-join, not fetched): 900', report)
+            phases = comparator.last_profile.to_frame().set_index(['phase', 'side'])
+            self.assertEqual(phases.loc[('query', 'target'), 'rows'], 100)
+
+        # IN-list fallback without a key table gives the same rows and count
+        adapter = adapters.SQLiteAdapter()
+        adapter.keyed_fetch_max_keys = 30
+        keys = df.loc[df['id'] < 100, ['id', 'part']]
+        query = ("select id, part, amount from source_table where amount >= :min_amount", {'min_amount': 15})
+        rows, extra_rows = adapter.fetch_semi_join(source_engine, query, ['id', 'part'], keys, None)
+        fallback_rows, fallback_extra_rows = adapter.fetch_semi_join_by_keys(source_engine, query, ['id', 'part'], keys, None)
+        pd.testing.assert_frame_equal(rows.sort_values('id', ignore_index=True),
+                                      fallback_rows.sort_values('id', ignore_index=True))
+        self.assertEqual((len(rows), extra_rows, fallback_extra_rows), (90, 900, 900))
+
+        # the error of the failed query is reported, not the one of the key table cleanup
+        failing_adapter = adapters.SQLiteAdapter()
+        failing_adapter.build_semi_join_queries = lambda query, table, key_columns: ('select no_such_column from source_table',) * 2
+        with self.assertRaisesRegex(xoverrr.exceptions.QueryExecutionError, 'no such column'):
+            failing_adapter.fetch_semi_join(source_engine, query, ['id', 'part'], keys, None)
+        self.assertEqual(adapter.fetch_semi_join(source_engine, query, ['id', 'part'], keys, None)[1], 900)
+
+    @unittest.skipIf(polars_utils.pl is None, 'polars is not installed')
+    def test_polars_backend_same_results(self):
+        """Test polars backend gives the same prepared data, statistics and details as pandas"""
+        source = pd.DataFrame({
+            'id': [5, 4, 3, 2, 1, 1],
+            'name': ['a', ' ', None, 'none', 'e', 'dup'],
+            'amount': [1.0, 2.5, np.nan, 4.0, 5.0, 6.0],
+            'qty': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+            'mixed': [1.5, 'x', None, 2, 3.0, None],
+            'xrecently_changed': [None, None, None, 'y', None, None],
+        })
+        target = pd.DataFrame({
+            'id': [1, 3, 4, 6, 2],
+            'name': ['e', None, 'b', 'f', 'none'],
+            'amount': [5.0, np.nan, 2.5, 1.0, 4.0],
+            'qty': [5.0, 3.0, 2.0, 1.0, 4.0],
+            'mixed': [3.0, None, 'y', 1, 2],
+            'xrecently_changed': [None, None, None, None, None],
+        })
+
+        pandas_source, pandas_target = prepare_dataframe(source), prepare_dataframe(target)
+        polars_source, polars_target = polars_utils.prepare_dataframe(source), polars_utils.prepare_dataframe(target)
+        pd.testing.assert_frame_equal(pandas_source, polars_source.to_pandas().astype(object))
+
+        pandas_source, pandas_target = clean_recently_changed_data(pandas_source, pandas_target, ['id'])
+        polars_source, polars_target = polars_utils.clean_recently_changed_data(polars_source, polars_target, ['id'])
+        self.assertEqual(len(polars_source), len(pandas_source))
+
+        pandas_stats, pandas_details = compare_dataframes(pandas_source, pandas_target, ['id'])
+        polars_stats, polars_details = polars_utils.compare_dataframes(polars_source, polars_target, ['id'])
+
+        self.assertEqual(pandas_stats, polars_stats)
+        pd.testing.assert_frame_equal(pandas_details.mismatches_per_column, polars_details.mismatches_per_column)
+        pd.testing.assert_frame_equal(pandas_details.discrepancies_per_col_examples,
+                                      polars_details.discrepancies_per_col_examples)
+        self.assertEqual(pandas_details.dup_source_keys_examples, polars_details.dup_source_keys_examples)
+        self.assertEqual(pandas_details.target_only_keys_examples, polars_details.target_only_keys_examples)
+
+        # more keys of one side only than examples: both cores report the largest ones
+        keys = pd.DataFrame({'id': [f'{i:04d}' for i in range(200)], 'value': '1'})
+        source, target = keys, keys.iloc[::2]
+        pandas_stats, pandas_details = compare_dataframes(source, target, ['id'])
+        polars_stats, polars_details = polars_utils.compare_dataframes(
+            polars_utils.pl.from_pandas(source), polars_utils.pl.from_pandas(target), ['id'])
+        self.assertEqual(pandas_stats, polars_stats)
+        self.assertEqual(pandas_details.source_only_keys_examples, {'0199', '0197', '0195'})
+        self.assertEqual(pandas_details.source_only_keys_examples, polars_details.source_only_keys_examples)
+        pandas_stats, pandas_details = compare_dataframes(target, source, ['id'])
+        polars_stats, polars_details = polars_utils.compare_dataframes(
+            polars_utils.pl.from_pandas(target), polars_utils.pl.from_pandas(source), ['id'])
+        self.assertEqual(pandas_details.target_only_keys_examples, polars_details.target_only_keys_examples)
+
+    @unittest.skipIf(pa is None, 'pyarrow is not installed')
+    def test_parallel_compare_same_results(self):
+        """Test hash partitioned comparison in several processes gives exactly the compare_dataframes result"""
+        rng = np.random.default_rng(7)
+        ids = np.arange(2000)
+        source = pd.DataFrame({
+            'id': ids,
+            'name': rng.choice(['a', 'b', 'c'], len(ids)),
+            'amount': rng.integers(0, 100, len(ids)),
+        })
+        # duplicates, changed values and keys present only on one side
+        source = pd.concat([source, source.iloc[[10, 500]]], ignore_index=True)
+        target = source.iloc[20:].copy()
+        target.loc[target.index[::97], 'amount'] += 1
+        target.loc[target.index[::131], 'name'] = 'z'
+        target = pd.concat([target, pd.DataFrame({'id': [5000, 5001], 'name': 'x', 'amount': 0})], ignore_index=True)
+        source, target = prepare_dataframe(source), prepare_dataframe(target)
+
+        stats, details = compare_dataframes(source, target, ['id'], 5)
+        parallel_stats, parallel_details = compare_dataframes_parallel(source, target, ['id'], 5, workers=3)
+
+        self.assertEqual(stats, parallel_stats)
+        for name in ('mismatches_per_column', 'discrepancies_per_col_examples', 'discrepant_data_examples'):
+            pd.testing.assert_frame_equal(getattr(details, name), getattr(parallel_details, name))
+        for name in ('dup_source_keys_examples', 'dup_target_keys_examples',
+                     'source_only_keys_examples', 'target_only_keys_examples'):
+            self.assertEqual(getattr(details, name), getattr(parallel_details, name))
+
+    @unittest.skipIf(prometheus_client is None, 'prometheus_client is not installed')
+    def test_metrics_recorder(self):
+        """Test comparison profile is exported as prometheus metrics"""
+        profile = ComparisonProfile()
+        with profile.phase('query', 'source'):
+            profile.add_fetched(10, 1000)
+        with profile.phase('compare_dataframes'):
+            pass
+
+        recorder = MetricsRecorder()
+        recorder.observe_comparison('sample', 'success', profile, {'source': 'oracle', 'target': 'postgresql'})
+        output = recorder.generate_latest().decode()
+
+        self.assertIn('xoverrr_comparisons_total{method="sample",status="success"} 1.0', output)
+        self.assertIn('xoverrr_rows_fetched_total{engine="oracle",side="source"} 10.0', output)
+        self.assertIn('xoverrr_phase_duration_seconds_count{engine="local",phase="compare_dataframes"} 1.0', output)
+
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
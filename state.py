@@ -0,0 +1,87 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import Dict, Any, Optional
+import pandas as pd
+
+try:
+    from .constants import DATETIME_FORMAT
+    from .logger import app_logger
+except ImportError:
+    # for cases when used as standalone script
+    from constants import DATETIME_FORMAT
+    from logger import app_logger
+
+
+class ComparisonStateStore:
+    """
+    Local file-based store for per-pair comparison state
+    (change fingerprints, last results, incremental watermarks and key digests)
+
+    Each record lives in its own json file inside `directory`, the file name
+    is derived from the record key, so different pairs never overwrite each other.
+    Dataframes belonging to a record are pickled next to it.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build stable record key from arbitrary json-serializable parts"""
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _record_path(self, key: str, suffix: str = '.json') -> str:
+        return os.path.join(self.directory, f'{key}{suffix}')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return stored record or None if there is no (readable) record"""
+        path = self._record_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            app_logger.warning(f'Could not read state record {path}: {str(e)}')
+            return None
+
+    def put(self, key: str, record: Dict[str, Any]) -> None:
+        """Atomically write record"""
+        record = dict(record)
+        record['saved_at'] = datetime.now().strftime(DATETIME_FORMAT)
+        path = self._record_path(key)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, default=_json_default, indent=2)
+        os.replace(tmp_path, path)
+
+    def load_frame(self, key: str, name: str) -> Optional[pd.DataFrame]:
+        """Return dataframe stored along with the record or None"""
+        path = self._record_path(key, f'.{name}.pkl')
+        if not os.path.exists(path):
+            return None
+        return pd.read_pickle(path)
+
+    def save_frame(self, key: str, name: str, df: pd.DataFrame) -> None:
+        """Atomically write dataframe stored along with the record"""
+        path = self._record_path(key, f'.{name}.pkl')
+        tmp_path = f'{path}.tmp'
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+    def delete(self, key: str) -> None:
+        """Remove all files of the record"""
+        for name in os.listdir(self.directory):
+            if name.startswith(key):
+                os.remove(os.path.join(self.directory, name))
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize numpy scalars and other non-json values"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Any, List, Optional, Tuple, defaultdict
 from datetime import datetime
+from statistics import NormalDist
 
 try:
     from .constants import NULL_REPLACEMENT, DEFAULT_MAX_EXAMPLES, DATETIME_FORMAT
@@ -39,6 +40,12 @@ class ComparisonStats:
     #
     final_diff_score: float
     final_score : float
+    # per phase resources of the comparison, see profiling.ComparisonProfile
+    profile: Optional[Any] = field(default=None, repr=False, compare=False)
+    # share of primary keys selected by key hash sampling, None for the whole data
+    sample_rate: Optional[float] = None
+    # (low, high) bounds of the percentages estimated from the sample, by percentage field name
+    confidence_intervals: Optional[Dict[str, Tuple[float, float]]] = None
 
 @dataclass
 class ComparisonDiffDetails:
@@ -55,6 +62,16 @@ class ComparisonDiffDetails:
     common_attribute_columns: List[str]
     skipped_source_columns: List[str]= field(default_factory=list)
     skipped_target_columns: List[str]= field(default_factory=list)
+    # columns with equal checksums on both sides, not fetched (compare_sample prune_columns)
+    verified_columns: List[str] = field(default_factory=list)
+    # mismatched slices of the count drill-down, see DataQualityComparator.compare_counts
+    drill_down: Optional[pd.DataFrame] = None
+    # target rows with keys absent in the source, counted and not fetched (compare_custom_query semi_join)
+    semi_join_extra_rows: Optional[int] = None
+    # per side statistics queried before the fetch (compare_sample prestats)
+    prestats: Optional[pd.DataFrame] = None
+    # large object columns compared by md5 and length, content fetched for examples (compare_sample lob_digest)
+    digest_columns: List[str] = field(default_factory=list)
 
 
 def compare_dataframes_meta(
@@ -94,9 +111,22 @@ def compare_dataframes_meta(
 
 def analyze_column_discrepancies(df, primary_key_columns, value_columns, common_keys_cnt, examples_count=3):
 
-    metrics = {'max_pct' : 0.0, 'median_pct' : 0.0}
+    diff_counters, diff_examples, _ = scan_column_discrepancies(df, primary_key_columns, value_columns, examples_count)
+    return summarize_column_discrepancies(diff_counters, diff_examples, common_keys_cnt)
+
+
+def scan_column_discrepancies(df, primary_key_columns, value_columns, examples_count=3):
+    """
+    Scan sorted pairs of discrepant rows (source row followed by target row)
+
+    Returns:
+        diff_counters: mismatch count per column, ordered by the first mismatch
+        diff_examples: up to examples_count examples per column
+        first_mismatch_keys: primary key of the first mismatch per column
+    """
     diff_counters = defaultdict(int)
     diff_examples = {col: [] for col in value_columns}
+    first_mismatch_keys = {}
 
     rows = list(df.itertuples(index=False))
 
@@ -119,10 +149,46 @@ def analyze_column_discrepancies(df, primary_key_columns, value_columns, common_
             trg_val = getattr(trg_row, col)
             if src_val != trg_val:
 
+                if col not in first_mismatch_keys:
+                    first_mismatch_keys[col] = pk_value
                 diff_counters[col] += 1
                 if len(diff_examples[col]) < examples_count:
                     diff_examples[col].append({'pk': pk_value, 'src_val': src_val, 'trg_val': trg_val })
 
+    return diff_counters, diff_examples, first_mismatch_keys
+
+
+def analyze_pair_discrepancies(source_pairs, target_pairs, primary_key_columns, value_columns, common_keys_cnt,
+                               examples_count=3):
+    """
+    analyze_column_discrepancies over aligned source and target rows of the discrepant pairs:
+    the same counters and examples without sorting the pairs, the first mismatches of a column are selected partially
+    """
+    diff_counters, diff_examples, first_mismatch_keys = {}, {col: [] for col in value_columns}, {}
+    for position, col in enumerate(value_columns):
+        source_values = source_pairs[col].to_numpy()
+        target_values = target_pairs[col].to_numpy()
+        mismatched = np.flatnonzero(source_values != target_values)
+        if not len(mismatched):
+            continue
+        diff_counters[col] = len(mismatched)
+        first = mismatched[_top_key_positions(source_pairs[primary_key_columns].iloc[mismatched], primary_key_columns,
+                                              max(examples_count, 1))]
+        keys = _key_values(source_pairs, primary_key_columns, first)
+        first_mismatch_keys[col] = (keys[0], position)
+        diff_examples[col] = [{'pk': key, 'src_val': source_values[i], 'trg_val': target_values[i]}
+                              for key, i in zip(keys[:examples_count], first)]
+    # ordered by the first mismatch as in the scan over pairs sorted by keys desc, by column order within a pair
+    diff_counters = {col: diff_counters[col] for col in sorted(
+        diff_counters, key=lambda col: (first_mismatch_keys[col][0], -first_mismatch_keys[col][1]), reverse=True)}
+    return summarize_column_discrepancies(diff_counters, diff_examples, common_keys_cnt)
+
+
+def summarize_column_discrepancies(diff_counters, diff_examples, common_keys_cnt):
+    """Metrics, examples and counters dataframes from the scan_column_discrepancies result"""
+
+    metrics = {'max_pct' : 0.0, 'median_pct' : 0.0}
+
     # filter out cols without examples
     diff_examples = {k: v for k, v in diff_examples.items() if v}
     if diff_counters:
@@ -192,9 +258,12 @@ def compare_dataframes(
         return None, None
     _validate_input_data(source_df, target_df, key_columns)
 
+    # single int64 code of the key for every key operation, key columns are only read for examples
+    source_codes, target_codes = encode_keys([source_df, target_df], key_columns)
+
     # Check for duplicate primary keys and handle them
-    source_dup = source_df[source_df.duplicated(subset=key_columns, keep=False)]
-    target_dup = target_df[target_df.duplicated(subset=key_columns, keep=False)]
+    source_dup = source_df[pd.Series(source_codes).duplicated(keep=False).to_numpy()]
+    target_dup = target_df[pd.Series(target_codes).duplicated(keep=False).to_numpy()]
 
     source_dup_keys = _create_keys_set(source_dup, key_columns) if not source_dup.empty else set()
     target_dup_keys = _create_keys_set(target_dup, key_columns) if not target_dup.empty else set()
@@ -203,59 +272,104 @@ def compare_dataframes(
     target_dup_keys_examples = format_keys(target_dup_keys, max_examples)
 
     # Remove duplicates from both dataframes for clean comparison
-    source_clean = source_df.drop_duplicates(subset=key_columns, keep='first')
-    target_clean = target_df.drop_duplicates(subset=key_columns, keep='first')
-
-    # Count duplicates for metrics
-    source_dup_cnt = len(source_df) - len(source_clean)
-    target_dup_cnt = len(target_df) - len(target_clean)
+    source_kept = ~pd.Series(source_codes).duplicated(keep='first').to_numpy()
+    target_kept = ~pd.Series(target_codes).duplicated(keep='first').to_numpy()
+    source_clean = source_df[source_kept]
+    target_clean = target_df[target_kept]
 
     non_key_columns = compare_dataframes_meta(source_clean, target_clean, key_columns)
 
-    source_clean = source_clean.assign(xflg='src')
-    target_clean = target_clean.assign(xflg='trg')
+    source_clean = source_clean.assign(xflg='src', xkey=source_codes[source_kept])
+    target_clean = target_clean.assign(xflg='trg', xkey=target_codes[target_kept])
 
     xor_combined_df = (
         pd.concat([source_clean, target_clean], ignore_index=True)
-        .drop_duplicates(subset=key_columns + non_key_columns, keep=False)
-        .assign(xcount_pairs=lambda df: df.groupby(key_columns)[key_columns[0]].transform('size'))
-    )
-
-    # symmetrical difference between two datasets, sorted
-    xor_combined_sorted = xor_combined_df.sort_values(
-        by=key_columns + ['xflg'],
-        ascending=[False] * len(key_columns) + [True]
+        .drop_duplicates(subset=['xkey'] + non_key_columns, keep=False)
     )
 
-    mask = xor_combined_sorted['xcount_pairs'] > 1
-    xor_df_multi = xor_combined_sorted[mask]
+    # symmetrical difference between two datasets, pairs of the common keys and rows of one side only.
+    # Nothing is sorted: examples are the first keys in descending order selected partially
+    mask = xor_combined_df['xkey'].duplicated(keep=False).to_numpy()
+    mask_source = (xor_combined_df['xflg'] == 'src').to_numpy()
+    xor_df_multi = xor_combined_df[mask]
+    xor_df_source_only = xor_combined_df[~mask & mask_source].drop(columns=['xkey'])
+    xor_df_target_only = xor_combined_df[~mask & ~mask_source].drop(columns=['xkey'])
 
-    mask_source = xor_combined_sorted['xflg'] == 'src'
-    mask_target = xor_combined_sorted['xflg'] == 'trg'
-    xor_df_source_only = xor_combined_sorted[~mask & mask_source]
-    xor_df_target_only = xor_combined_sorted[~mask & mask_target]
+    xor_common_keys_cnt = int(len(xor_df_multi)/2) if not xor_df_multi.empty else 0
+    xor_source_only_keys_cnt = len(xor_df_source_only)
+    xor_target_only_keys_cnt = len(xor_df_target_only)
 
-    xor_source_only_keys = _create_keys_set(xor_df_source_only, key_columns)
-    xor_target_only_keys = _create_keys_set(xor_df_target_only, key_columns)
+    xor_source_only_keys_examples = format_keys(_top_keys_set(xor_df_source_only, key_columns, max_examples), max_examples)
+    xor_target_only_keys_examples = format_keys(_top_keys_set(xor_df_target_only, key_columns, max_examples), max_examples)
 
-    xor_common_keys_cnt = int(len(xor_df_multi)/2) if not xor_df_multi.empty else 0
-    xor_source_only_keys_cnt = len(xor_source_only_keys)
-    xor_target_only_keys_cnt = len(xor_target_only_keys)
+    # source rows of the pairs and positions of their target rows
+    source_pairs = xor_df_multi[xor_df_multi['xflg'] == 'src']
+    target_pairs = xor_df_multi[xor_df_multi['xflg'] == 'trg']
+    target_positions = pd.Index(target_pairs['xkey']).get_indexer(source_pairs['xkey'])
+    source_pairs, target_pairs = source_pairs.drop(columns=['xkey']), target_pairs.drop(columns=['xkey'])
 
     # take n pairs that is why examples x2
-    xor_df_multi_example = xor_df_multi.head(max_examples*2).drop(columns=['xcount_pairs']) if not xor_df_multi.empty else pd.DataFrame()
+    if not xor_df_multi.empty:
+        first_pairs = _top_key_positions(source_pairs, key_columns, max_examples)
+        xor_df_multi_example = pd.concat([source_pairs.iloc[first_pairs], target_pairs.iloc[target_positions[first_pairs]]])
+        xor_df_multi_example = xor_df_multi_example.iloc[
+            np.arange(2*len(first_pairs)).reshape(2, -1).T.ravel()] if len(first_pairs) else xor_df_multi_example
+    else:
+        xor_df_multi_example = pd.DataFrame()
 
-    xor_source_only_keys_examples = format_keys(xor_source_only_keys, max_examples)
-    xor_target_only_keys_examples = format_keys(xor_target_only_keys, max_examples)
+    diff_analyzer = lambda common_keys_cnt: analyze_pair_discrepancies(
+        source_pairs, target_pairs.iloc[target_positions], key_columns, non_key_columns, common_keys_cnt, max_examples
+    )
+    comparison_stats, comparison_diff_detais = build_comparison_result(
+        len(source_df), len(target_df), len(source_clean), len(target_clean),
+        xor_common_keys_cnt, xor_source_only_keys_cnt, xor_target_only_keys_cnt,
+        source_dup_keys_examples, target_dup_keys_examples,
+        xor_source_only_keys_examples, xor_target_only_keys_examples,
+        xor_df_multi_example, non_key_columns, diff_analyzer
+    )
+
+    app_logger.info('end')
+    return comparison_stats, comparison_diff_detais
+
+
+def build_comparison_result(
+    total_source_rows: int,
+    total_target_rows: int,
+    source_clean_cnt: int,
+    target_clean_cnt: int,
+    xor_common_keys_cnt: int,
+    xor_source_only_keys_cnt: int,
+    xor_target_only_keys_cnt: int,
+    source_dup_keys_examples,
+    target_dup_keys_examples,
+    xor_source_only_keys_examples,
+    xor_target_only_keys_examples,
+    xor_df_multi_example: pd.DataFrame,
+    non_key_columns: List[str],
+    diff_analyzer
+) -> tuple[ComparisonStats, ComparisonDiffDetails]:
+    """
+    Statistics and details from the counters of compare_dataframes
+    (shared with the partitioned comparison that merges per shard counters)
+
+    Parameters:
+        source_clean_cnt, target_clean_cnt:
+            number of rows after removing duplicated keys
+        diff_analyzer:
+            callable(common_keys_cnt) -> (metrics, per column examples, per column counters)
+            as returned by analyze_column_discrepancies
+    """
+    source_dup_cnt = total_source_rows - source_clean_cnt
+    target_dup_cnt = total_target_rows - target_clean_cnt
 
     # get number of records that present in two datasets based on primary key
-    common_keys_cnt = int((len(source_clean) - xor_source_only_keys_cnt + len(target_clean) - xor_target_only_keys_cnt)/2)
+    common_keys_cnt = int((source_clean_cnt - xor_source_only_keys_cnt + target_clean_cnt - xor_target_only_keys_cnt)/2)
 
     if not common_keys_cnt:
         #Special case when there is no matched primary keys at all
         comparison_stats = ComparisonStats(
-        total_source_rows = len(source_df),
-        total_target_rows = len(target_df),
+        total_source_rows = total_source_rows,
+        total_target_rows = total_target_rows,
         dup_source_rows = source_dup_cnt,
         dup_target_rows = target_dup_cnt,
         only_source_rows = xor_source_only_keys_cnt,
@@ -285,7 +399,6 @@ def compare_dataframes(
         source_only_keys_examples = xor_source_only_keys_examples,
         target_only_keys_examples = xor_target_only_keys_examples,
         discrepant_data_examples = pd.DataFrame())
-        app_logger.info('end')
 
         return comparison_stats, comparison_diff_detais
 
@@ -295,12 +408,12 @@ def compare_dataframes(
     source_only_percentage = (xor_source_only_keys_cnt/common_keys_cnt)*100
     target_only_percentage = (xor_target_only_keys_cnt/common_keys_cnt)*100
 
-    source_dup_percentage = (source_dup_cnt/len(source_df))*100
-    target_dup_percentage = (target_dup_cnt/len(target_df))*100
+    source_dup_percentage = (source_dup_cnt/total_source_rows)*100
+    target_dup_percentage = (target_dup_cnt/total_target_rows)*100
 
     diff_col_metrics, \
     diff_col_examples,\
-    diff_col_counters  = analyze_column_discrepancies(xor_df_multi, key_columns, non_key_columns, common_keys_cnt, max_examples)
+    diff_col_counters  = diff_analyzer(common_keys_cnt)
 
 
     source_and_target_total_diff_percentage = (1-total_matched_records_cnt/common_keys_cnt)*100
@@ -310,8 +423,8 @@ def compare_dataframes(
                        source_and_target_total_diff_percentage*0.5
 
     comparison_stats = ComparisonStats(
-        total_source_rows = len(source_df),
-        total_target_rows = len(target_df),
+        total_source_rows = total_source_rows,
+        total_target_rows = total_target_rows,
         dup_source_rows = source_dup_cnt,
         dup_target_rows = target_dup_cnt,
         only_source_rows = xor_source_only_keys_cnt,
@@ -342,10 +455,85 @@ def compare_dataframes(
         discrepant_data_examples = xor_df_multi_example,
         common_attribute_columns=non_key_columns)
 
-    app_logger.info('end')
     return comparison_stats, comparison_diff_detais
 
 
+def merge_column_group_results(
+    stats: ComparisonStats,
+    details: ComparisonDiffDetails,
+    group_details: List[ComparisonDiffDetails],
+    mismatched_rows: int,
+    discrepant_data_examples: pd.DataFrame,
+    non_key_columns: List[str],
+    max_examples: int = DEFAULT_MAX_EXAMPLES
+) -> tuple[ComparisonStats, ComparisonDiffDetails]:
+    """
+    Statistics and details of the whole row from the comparisons of column groups of the same rows:
+    key counters and examples of any group (`stats`, `details`), per column counters and examples of every group,
+    the number of common keys with a mismatch in any group and the first discrepant pairs of all columns
+    """
+    diff_counters, diff_examples, first_mismatch = {}, {col: [] for col in non_key_columns}, {}
+    for group in group_details:
+        examples = group.discrepancies_per_col_examples
+        for col, count in zip(group.mismatches_per_column.get('column_name', []),
+                              group.mismatches_per_column.get('mismatch_count', [])):
+            diff_counters[col] = int(count)
+            rows = examples.loc[examples['column_name'] == col]
+            diff_examples[col] = [{'pk': pk, 'src_val': src_val, 'trg_val': trg_val} for pk, src_val, trg_val in
+                                  zip(rows['primary_key'], rows['source_value'], rows['target_value'])]
+            first_mismatch[col] = diff_examples[col][0]['pk'] if diff_examples[col] else None
+    # counters ordered by the first mismatch as in the scan over pairs sorted by keys desc
+    if None not in first_mismatch.values():
+        diff_counters = {col: diff_counters[col]
+                         for col in sorted(diff_counters, key=lambda col: first_mismatch[col], reverse=True)}
+
+    return build_comparison_result(
+        stats.total_source_rows, stats.total_target_rows,
+        stats.total_source_rows - stats.dup_source_rows, stats.total_target_rows - stats.dup_target_rows,
+        mismatched_rows, stats.only_source_rows, stats.only_target_rows,
+        details.dup_source_keys_examples, details.dup_target_keys_examples,
+        details.source_only_keys_examples, details.target_only_keys_examples,
+        discrepant_data_examples.head(max_examples * 2), non_key_columns,
+        lambda common_keys_cnt: summarize_column_discrepancies(diff_counters, diff_examples, common_keys_cnt)
+    )
+
+
+def wilson_interval(successes: int, trials: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """Wilson score interval of a binomial proportion"""
+    if not trials:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence/2)
+    p = successes/trials
+    denominator = 1 + z**2/trials
+    center = (p + z**2/(2*trials))/denominator
+    margin = z*np.sqrt(p*(1 - p)/trials + z**2/(4*trials**2))/denominator
+    return max(0.0, float(center - margin)), min(1.0, float(center + margin))
+
+
+def sample_confidence_intervals(stats: ComparisonStats, confidence: float = 0.95) -> Dict[str, Tuple[float, float]]:
+    """
+    Confidence intervals of the mismatch percentages of a comparison over the key hash sample,
+    every key gets into the sample independently so the counters are binomial
+    """
+    common = stats.common_pk_rows
+    mismatched = common - stats.total_matched_rows
+    max_col_mismatched = round(stats.max_diff_percentage_cols*common/100)
+
+    def only_ratio(only_rows):
+        # share of keys missing on the other side, reported relative to the common keys
+        low, high = wilson_interval(only_rows, common + only_rows, confidence)
+        return 100*low/(1 - low), (100*high/(1 - high) if high < 1 else float('inf'))
+
+    low, high = wilson_interval(mismatched, common, confidence)
+    col_low, col_high = wilson_interval(max_col_mismatched, common, confidence)
+    return {
+        'total_diff_percentage_rows': (100*low, 100*high),
+        'max_diff_percentage_cols': (100*col_low, 100*col_high),
+        'source_only_percentage_rows': only_ratio(stats.only_source_rows),
+        'target_only_percentage_rows': only_ratio(stats.only_target_rows),
+    }
+
+
 def _validate_input_data(
     source_df: pd.DataFrame,
     target_df: pd.DataFrame,
@@ -361,6 +549,60 @@ def _validate_input_data(
         raise ValueError(f"Key columns missing in target: {missing}")
 
 
+def encode_keys(frames: List[pd.DataFrame], key_columns: List[str]) -> List[np.ndarray]:
+    """
+    Single int64 code of the primary key for every row of the frames, equal keys get equal codes in all frames.
+    Columns are factorized and combined positionally, compound codes are renumbered densely
+    when the next column would overflow int64. Codes do not follow the sort order of the keys,
+    missing values are one more value of the column (equal to each other as in duplicated)
+    """
+    codes = None
+    for col in key_columns:
+        col_codes, uniques = pd.factorize(pd.concat([df[col] for df in frames], ignore_index=True),
+                                          use_na_sentinel=False)
+        if codes is None:
+            codes = col_codes.astype(np.int64)
+            continue
+        if (int(codes.max(initial=0)) + 1) * len(uniques) >= 2**63:
+            codes = np.unique(codes, return_inverse=True)[1].astype(np.int64)
+        codes = codes * len(uniques) + col_codes
+    return np.split(codes, np.cumsum([len(df) for df in frames])[:-1])
+
+
+def _key_values(df: pd.DataFrame, key_columns: List[str], positions: np.ndarray) -> list:
+    """Key values of the rows at the positions as in the examples, tuples for compound keys"""
+    rows = df[key_columns].iloc[positions].itertuples(index=False, name=None)
+    return [row if len(key_columns) > 1 else row[0] for row in rows]
+
+
+def _top_key_positions(df: pd.DataFrame, key_columns: List[str], k: int) -> np.ndarray:
+    """
+    Positions of the rows with the k largest (unique) keys in descending order without a full sort:
+    the rows with the first key column below its k-th largest value (in the column's native order)
+    are dropped by partial selection, the rest (k rows and ties of the first column) are sorted
+    """
+    if k <= 0 or df.empty:
+        return np.empty(0, dtype=np.int64)
+    positions = np.arange(len(df))
+    column = df[key_columns[0]]
+    # missing values are ordered differently by partition and sort, such keys are sorted as a whole
+    if len(df) > k and not column.hasnans:
+        first = column.to_numpy()
+        if first.dtype == object:
+            # strings (and mixed values) of the prepared dataframes, numbers and dates keep their native order
+            first = first.astype(str)
+        threshold = np.partition(first, len(first) - k)[len(first) - k]
+        positions = positions[first >= threshold]
+    keys = np.empty(len(positions), dtype=object)
+    keys[:] = _key_values(df, key_columns, positions)
+    return positions[np.argsort(keys, kind='stable')[::-1][:k]]
+
+
+def _top_keys_set(df: pd.DataFrame, key_columns: List[str], k: int) -> set:
+    """Key set of the rows with the k largest keys"""
+    return _create_keys_set(df.iloc[_top_key_positions(df, key_columns, k)], key_columns)
+
+
 def _create_keys_set(df: pd.DataFrame, key_columns: List[str]) -> set:
     """Creates key set for fast comparison"""
     return set(df[key_columns].itertuples(index=False, name=None))
@@ -374,7 +616,9 @@ def generate_comparison_sample_report(source_table:str,
                                    source_query: str = None,
                                    source_params: Dict = None,
                                    target_query: str = None,
-                                   target_params: Dict = None) -> None:
+                                   target_params: Dict = None,
+                                   notes: Optional[List[str]] = None,
+                                   query_hints: Optional[Dict[str, Dict]] = None) -> None:
     """Generate comparison report (logger output looks uuugly)"""
     rl = []
     rl.append("=" * 80)
@@ -396,9 +640,16 @@ def generate_comparison_sample_report(source_table:str,
         rl.append(f"    {target_query}")
         if target_params:
             rl.append(f"    params: {target_params}")
+    if query_hints and any(query_hints.values()):
+        rl.append(format_query_hints(query_hints))
 
     rl.append("-" * 40)
 
+    if notes:
+        rl.append(f"\nNOTES:")
+        for note in notes:
+            rl.append(f"  {note}")
+
     rl.append(f"\nSUMMARY:")
     rl.append(f"  Source rows: {stats.total_source_rows}")
     rl.append(f"  Target rows: {stats.total_target_rows}")
@@ -416,6 +667,10 @@ def generate_comparison_sample_report(source_table:str,
     rl.append(f"  Mismatched rows %: {stats.total_diff_percentage_rows:.5f}")
     rl.append(f"  Final discrepancies score: {stats.final_diff_score:.5f}")
     rl.append(f"  Final data quality score: {stats.final_score:.5f}")
+    if stats.sample_rate is not None:
+        rl.append(f"  Key hash sample: {stats.sample_rate*100:g}% of primary keys, 95% confidence intervals:")
+        for name, (low, high) in (stats.confidence_intervals or {}).items():
+            rl.append(f"    {name}: [{low:.5f}, {high:.5f}]")
 
 
     rl.append(f"  Source-only key examples: {details.source_only_keys_examples}")
@@ -427,6 +682,16 @@ def generate_comparison_sample_report(source_table:str,
     rl.append(f"  Common attribute columns: {', '.join(details.common_attribute_columns)}")
     rl.append(f"  Skipped source columns: {', '.join(details.skipped_source_columns)}")
     rl.append(f"  Skipped target columns: {', '.join(details.skipped_target_columns)}")
+    if details.verified_columns:
+        rl.append(f"  Verified columns (equal checksums, not fetched): {', '.join(details.verified_columns)}")
+    if details.digest_columns:
+        rl.append(f"  Digested columns (md5 and length compared, content fetched for examples): "
+                  f"{', '.join(details.digest_columns)}")
+    if details.semi_join_extra_rows is not None:
+        rl.append(f"  Target rows with keys not in source (semi-join, not fetched): {details.semi_join_extra_rows}")
+    if details.prestats is not None:
+        rl.append(f"\nPRE-STATS (database, before fetching and recent rows exclusion):")
+        rl.append(details.prestats.to_string(index=False))
 
     if stats.max_diff_percentage_cols > 0 and not details.mismatches_per_column.empty:
         rl.append(f"\nCOLUMN DIFFERENCES:")
@@ -464,7 +729,9 @@ def generate_comparison_count_report(source_table:str,
                                   source_query: str = None,
                                   source_params: Dict = None,
                                   target_query: str = None,
-                                  target_params: Dict = None) -> None:
+                                  target_params: Dict = None,
+                                  drill_down: Optional[pd.DataFrame] = None,
+                                  query_hints: Optional[Dict[str, Dict]] = None) -> None:
 
     """Generates comparison report (logger output looks uuugly)"""
     rl = []
@@ -486,6 +753,8 @@ def generate_comparison_count_report(source_table:str,
         rl.append(f"    {target_query}")
         if target_params:
             rl.append(f"    params: {target_params}")
+    if query_hints and any(query_hints.values()):
+        rl.append(format_query_hints(query_hints))
     rl.append("-" * 40)
 
     rl.append(f"\nSUMMARY:")
@@ -511,6 +780,37 @@ def generate_comparison_count_report(source_table:str,
         rl.append(f"\n")
         rl.append(details.discrepant_data_examples.to_string(index=False))
         rl.append(f"\n")
+
+    if drill_down is not None and not drill_down.empty:
+        rl.append(f"\nDRILL-DOWN (mismatched slices):")
+        rl.append("key_buckets 1 is the whole hour, otherwise rows with key hash mod key_buckets = bucket:")
+        rl.append(f"\n")
+        rl.append(drill_down.to_string(index=False))
+        rl.append(f"\n")
+    rl.append("=" * 80)
+
+    return "\n".join(rl)
+
+def generate_unchanged_report(source_table: str,
+                              target_table: str,
+                              previous_status: str,
+                              compared_at: str,
+                              stats: Optional[ComparisonStats] = None) -> str:
+    """Generates report for the comparison skipped because neither side changed"""
+    rl = []
+    rl.append("=" * 80)
+    current_datetime = datetime.now()
+    rl.append(current_datetime.strftime(DATETIME_FORMAT))
+    rl.append(f"COMPARISON SKIPPED (UNCHANGED):")
+    rl.append(f"{source_table}")
+    rl.append(f"VS")
+    rl.append(f"{target_table}")
+    rl.append("=" * 80)
+    rl.append(f"  Reason: neither source nor target changed since {compared_at}")
+    rl.append(f"  Previous status: {previous_status}")
+    if stats:
+        rl.append(f"  Previous final discrepancies score: {stats.final_diff_score:.5f}")
+        rl.append(f"  Previous final data quality score: {stats.final_score:.5f}")
     rl.append("=" * 80)
 
     return "\n".join(rl)
@@ -573,6 +873,76 @@ def clean_recently_changed_data(df1:pd.DataFrame, df2:pd.DataFrame, primary_keys
     return df1_processed, df2_processed
 
 
+def digest_rows(df: pd.DataFrame, key_columns: List[str], value_columns: List[str]) -> pd.DataFrame:
+    """
+    Reduce prepared dataframe to primary key + 64-bit digest of all value columns.
+    pandas hashing uses a fixed hash key, so digests are stable between runs
+    """
+    digest = pd.util.hash_pandas_object(df[value_columns], index=False) if value_columns \
+        else pd.Series(0, index=df.index, dtype='uint64')
+    result = df[key_columns].copy()
+    result['xrow_digest'] = digest.values
+    return result
+
+
+def hash_value_columns(df: pd.DataFrame, key_columns: List[str]) -> pd.DataFrame:
+    """
+    Reduce prepared dataframe to primary key + 64-bit hash of every value column,
+    the recently changed flag is kept as is. Equal prepared values have equal hashes
+    """
+    return pd.DataFrame({
+        col: df[col] if col in key_columns or col == 'xrecently_changed'
+        else pd.util.hash_array(df[col].to_numpy(dtype=object))
+        for col in df.columns
+    })
+
+
+def upsert_keyed_state(state: Optional[pd.DataFrame], delta: pd.DataFrame, key_columns: List[str]) -> pd.DataFrame:
+    """Replace state rows by the delta rows with the same primary key and append the new ones"""
+    delta = delta.drop_duplicates(subset=key_columns, keep='last')
+    if state is None or state.empty:
+        return delta.reset_index(drop=True)
+
+    state_index = pd.MultiIndex.from_frame(state[key_columns])
+    delta_index = pd.MultiIndex.from_frame(delta[key_columns])
+    kept = state[~state_index.isin(delta_index)]
+    return pd.concat([kept, delta], ignore_index=True)
+
+
+def apply_incremental_delta(state: Optional[pd.DataFrame],
+                            delta: pd.DataFrame,
+                            key_columns: List[str],
+                            value_columns: List[str],
+                            excluded_keys: set,
+                            previous_watermark: Optional[str]) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    Merge prepared delta rows (with `xwatermark` column) into key->digest state
+
+    Rows with excluded keys (recently changed on any side) are held back and the new watermark
+    stays at or below them, so they are fetched again on the next run
+
+    Returns:
+        tuple: (new_state, new_watermark)
+    """
+    if delta.empty:
+        if state is None:
+            state = pd.DataFrame(columns=key_columns + ['xrow_digest'])
+        return state, previous_watermark
+
+    applied = exclude_by_keys(delta, key_columns, excluded_keys) if excluded_keys else delta
+    held = delta.drop(applied.index)
+
+    applied_marks = applied.loc[applied['xwatermark'] != NULL_REPLACEMENT, 'xwatermark']
+    held_marks = held.loc[held['xwatermark'] != NULL_REPLACEMENT, 'xwatermark']
+
+    watermark = applied_marks.max() if not applied_marks.empty else previous_watermark
+    if not held_marks.empty:
+        watermark = min(held_marks.min(), watermark) if watermark else held_marks.min()
+
+    new_state = upsert_keyed_state(state, digest_rows(applied, key_columns, value_columns), key_columns)
+    return new_state, watermark
+
+
 def find_count_discrepancies(
     source_counts: pd.DataFrame,
     target_counts: pd.DataFrame
@@ -640,6 +1010,10 @@ def cross_fill_missing_dates(df1, df2, date_column='dt', value_column='cnt'):
 
     return df1_full, df2_full
 
+def format_query_hints(query_hints: Dict[str, Dict]) -> str:
+    """Report line of the effective query hints per side"""
+    return "query hints: " + ", ".join(f"{side} {hints}" for side, hints in query_hints.items() if hints)
+
 def format_keys(keys, max_examples):
     if keys:
         keys = {next(iter(x)) if len(x) == 1 else x for x in list(keys)[:max_examples]}
@@ -654,12 +1028,13 @@ def get_dataframe_size_gb(df: pd.DataFrame) -> float:
         return 0.0
     return df.memory_usage(deep=True).sum() / 1024 / 1024 / 1024
 
-def validate_dataframe_size(df: pd.DataFrame, max_size_gb: float) -> None:
-    """Validate DataFrame size and raise exception if exceeds limit"""
+def validate_dataframe_size(df: pd.DataFrame, max_size_gb: float, size_gb: Optional[float] = None) -> None:
+    """Validate DataFrame size and raise exception if exceeds limit (size_gb when already calculated)"""
     if df is None:
         return
 
-    size_gb = get_dataframe_size_gb(df)
+    if size_gb is None:
+        size_gb = get_dataframe_size_gb(df)
 
     if size_gb > max_size_gb:
         raise ValueError(